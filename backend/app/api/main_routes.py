@@ -6,10 +6,14 @@ from fastapi import APIRouter
 from app.api.routes.public import (
     auth_routes,
     song_routes,
+    artist_routes,
     playlist_routes,
     trending_routes,
     external_routes,
-    documentation_routes
+    documentation_routes,
+    me_routes,
+    event_routes,
+    suggest_routes
 )
 from app.api import codebase
 
@@ -18,8 +22,12 @@ router = APIRouter()
 # Include all public route modules
 router.include_router(auth_routes.router)
 router.include_router(song_routes.router)
+router.include_router(artist_routes.router)
 router.include_router(playlist_routes.router)
 router.include_router(trending_routes.router)
 router.include_router(external_routes.router)
 router.include_router(documentation_routes.router)
+router.include_router(me_routes.router)
+router.include_router(event_routes.router)
+router.include_router(suggest_routes.router)
 router.include_router(codebase.router)
@@ -2,8 +2,14 @@
 Admin Analytics Routes
 Handles admin analytics and reporting functionality
 """
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.core import jobs
 from app.services.admin.admin_service import AdminService
+from app.services.analytics.export_service import EXPORT_FORMATS, AnalyticsExportService
+from app.services.analytics.rollup_store import RollupSyncService
 from app.middleware.admin_auth import verify_admin_token
 
 router = APIRouter(
@@ -16,20 +22,111 @@ router = APIRouter(
 def get_admin_service() -> AdminService:
     return AdminService()
 
-# Nuk eshte implementuar ne service
+
+def get_rollup_service() -> RollupSyncService:
+    return RollupSyncService(use_service_role=True)
+
+
+def get_export_service() -> AnalyticsExportService:
+    return AnalyticsExportService(use_service_role=True)
+
 @router.get("/song/{song_id}")
 async def get_song_analytics(
     song_id: str,
+    start_date: Optional[date] = Query(None, description="First day for unique listeners (default: 30 days ago)"),
+    end_date: Optional[date] = Query(None, description="Last day for unique listeners (default: today)"),
     admin_service: AdminService = Depends(get_admin_service)
 ):
-    """Get song analytics"""
-    return admin_service.get_song_analytics(song_id)
+    """
+    Get song analytics
+    - Play, like and playlist-add counts for the last 24h, 7d, 30d and all time
+    - Approximate unique listeners between start_date and end_date (HyperLogLog,
+      relative standard error ~1.6%, lower/upper give a ~95% range)
+    """
+    try:
+        return admin_service.get_song_analytics(song_id, start_date=start_date, end_date=end_date)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
 
-# Nuk eshte implementuar ne service
 @router.get("/top-songs")
 async def get_top_songs(
     limit: int = 50,
+    window: str = Query("7d", description="24h, 7d, 30d or all"),
+    metric: str = Query("plays", description="plays, likes or playlist_adds"),
     admin_service: AdminService = Depends(get_admin_service)
 ):
-    """Get top songs by play count"""
-    return admin_service.get_top_songs(limit)
\ No newline at end of file
+    """Get top songs by play count, likes or playlist adds over a time window"""
+    try:
+        return admin_service.get_top_songs(limit, window=window, metric=metric)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+
+@router.get("/timeseries")
+def get_timeseries(
+    metric: str = Query("plays", description="plays, likes or playlist_adds"),
+    granularity: str = Query("day", description="hour or day"),
+    start: Optional[datetime] = Query(None, description="First bucket (default: 30 days / 48 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Last bucket (default: now)"),
+    song_id: Optional[str] = Query(None, description="Song to chart; catalog-wide total when omitted"),
+    rollup_service: RollupSyncService = Depends(get_rollup_service)
+):
+    """
+    Get an hourly or daily series of a metric for one song or the whole catalog
+    - Served from the memory-mapped rollup store, refreshed every few minutes
+    """
+    try:
+        return rollup_service.get_timeseries(metric, granularity, start=start, end=end, song_id=song_id)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+@router.post("/rollups/rebuild")
+async def rebuild_rollups(
+    background_tasks: BackgroundTasks,
+    rollup_service: RollupSyncService = Depends(get_rollup_service)
+):
+    """Re-read the full retention of metric counters into the rollup store in the background"""
+    job_id = jobs.create_job("analytics_rollup_rebuild")
+    background_tasks.add_task(jobs.run_job, job_id, rollup_service.sync, full=True)
+    return {"message": "Rollup rebuild started", "job_id": job_id}
+
+
+@router.get("/export")
+def export_analytics(
+    dataset: str = Query("plays", description="plays, likes or playlist_songs"),
+    start: Optional[datetime] = Query(None, description="Start of the range, inclusive (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="End of the range, exclusive (default: now)"),
+    format: str = Query("csv", description="csv or parquet"),
+    export_service: AnalyticsExportService = Depends(get_export_service)
+):
+    """
+    Stream raw analytics facts for a date range as CSV or Parquet
+    - Rows are read page by page and sent as they arrive, so any range can be exported
+    - Parquet output has one row group per page
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    # Times without an offset are taken as UTC
+    start, end = (moment.replace(tzinfo=timezone.utc) if moment and moment.tzinfo is None else moment
+                  for moment in (start, end))
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=1)
+
+    try:
+        if format == "parquet":
+            chunks = export_service.export_parquet(dataset, start, end)
+            media_type = "application/vnd.apache.parquet"
+        else:
+            chunks = export_service.export_csv(dataset, start, end)
+            media_type = "text/csv"
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    filename = f"{dataset}_{start:%Y%m%dT%H%M%S}_{end:%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -2,9 +2,22 @@
 Admin Maintenance Routes
 Handles admin maintenance and system operations
 """
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from app.core import jobs
+from app.core.responses import stream_json
 from app.services.admin.admin_service import AdminService
+from app.services.external.storage_service import StorageService
+from app.services.external.storage_gc_service import StorageGCService
 from app.services.music.artist_service import ArtistService
+from app.services.music.similar_songs import SimilarSongsService
+from app.services.music.artist_embeddings import ArtistEmbeddingService
+from app.services.media.waveform_service import WaveformService
+from app.services.media.cover_image_service import CoverImageService
+from app.services.media.seek_table_service import SeekTableService
+from app.services.media.audio_cache import get_audio_cache
+from app.services.base.url_signer import get_url_signer
+from app.services.analytics.play_event_service import get_play_event_pipeline
 from app.middleware.admin_auth import verify_admin_token
 
 router = APIRouter(
@@ -15,29 +28,238 @@ router = APIRouter(
 
 
 def get_admin_service() -> AdminService:
-    return AdminService()
+    # The sweep must see and delete every user's rows, which RLS hides from the anon key
+    return AdminService(use_service_role=True)
 
 
 def get_artist_service() -> ArtistService:
     return ArtistService(use_service_role=True)
 
 
+def get_waveform_service() -> WaveformService:
+    return WaveformService(use_service_role=True)
+
+
+def get_storage_service() -> StorageService:
+    return StorageService(use_service_role=True)
+
+
+def get_storage_gc_service() -> StorageGCService:
+    return StorageGCService(use_service_role=True)
+
+
+def get_similar_songs_service() -> SimilarSongsService:
+    return SimilarSongsService(use_service_role=True)
+
+
+def get_artist_embedding_service() -> ArtistEmbeddingService:
+    return ArtistEmbeddingService(use_service_role=True)
+
+
+def get_cover_image_service() -> CoverImageService:
+    return CoverImageService(use_service_role=True)
+
+
+def get_seek_table_service() -> SeekTableService:
+    return SeekTableService(use_service_role=True)
+
+
 @router.post("/cleanup")
 async def cleanup_orphaned_data(
+    background_tasks: BackgroundTasks,
+    dry_run: bool = False,
+    rows_per_second: Optional[int] = Query(None, ge=0, description="Scan rate limit (0 = unlimited)"),
     admin_service: AdminService = Depends(get_admin_service)
 ):
-    """Clean up orphaned records"""
-    result = admin_service.cleanup_orphaned_data()
-    return {"message": "Cleanup completed", "removed": result}
+    """
+    Remove playlist_songs, liked_songs and trending_songs rows that reference missing songs or playlists
+    - **dry_run**: Only report orphans (default false)
+    - **rows_per_second**: Scan rate limit (default CLEANUP_MAX_ROWS_PER_SECOND)
+    - Runs in the background; poll the returned job for progress and the report
+    """
+    job_id = jobs.create_job("orphan_cleanup", {"dry_run": dry_run, "rows_per_second": rows_per_second})
+    background_tasks.add_task(
+        jobs.run_job, job_id, admin_service.cleanup_orphaned_data,
+        dry_run=dry_run, rows_per_second=rows_per_second
+    )
+    return {"message": "Dry run started" if dry_run else "Cleanup started", "job_id": job_id}
+
+
+@router.post("/storage/gc")
+async def collect_storage_garbage(
+    background_tasks: BackgroundTasks,
+    dry_run: bool = False,
+    min_age_hours: Optional[int] = Query(None, ge=0, description="Keep objects younger than this"),
+    storage_gc_service: StorageGCService = Depends(get_storage_gc_service)
+):
+    """
+    Remove objects in the songs and covers buckets that no song, album, artist or trending album references
+    - **dry_run**: Only report unreferenced objects and reclaimable bytes (default false)
+    - **min_age_hours**: Grace period for fresh uploads (default STORAGE_GC_MIN_AGE_HOURS)
+    - Runs in the background; poll the returned job for progress and the report
+    """
+    job_id = jobs.create_job("storage_gc", {"dry_run": dry_run, "min_age_hours": min_age_hours})
+    background_tasks.add_task(
+        jobs.run_job, job_id, storage_gc_service.collect_garbage,
+        dry_run=dry_run, min_age_hours=min_age_hours
+    )
+    return {"message": "Dry run started" if dry_run else "Storage garbage collection started", "job_id": job_id}
+
+
+@router.post("/similar-songs/rebuild")
+async def rebuild_similar_songs(
+    background_tasks: BackgroundTasks,
+    full: bool = False,
+    similar_songs_service: SimilarSongsService = Depends(get_similar_songs_service)
+):
+    """
+    Rebuild the similar songs index from playlist and liked-song co-occurrence
+    - **full**: Recompute from every row instead of only rows added since the last build (default false)
+    - Runs in the background; poll the returned job for progress
+    """
+    job_id = jobs.create_job("similar_songs_rebuild", {"full": full})
+    background_tasks.add_task(jobs.run_job, job_id, similar_songs_service.rebuild, full=full)
+    return {"message": "Similar songs rebuild started", "job_id": job_id}
+
+
+@router.post("/artist-embeddings/rebuild")
+async def rebuild_artist_embeddings(
+    background_tasks: BackgroundTasks,
+    artist_embedding_service: ArtistEmbeddingService = Depends(get_artist_embedding_service)
+):
+    """
+    Recompute artist embeddings for related artists from likes and playlists
+    - Runs in the background; poll the returned job for progress
+    """
+    job_id = jobs.create_job("artist_embeddings_rebuild")
+    background_tasks.add_task(jobs.run_job, job_id, artist_embedding_service.rebuild)
+    return {"message": "Artist embeddings rebuild started", "job_id": job_id}
 
 
 @router.get("/artists")
-async def get_artists(
+def get_artists(
+    request: Request,
     artist_service: ArtistService = Depends(get_artist_service)
 ):
-    """Get list of unique artist names"""
+    """
+    Get list of unique artist names
+    - Streamed in sorted order; send `Accept: application/x-ndjson` for one name per line
+    """
     try:
-        artists = artist_service.get_unique_artists()
-        return {"artists": artists}
+        return stream_json(request, artist_service.iter_unique_artists(), "artists")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/artists/search")
+def search_artists(
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    artist_service: ArtistService = Depends(get_artist_service)
+):
+    """
+    Page through artists with their song counts, or autocomplete by name prefix
+    - **prefix**: Case-insensitive start of the artist name (empty for all artists)
+    - **cursor**: `next_cursor` of the previous page
+    - **limit**: Artists per page (1 to 200)
+    """
+    try:
+        result = artist_service.search_artists(prefix, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+
+@router.post("/waveforms/backfill")
+async def backfill_waveforms(
+    background_tasks: BackgroundTasks,
+    overwrite: bool = False,
+    waveform_service: WaveformService = Depends(get_waveform_service)
+):
+    """
+    Generate waveform peaks for existing songs in the background
+    - **overwrite**: Regenerate waveforms that already exist (default false)
+    """
+    job_id = jobs.create_job("waveform_backfill", {"overwrite": overwrite})
+    background_tasks.add_task(jobs.run_job, job_id, waveform_service.backfill_waveforms, overwrite=overwrite)
+    return {"message": "Waveform backfill started", "job_id": job_id}
+
+
+@router.post("/covers/backfill")
+async def backfill_cover_images(
+    background_tasks: BackgroundTasks,
+    overwrite: bool = False,
+    cover_image_service: CoverImageService = Depends(get_cover_image_service)
+):
+    """
+    Generate resized cover thumbnails for existing songs in the background
+    - **overwrite**: Regenerate songs that already have cover_images (default false)
+    """
+    job_id = jobs.create_job("cover_images_backfill", {"overwrite": overwrite})
+    background_tasks.add_task(jobs.run_job, job_id, cover_image_service.backfill_cover_images, overwrite=overwrite)
+    return {"message": "Cover image backfill started", "job_id": job_id}
+
+
+@router.post("/seek-tables/backfill")
+async def backfill_seek_tables(
+    background_tasks: BackgroundTasks,
+    overwrite: bool = False,
+    seek_table_service: SeekTableService = Depends(get_seek_table_service)
+):
+    """
+    Build MP3 seek tables for existing songs in the background
+    - **overwrite**: Rebuild seek tables that already exist (default false)
+    """
+    job_id = jobs.create_job("seek_table_backfill", {"overwrite": overwrite})
+    background_tasks.add_task(jobs.run_job, job_id, seek_table_service.backfill_seek_tables, overwrite=overwrite)
+    return {"message": "Seek table backfill started", "job_id": job_id}
+
+
+@router.get("/dedup/report")
+async def get_dedup_report(
+    storage_service: StorageService = Depends(get_storage_service)
+):
+    """Report how many uploads reused existing objects and the bytes saved"""
+    result = storage_service.get_dedup_report()
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+
+@router.get("/stream-cache")
+async def get_stream_cache_stats(top: int = 20):
+    """
+    Get audio stream cache usage and the most streamed songs
+    - **top**: Number of most streamed songs to include (default 20)
+    """
+    return get_audio_cache().get_stats(top=top)
+
+
+@router.get("/signed-urls")
+async def get_signed_url_stats():
+    """Get signed storage URL cache usage"""
+    return get_url_signer().get_stats()
+
+
+@router.get("/play-events")
+async def get_play_event_stats():
+    """Get play event ingestion buffer, flush and spill counters"""
+    return get_play_event_pipeline().get_stats()
+
+
+@router.get("/jobs")
+async def list_jobs():
+    """List recent background maintenance jobs"""
+    return {"jobs": jobs.list_jobs()}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status and progress of a background job"""
+    job = jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
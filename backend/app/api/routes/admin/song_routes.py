@@ -2,10 +2,14 @@
 Admin Song Management Routes
 Handles admin-only song operations: CRUD, upload, bulk operations
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from typing import List, Dict, Any
 from app.services.music.song_service import SongService
-from app.services.external.storage_service import StorageService
+from app.services.external.storage_service import StorageService, decode_base64_with_hash
+from app.services.media.waveform_service import WaveformService
+from app.services.media.seek_table_service import SeekTableService
+from app.services.media.cover_image_service import CoverImageService, cover_path_from_url
+from app.core.responses import FastJSONResponse
 from app.middleware.admin_auth import verify_admin_token
 from app.schemas.upload import SongUploadRequest
 import base64
@@ -25,6 +29,18 @@ def get_storage_service() -> StorageService:
     return StorageService(use_service_role=True)
 
 
+def get_waveform_service() -> WaveformService:
+    return WaveformService(use_service_role=True)
+
+
+def get_cover_image_service() -> CoverImageService:
+    return CoverImageService(use_service_role=True)
+
+
+def get_seek_table_service() -> SeekTableService:
+    return SeekTableService(use_service_role=True)
+
+
 @router.get("/")
 async def list_all_songs(
     page: int = 1,
@@ -34,7 +50,7 @@ async def list_all_songs(
     """List all songs for admin management"""
     try:
         result = song_service.list_songs(page=page, limit=limit)
-        return result
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -83,14 +99,21 @@ async def delete_song(
 
 
 @router.post("/upload")
-async def upload_song(
+def upload_song(
     request: SongUploadRequest,
+    background_tasks: BackgroundTasks,
     song_service: SongService = Depends(get_song_service),
-    storage_service: StorageService = Depends(get_storage_service)
+    storage_service: StorageService = Depends(get_storage_service),
+    waveform_service: WaveformService = Depends(get_waveform_service),
+    cover_image_service: CoverImageService = Depends(get_cover_image_service),
+    seek_table_service: SeekTableService = Depends(get_seek_table_service)
 ):
     """
     Upload a new song (Admin only)
     - **request**: Base64 encoded song data with metadata
+
+    A plain def so FastAPI runs it in its threadpool: decoding, storage
+    uploads and waiting on the cover image pool all block.
     """
     try:
         def decode_str(b64_str: str) -> str:
@@ -105,8 +128,9 @@ async def upload_song(
         file_name = decode_str(request.file_name)
         content_type = decode_str(request.content_type)
         
-        file_content = base64.b64decode(request.file_content)
-        cover_file_content = base64.b64decode(request.cover_file_content)
+        # Decode and SHA-256 hash in one pass so storage can skip duplicate writes
+        file_content, file_hash = decode_base64_with_hash(request.file_content)
+        cover_file_content, cover_hash = decode_base64_with_hash(request.cover_file_content)
         
         duration_seconds = request.duration_seconds or 174
         try:
@@ -128,19 +152,33 @@ async def upload_song(
         cover_ext = cover_file_name.split('.')[-1] if '.' in cover_file_name else 'jpg'
         cover_path = f"{artist.lower().replace(' ', '_')}_{title.lower().replace(' ', '_')}.{cover_ext}"
         
-        cover_url = storage_service.upload_cover(cover_file_content, cover_path, cover_content_type)
-        uploaded_path = storage_service.upload_file(file_content, storage_path, content_type)
+        cover_url = storage_service.upload_cover(cover_file_content, cover_path, cover_content_type, cover_hash)
+        # May be the path of an existing identical file
+        uploaded_path = storage_service.upload_file(file_content, storage_path, content_type, file_hash)
+
+        # Thumbnails are rendered in the image worker pool before the song is saved
+        cover_images = None
+        try:
+            cover_images = cover_image_service.generate_cover_images(cover_file_content, cover_path_from_url(cover_url))
+        except Exception as e:
+            print(f"Could not generate cover images: {e}")
         
         song_data = {
             "title": title,
             "artist": artist,
             "album": album,
             "duration_seconds": duration_seconds,
-            "file_path": storage_path,
-            "cover_image_url": cover_url
+            "file_path": uploaded_path,
+            "cover_image_url": cover_url,
+            "cover_images": cover_images
         }
         
         result = song_service.insert_song(song_data)
+
+        # Ingest stages run after the response so uploads are not slowed down
+        background_tasks.add_task(waveform_service.generate_for_track, file_content, uploaded_path)
+        background_tasks.add_task(seek_table_service.generate_for_track, file_content, uploaded_path)
+
         return {"success": True, "data": result}
         
     except Exception as e:
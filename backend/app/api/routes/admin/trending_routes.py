@@ -2,9 +2,12 @@
 Admin Trending Management Routes
 Handles admin operations for trending content management
 """
-from fastapi import APIRouter, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel
+from app.core import scheduler
 from app.services.admin.admin_service import AdminService
+from app.services.music.trending_engine import get_trending_engine
 from app.middleware.admin_auth import verify_admin_token
 
 router = APIRouter(
@@ -14,6 +17,11 @@ router = APIRouter(
 )
 
 
+class TrendingRollbackRequest(BaseModel):
+    kind: str
+    version: Optional[int] = None
+
+
 def get_admin_service() -> AdminService:
     return AdminService()
 
@@ -23,9 +31,14 @@ async def update_trending_songs(
     trending_data: List[Dict[str, Any]],
     admin_service: AdminService = Depends(get_admin_service)
 ):
-    """Update trending songs rankings"""
-    trending_songs = admin_service.update_trending_songs(trending_data)
-    return {"message": f"Updated {len(trending_songs)} trending songs"}
+    """Publish trending songs rankings as a new snapshot"""
+    try:
+        result = admin_service.update_trending_songs(trending_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error"))
+    return {"message": f"Updated {result['count']} trending songs", "version": result["version"]}
 
 
 @router.post("/albums")
@@ -33,6 +46,69 @@ async def update_trending_albums(
     albums_data: List[Dict[str, Any]],
     admin_service: AdminService = Depends(get_admin_service)
 ):
-    """Update trending albums"""
-    albums = admin_service.update_trending_albums(albums_data)
-    return {"message": f"Updated {len(albums)} trending albums"}
\ No newline at end of file
+    """Publish trending albums as a new snapshot"""
+    try:
+        result = admin_service.update_trending_albums(albums_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error"))
+    return {"message": f"Updated {result['count']} trending albums", "version": result["version"]}
+
+
+@router.get("/snapshots")
+def list_trending_snapshots(
+    kind: str = Query("songs", description="songs or albums"),
+    admin_service: AdminService = Depends(get_admin_service)
+):
+    """List retained trending snapshots, newest first, marking the published one"""
+    try:
+        result = admin_service.list_trending_snapshots(kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+
+@router.post("/rollback")
+def rollback_trending(
+    request: TrendingRollbackRequest,
+    admin_service: AdminService = Depends(get_admin_service)
+):
+    """
+    Publish a retained trending snapshot again
+    - **kind**: songs or albums
+    - **version**: Snapshot to publish (default: the one before the current)
+    """
+    try:
+        result = admin_service.rollback_trending(request.kind, request.version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+
+@router.get("/preview")
+def preview_trending(limit: int = Query(None, ge=1, le=500, description="Songs and albums to include")):
+    """Show what the trending engine would publish now, without writing it"""
+    return get_trending_engine().publish(limit=limit, dry_run=True)
+
+
+@router.post("/publish")
+def publish_trending(
+    limit: int = Query(None, ge=1, le=500, description="Songs and albums to publish"),
+    dry_run: bool = False
+):
+    """Publish the trending engine's current top songs and albums"""
+    try:
+        return get_trending_engine().publish(limit=limit, dry_run=dry_run)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/engine")
+def get_trending_engine_status():
+    """Get trending engine score counts and publishing schedule"""
+    return {"engine": get_trending_engine().get_stats(), "tasks": scheduler.list_tasks()}
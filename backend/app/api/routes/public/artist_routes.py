@@ -0,0 +1,25 @@
+"""
+Artist Routes
+Handles artist endpoints: related artists
+"""
+from fastapi import APIRouter, HTTPException, Query
+from app.core.responses import FastJSONResponse
+from app.services.music.artist_embeddings import ArtistEmbeddingService
+
+router = APIRouter(prefix="/artists", tags=["artists"])
+artist_embedding_service = ArtistEmbeddingService()
+
+
+@router.get("/{artist_id}/related")
+def get_related_artists(artist_id: str, limit: int = Query(10, ge=1, le=50)):
+    """
+    Get artists whose fans also like this artist
+    - **artist_id**: ID of the artist
+    - **limit**: Number of artists to return (default 10, max 50)
+    - Served from artist embeddings rebuilt in the background; artists
+      without listeners yet return an empty list
+    """
+    result = artist_embedding_service.get_related_artists(artist_id, limit=limit)
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return FastJSONResponse(result)
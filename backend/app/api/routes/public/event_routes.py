@@ -0,0 +1,43 @@
+"""
+Event Routes
+Handles ingestion of client listening events
+"""
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from app.core.responses import FastJSONResponse
+from app.services.analytics.play_event_service import get_play_event_pipeline
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.post("/plays", status_code=202)
+async def record_plays(request: Request):
+    """
+    Record play events
+    - Body: a single event, a list of events, or {"events": [...]}
+    - Each event: **song_id** (required), **event_id**, **user_id**, **played_at**
+      (ISO 8601 or epoch ms), **duration_played_ms**, **source**
+    - Events are buffered and written in bulk; resending an event_id is ignored
+    - Returns 429 with Retry-After when the ingestion buffer is full
+    """
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+    if isinstance(body, dict):
+        body = body["events"] if isinstance(body.get("events"), list) else [body]
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="Expected a play event or a list of play events")
+
+    try:
+        result = get_play_event_pipeline().submit(body)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    if result["status"] == "full":
+        raise HTTPException(status_code=429, detail="Play event buffer is full, retry shortly",
+                            headers={"Retry-After": "1"})
+    if result["status"] == "unavailable":
+        raise HTTPException(status_code=503, detail="Play event ingestion is temporarily unavailable",
+                            headers={"Retry-After": "30"})
+    return FastJSONResponse({"accepted": result["accepted"]}, status_code=202)
@@ -0,0 +1,69 @@
+"""
+Current User Routes
+Handles per-user state: the server-side playback queue and the home feed
+"""
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Optional
+from app.core.responses import FastJSONResponse
+from app.services.music.queue_service import QueueService
+from app.services.music.home_feed_service import get_home_feed_service
+
+router = APIRouter(prefix="/me", tags=["me"])
+
+
+class UpdateQueueRequest(BaseModel):
+    song_ids: Optional[List[str]] = None
+    position: int = 0
+
+
+@router.get("/home")
+async def get_home(user_id: str, limit: int = Query(10, description="Entries per section (max 50)")):
+    """
+    Get everything the home page shows in one response
+    - **user_id**: ID of the user
+    - **limit**: Entries per section (default 10)
+    - Sections: trending_songs, trending_albums, liked_songs, playlists, new_songs
+    - Each song appears once in `songs`; sections refer to songs by `song_id`
+    - Sections that fail or time out are empty and listed in `errors`
+    """
+    try:
+        result = await get_home_feed_service().get_home(user_id, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return FastJSONResponse(result)
+
+
+@router.get("/queue")
+def get_queue(user_id: str, ahead: int = Query(5, description="Number of upcoming tracks to include")):
+    """
+    Get the user's playback queue
+    - **user_id**: ID of the user
+    - **ahead**: Number of upcoming tracks to include (default 5)
+    - Returns the current and next tracks with metadata, audio URLs and byte sizes for prefetching
+    """
+    try:
+        queue_service = QueueService(use_service_role=True)
+        result = queue_service.get_queue(user_id, ahead=ahead)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return FastJSONResponse(result)
+
+
+@router.put("/queue")
+def update_queue(request: UpdateQueueRequest, user_id: str, ahead: int = 5):
+    """
+    Replace the user's playback queue or move within it
+    - **song_ids**: New queue contents (omit to keep the current queue)
+    - **position**: Index of the current track
+    """
+    try:
+        queue_service = QueueService(use_service_role=True)
+        result = queue_service.set_queue(user_id, song_ids=request.song_ids, position=request.position, ahead=ahead)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return FastJSONResponse(result)
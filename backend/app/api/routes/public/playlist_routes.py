@@ -2,8 +2,9 @@
 Playlist Routes
 Handles playlist-related endpoints: CRUD operations, song management
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
+from app.core.responses import FastJSONResponse, stream_json
 from app.services.music.playlist_service import PlaylistService
 
 router = APIRouter(prefix="/playlists", tags=["playlists"])
@@ -40,11 +41,19 @@ def create_playlist(request: CreatePlaylistRequest):
 
 
 @router.get("/")
-def get_playlists(user_id: str = None, public_only: bool = False):
+def get_playlists(request: Request, user_id: str = None, public_only: bool = False):
     """
     Get playlists - returns user's own playlists (public + private) plus other public playlists
+    - Without user_id (or with public_only) the playlists are streamed newest first;
+      send `Accept: application/x-ndjson` for one playlist per line
     """
     admin_playlist_service = PlaylistService(use_service_role=True)
+    if public_only or not user_id:
+        try:
+            return stream_json(request, admin_playlist_service.iter_playlists(public_only=public_only), "playlists")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve playlists: {str(e)}")
+
     result = admin_playlist_service.get_playlists(user_id=user_id, public_only=public_only)
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
@@ -76,7 +85,7 @@ def get_playlist(playlist_id: str):
     result = admin_playlist_service.get_playlist_by_id(playlist_id)
     if result.get("error"):
         raise HTTPException(status_code=404, detail=result["error"])
-    return result
+    return FastJSONResponse(result)
 
 
 @router.put("/{playlist_id}")
@@ -2,19 +2,35 @@
 Songs Routes
 Handles song-related endpoints: listing, searching, liking
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, FileRangeResponse, RangeNotSatisfiable, parse_range_header
 from app.services.music.song_service import SongService
 from app.services.music.like_service import LikeService
+from app.services.music.similar_songs import SimilarSongsService
 from app.services.external.spotify_service import SpotifyService
-from typing import Optional
+from app.services.media.waveform_service import WaveformService
+from app.services.media.seek_table_service import SeekTableService
+from app.services.media.stream_service import AudioStreamService
+from app.services.media.audio_cache import get_audio_cache
+from typing import List, Optional
+from pydantic import BaseModel
 
 router = APIRouter(prefix="/songs", tags=["songs"])
 song_service = SongService()
+similar_songs_service = SimilarSongsService()
 
 def get_spotify_service():
     return SpotifyService()
 
 
+class DownloadUrlsRequest(BaseModel):
+    song_ids: List[str] = []
+    playlist_id: Optional[str] = None
+    user_id: Optional[str] = None
+
+
 @router.get("/")
 async def list_songs(page: int = 1, limit: int = 20):
     """
@@ -28,7 +44,7 @@ async def list_songs(page: int = 1, limit: int = 20):
     result = song_service.list_songs(page=page, limit=limit)
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
-    return result
+    return FastJSONResponse(result)
 
 
 @router.get("/search")
@@ -41,7 +57,7 @@ def search_songs(q: str, limit: int = 10):
     result = song_service.search_songs(query=q, limit=limit)
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
-    return result
+    return FastJSONResponse(result)
 
 
 @router.get("/liked")
@@ -51,7 +67,7 @@ def get_liked_songs(user_id: str):
     result = admin_like_service.get_liked_songs(user_id)
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
-    return result
+    return FastJSONResponse(result)
 
 
 @router.post("/{song_id}/like")
@@ -79,23 +95,59 @@ def filter_songs(
     title: Optional[str] = Query(None, description="Filter by song title"),
     artist: Optional[str] = Query(None, description="Filter by artist name"),
     album: Optional[str] = Query(None, description="Filter by album name"),
-    genre: Optional[str] = Query(None, description="Filter by genre")
+    genre: Optional[str] = Query(None, description="Filter by genre"),
+    mode: str = Query("contains", description="Match mode: contains, prefix or exact"),
+    limit: int = Query(50, description="Number of tracks per page (max 200)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    facet_limit: int = Query(20, description="Values per facet (0 disables facets)")
 ):
     """
     Filter songs by multiple criteria
-    - **title**: Song title (partial match)
-    - **artist**: Artist name (partial match)
-    - **album**: Album name (partial match)
-    - **genre**: Genre (partial match)
+    - **title**: Song title
+    - **artist**: Artist name
+    - **album**: Album name
+    - **genre**: Genre
+    - **mode**: How every filter matches (case-insensitive): `contains` (default), `prefix` or `exact`
+    - **limit** / **cursor**: Page through results with the returned `next_cursor`
+    - Returns `facets` with per-artist, album and genre counts for the whole filter result
     """
     try:
         spotify_service = get_spotify_service()
-        tracks = spotify_service.search_tracks(title=title, artist=artist, album=album, genre=genre)
-        return {"tracks": tracks, "count": len(tracks)}
+        result = spotify_service.filter_tracks(
+            title=title, artist=artist, album=album, genre=genre,
+            mode=mode, limit=limit, cursor=cursor, facet_limit=max(facet_limit, 0)
+        )
+        return FastJSONResponse(result)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/download-urls")
+def get_download_urls(request: DownloadUrlsRequest):
+    """
+    Get download URLs for many songs in one request (offline sync)
+    - **song_ids**: IDs of the songs to download (max 1000)
+    - **playlist_id**: Alternatively, every song of this playlist in playlist order
+    - **user_id**: Caller; required for their own private playlists
+    - Songs without a file are listed under `missing`
+    - 404 if the playlist does not exist or is private to another user
+    """
+    try:
+        spotify_service = get_spotify_service()
+        result = spotify_service.get_track_download_urls(
+            track_ids=request.song_ids, playlist_id=request.playlist_id, user_id=request.user_id
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result.get("error"):
+        raise HTTPException(status_code=404, detail=result["error"])
+    return FastJSONResponse(result)
+
+
 @router.get("/{song_id}/download")
 def get_download_url(song_id: str):
     """
@@ -112,6 +164,123 @@ def get_download_url(song_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{song_id}/waveform")
+def get_waveform(song_id: str):
+    """
+    Get precomputed waveform peaks for a song
+    - **song_id**: ID of the song
+    - Returns a binary blob of min/max peaks at several zoom levels
+    """
+    waveform_service = WaveformService(use_service_role=True)
+    result = waveform_service.get_waveform(song_id)
+    if result.get("error"):
+        raise HTTPException(status_code=404, detail=result["error"])
+    return Response(
+        content=result["data"],
+        media_type="application/octet-stream",
+        headers={"Cache-Control": f"public, max-age={settings.WAVEFORM_CACHE_MAX_AGE}"}
+    )
+
+
+@router.get("/{song_id}/seek")
+def get_seek_position(song_id: str, t: float = Query(..., ge=0)):
+    """
+    Resolve a timestamp to the byte offset to stream from
+    - **song_id**: ID of the song
+    - **t**: Position in seconds
+    - Returns the frame-accurate byte offset and a ready-made `range` value
+      for a Range request against /songs/{song_id}/stream
+    """
+    seek_table_service = SeekTableService(use_service_role=True)
+    result = seek_table_service.get_seek_position(song_id, t)
+    if result.get("error"):
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+
+@router.api_route("/{song_id}/stream", methods=["GET", "HEAD"])
+def stream_song(song_id: str, request: Request):
+    """
+    Stream a song's audio with HTTP Range support
+    - **song_id**: ID of the song
+    - Popular tracks are served from the local disk cache; misses are fetched
+      from storage and streamed while the cache fills
+    """
+    stream_service = AudioStreamService(use_service_role=True)
+    song_file = stream_service.get_song_file(song_id)
+    if song_file.get("error"):
+        raise HTTPException(status_code=404, detail=song_file["error"])
+
+    try:
+        stream = stream_service.open_stream(song_file["file_path"], song_file["etag"])
+    except IOError as e:
+        raise HTTPException(status_code=502, detail=f"Audio storage unavailable: {str(e)}")
+
+    size = stream["cached"]["size"] if "cached" in stream else stream["fill"].size
+    etag = f'"{song_file["etag"]}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+
+    # A stale If-Range validator means the client must get the whole file
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+
+    try:
+        ranges = parse_range_header(range_header, size)
+    except RangeNotSatisfiable:
+        (stream["cached"] if "cached" in stream else stream)["handle"].close()
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+
+    cache = get_audio_cache()
+    served = sum(end - start + 1 for start, end in ranges) if ranges else size
+    cache.record_stream(song_id, served, from_start=not ranges or ranges[0][0] == 0)
+
+    if "cached" in stream:
+        headers["X-Cache"] = "HIT"
+        cached = stream["cached"]
+        return FileRangeResponse(cached["path"], size, song_file["media_type"], ranges, headers=headers,
+                                 handle=cached["handle"])
+
+    # While filling, several ranges are coalesced into one covering range
+    fill = stream["fill"]
+    headers["X-Cache"] = "MISS"
+    headers["Accept-Ranges"] = "bytes"
+    start, end = (ranges[0][0], ranges[-1][1]) if ranges else (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if ranges:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if request.method == "HEAD":
+        stream["handle"].close()
+        body = iter(())
+    else:
+        body = fill.read(stream["handle"], start, end, settings.STREAM_CHUNK_SIZE)
+    return StreamingResponse(
+        body,
+        status_code=206 if ranges else 200,
+        media_type=song_file["media_type"],
+        headers=headers
+    )
+
+
+@router.get("/{song_id}/similar")
+def get_similar_songs(song_id: str, limit: int = Query(20, ge=1)):
+    """
+    Get songs that often appear in the same playlists and liked songs as this one
+    - **song_id**: ID of the song
+    - **limit**: Number of songs to return (default 20, max SIMILAR_SONGS_TOP_N)
+    - Neighbours come from a precomputed index rebuilt in the background;
+      songs with no co-occurrences yet return an empty list
+    """
+    try:
+        result = similar_songs_service.get_similar_songs(song_id, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return FastJSONResponse(result)
+
+
 @router.get("/{song_id}/liked")
 def check_song_liked(song_id: str, user_id: str):
     """Check if song is liked"""
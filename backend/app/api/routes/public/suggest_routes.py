@@ -0,0 +1,27 @@
+"""
+Suggest Routes
+Handles search-as-you-type suggestions
+"""
+from fastapi import APIRouter, HTTPException, Query
+from app.core.responses import FastJSONResponse
+from app.services.music.song_service import SongService
+
+router = APIRouter(tags=["search"])
+song_service = SongService()
+
+
+@router.get("/suggest")
+def suggest(q: str, limit: int = Query(10, ge=1, le=20)):
+    """
+    Suggest titles, artists and albums for the text typed so far
+    - **q**: Partial query; every word must start a word of the suggestion
+    - **limit**: Number of suggestions to return (default 10, max 20)
+    - Served from an in-memory index ranked by popularity, cheap enough to call per keystroke
+    """
+    try:
+        result = song_service.suggest(q, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result.get("error"):
+        raise HTTPException(status_code=500, detail=result["error"])
+    return FastJSONResponse(result)
@@ -2,32 +2,45 @@
 Trending Routes
 Handles trending content endpoints: songs, albums
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from app.services.music.trending_service import TrendingService
 
 router = APIRouter(prefix="/trending", tags=["trending"])
 trending_service = TrendingService()
 
 
+def _versioned(kind: str, result: dict, limit: int, request: Request, response: Response):
+    """Tag a trending list with its snapshot version, answering 304 when the client already has it"""
+    if result.get("version") is None:
+        return result
+    etag = f'"trending-{kind}-{result["version"]}-{limit}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return result
+
+
 @router.get("/songs")
-def get_trending_songs(limit: int = 10):
+def get_trending_songs(request: Request, response: Response, limit: int = 10):
     """
     Get trending songs
     - **limit**: Number of trending songs to return (default 10)
+    - The ETag names the published snapshot; it changes only when a new list is published or rolled back
     """
     result = trending_service.get_trending_songs(limit=limit)
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
-    return result
+    return _versioned("songs", result, limit, request, response)
 
 
 @router.get("/albums")
-def get_trending_albums(limit: int = 10):
+def get_trending_albums(request: Request, response: Response, limit: int = 10):
     """
     Get trending albums
     - **limit**: Number of trending albums to return (default 10)
+    - The ETag names the published snapshot; it changes only when a new list is published or rolled back
     """
     result = trending_service.get_trending_albums(limit=limit)
     if result.get("error"):
         raise HTTPException(status_code=500, detail=result["error"])
-    return result
\ No newline at end of file
+    return _versioned("albums", result, limit, request, response)
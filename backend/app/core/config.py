@@ -23,7 +23,124 @@ class Settings:
     MAIN_ROUTE_VERSION: int = int(os.getenv("MAIN_ROUTE_VERSION", "1"))
     ADMIN_ROUTE_VERSION: int = int(os.getenv("ADMIN_ROUTE_VERSION", "1"))
     CODEBASE_ROUTE_VERSION: int = int(os.getenv("CODEBASE_ROUTE_VERSION", "1"))
-    
+
+    # Media Processing Configuration
+    # Waveform peaks never change for a given file, so clients may cache them for a long time
+    WAVEFORM_CACHE_MAX_AGE: int = int(os.getenv("WAVEFORM_CACHE_MAX_AGE", "31536000"))
+    # Worker threads used to resize cover images into thumbnails
+    COVER_IMAGE_WORKERS: int = int(os.getenv("COVER_IMAGE_WORKERS", "4"))
+
+    # Audio Streaming Configuration
+    STREAM_CACHE_DIR: str = os.getenv("STREAM_CACHE_DIR", "/tmp/spotify-audio-cache")
+    STREAM_CACHE_MAX_BYTES: int = int(os.getenv("STREAM_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+    STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", str(64 * 1024)))
+
+    # Storage URL Signing
+    # Comma-separated buckets whose files are served through signed URLs instead of public ones
+    PRIVATE_STORAGE_BUCKETS: list = [b.strip() for b in os.getenv("PRIVATE_STORAGE_BUCKETS", "").split(",") if b.strip()]
+    SIGNED_URL_TTL_SECONDS: int = int(os.getenv("SIGNED_URL_TTL_SECONDS", "3600"))
+    # Cached signed URLs are re-minted once they have less than this long left
+    SIGNED_URL_REFRESH_MARGIN_SECONDS: int = int(os.getenv("SIGNED_URL_REFRESH_MARGIN_SECONDS", "300"))
+    SIGNED_URL_CACHE_SIZE: int = int(os.getenv("SIGNED_URL_CACHE_SIZE", "20000"))
+
+    # Catalog Index Configuration
+    # Maximum age of the in-memory filter index before it is rebuilt in the background
+    CATALOG_INDEX_TTL_SECONDS: int = int(os.getenv("CATALOG_INDEX_TTL_SECONDS", "300"))
+    # The artist index is updated in place on song inserts and deletes, so it is rebuilt far less often
+    ARTIST_INDEX_TTL_SECONDS: int = int(os.getenv("ARTIST_INDEX_TTL_SECONDS", "3600"))
+    # Search suggestions (see services/music/suggest_index.py): rebuild age, cached queries,
+    # and tokens of inserted songs kept aside before they are merged into the sorted arrays
+    SUGGEST_INDEX_TTL_SECONDS: int = int(os.getenv("SUGGEST_INDEX_TTL_SECONDS", "3600"))
+    SUGGEST_CACHE_SIZE: int = int(os.getenv("SUGGEST_CACHE_SIZE", "4096"))
+    SUGGEST_DELTA_MAX: int = int(os.getenv("SUGGEST_DELTA_MAX", "4096"))
+
+    # Playback Queue Configuration
+    # Queues are shared between workers through Redis when set, otherwise kept in process memory
+    QUEUE_REDIS_URL: str = os.getenv("QUEUE_REDIS_URL", "")
+    QUEUE_TTL_SECONDS: int = int(os.getenv("QUEUE_TTL_SECONDS", str(7 * 24 * 3600)))
+    QUEUE_MAX_USERS: int = int(os.getenv("QUEUE_MAX_USERS", "50000"))
+    QUEUE_MAX_TRACKS: int = int(os.getenv("QUEUE_MAX_TRACKS", "1000"))
+    QUEUE_MAX_AHEAD: int = int(os.getenv("QUEUE_MAX_AHEAD", "20"))
+
+    # Play Event Ingestion Configuration
+    PLAY_EVENTS_BUFFER_SIZE: int = int(os.getenv("PLAY_EVENTS_BUFFER_SIZE", "50000"))
+    PLAY_EVENTS_FLUSH_SIZE: int = int(os.getenv("PLAY_EVENTS_FLUSH_SIZE", "500"))
+    PLAY_EVENTS_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("PLAY_EVENTS_FLUSH_INTERVAL_SECONDS", "2"))
+    PLAY_EVENTS_MAX_BATCH: int = int(os.getenv("PLAY_EVENTS_MAX_BATCH", "500"))
+    PLAY_EVENTS_SPILL_PATH: str = os.getenv("PLAY_EVENTS_SPILL_PATH", "/tmp/spotify-play-events.ndjson")
+    PLAY_EVENTS_SPILL_MAX_BYTES: int = int(os.getenv("PLAY_EVENTS_SPILL_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # Trending Engine Configuration
+    # Workers that may publish; one at a time holds the publisher lease (sql/019)
+    TRENDING_ENGINE_ENABLED: bool = os.getenv("TRENDING_ENGINE_ENABLED", "true").lower() == "true"
+    # When true, scheduled runs log what they would publish without writing it
+    TRENDING_DRY_RUN: bool = os.getenv("TRENDING_DRY_RUN", "false").lower() == "true"
+    TRENDING_HALF_LIFE_HOURS: float = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+    # Stored plays and likes read when scores are seeded; older events weigh 2^-(lookback / half-life) or less
+    TRENDING_LOOKBACK_HOURS: float = float(os.getenv("TRENDING_LOOKBACK_HOURS", "96"))
+    TRENDING_PLAY_WEIGHT: float = float(os.getenv("TRENDING_PLAY_WEIGHT", "1.0"))
+    TRENDING_LIKE_WEIGHT: float = float(os.getenv("TRENDING_LIKE_WEIGHT", "5.0"))
+    # Plays shorter than this are not counted (skips)
+    TRENDING_MIN_PLAY_MS: int = int(os.getenv("TRENDING_MIN_PLAY_MS", "30000"))
+    TRENDING_PUBLISH_INTERVAL_SECONDS: int = int(os.getenv("TRENDING_PUBLISH_INTERVAL_SECONDS", "300"))
+    TRENDING_TOP_K: int = int(os.getenv("TRENDING_TOP_K", "50"))
+    # Published snapshots kept per list for rollback
+    TRENDING_SNAPSHOT_RETENTION: int = int(os.getenv("TRENDING_SNAPSHOT_RETENTION", "10"))
+    # How long readers reuse the current version before checking the pointer again
+    TRENDING_VERSION_CACHE_SECONDS: float = float(os.getenv("TRENDING_VERSION_CACHE_SECONDS", "5"))
+
+    # Song Metrics Configuration
+    # How often in-memory counter deltas are written, and how long window rankings are reused
+    ANALYTICS_COUNTER_FLUSH_SECONDS: int = int(os.getenv("ANALYTICS_COUNTER_FLUSH_SECONDS", "10"))
+    # How long a closed hour/day bucket is served from memory before it is read again
+    ANALYTICS_BUCKET_CACHE_SECONDS: int = int(os.getenv("ANALYTICS_BUCKET_CACHE_SECONDS", "600"))
+    # How often buffered listeners are merged into the stored unique-listener sketches
+    ANALYTICS_SKETCH_FLUSH_SECONDS: int = int(os.getenv("ANALYTICS_SKETCH_FLUSH_SECONDS", "60"))
+    # Identifies this worker's sketch rows; must be unique per running worker and stable across
+    # restarts. Empty (default) leases a free slot id instead (see listener_sketch_service.py)
+    ANALYTICS_WORKER_ID: str = os.getenv("ANALYTICS_WORKER_ID", "")
+    # Memory-mapped hour/day rollups for time-series charts, refreshed from the metric counters
+    ANALYTICS_ROLLUP_DIR: str = os.getenv("ANALYTICS_ROLLUP_DIR", "/tmp/spotify-analytics-rollups")
+    ANALYTICS_ROLLUP_SYNC_SECONDS: int = int(os.getenv("ANALYTICS_ROLLUP_SYNC_SECONDS", "300"))
+    ANALYTICS_ROLLUP_HOURLY_DAYS: int = int(os.getenv("ANALYTICS_ROLLUP_HOURLY_DAYS", "62"))
+    ANALYTICS_ROLLUP_DAILY_DAYS: int = int(os.getenv("ANALYTICS_ROLLUP_DAILY_DAYS", "730"))
+
+    # Similar Songs Configuration
+    # Co-occurrence state and memory-mapped neighbour lists (see services/music/similar_songs.py).
+    # The build lock is a file in this directory: with several hosts or pods it must be a shared
+    # volume, declared with SIMILAR_SONGS_DIR_SHARED, or each host builds its own index.
+    SIMILAR_SONGS_DIR: str = os.getenv("SIMILAR_SONGS_DIR", "/tmp/spotify-similar-songs")
+    SIMILAR_SONGS_DIR_SHARED: bool = os.getenv("SIMILAR_SONGS_DIR_SHARED", "false").lower() == "true"
+    SIMILAR_SONGS_TOP_N: int = int(os.getenv("SIMILAR_SONGS_TOP_N", "50"))
+    # Playlists and liked-song lists longer than this are left out of co-occurrence
+    SIMILAR_SONGS_MAX_BASKET: int = int(os.getenv("SIMILAR_SONGS_MAX_BASKET", "500"))
+    SIMILAR_SONGS_MIN_COOCCURRENCE: int = int(os.getenv("SIMILAR_SONGS_MIN_COOCCURRENCE", "1"))
+    # Incremental build interval (0 disables scheduled builds) and full rebuild age
+    SIMILAR_SONGS_BUILD_SECONDS: int = int(os.getenv("SIMILAR_SONGS_BUILD_SECONDS", "3600"))
+    SIMILAR_SONGS_FULL_REBUILD_HOURS: float = float(os.getenv("SIMILAR_SONGS_FULL_REBUILD_HOURS", "24"))
+
+    # Home Feed Configuration
+    # Deadline of each GET /me/home section, and how long a user's complete feed is reused
+    HOME_SECTION_TIMEOUT_SECONDS: float = float(os.getenv("HOME_SECTION_TIMEOUT_SECONDS", "2.0"))
+    HOME_CACHE_TTL_SECONDS: float = float(os.getenv("HOME_CACHE_TTL_SECONDS", "30"))
+    HOME_CACHE_MAX_USERS: int = int(os.getenv("HOME_CACHE_MAX_USERS", "10000"))
+
+    # Artist Embeddings Configuration
+    # Memory-mapped artist vectors for related artists (see services/music/artist_embeddings.py).
+    # Builds are only coordinated between processes that share this directory, so with several
+    # hosts or pods it must be a shared volume; set ARTIST_EMBEDDINGS_DIR_SHARED once it is.
+    ARTIST_EMBEDDINGS_DIR: str = os.getenv("ARTIST_EMBEDDINGS_DIR", "/tmp/spotify-artist-embeddings")
+    ARTIST_EMBEDDINGS_DIR_SHARED: bool = os.getenv("ARTIST_EMBEDDINGS_DIR_SHARED", "false").lower() == "true"
+    ARTIST_EMBEDDINGS_DIMENSIONS: int = int(os.getenv("ARTIST_EMBEDDINGS_DIMENSIONS", "64"))
+    # Rebuild interval (0 disables scheduled builds)
+    ARTIST_EMBEDDINGS_BUILD_SECONDS: int = int(os.getenv("ARTIST_EMBEDDINGS_BUILD_SECONDS", "21600"))
+
+    # Maintenance Configuration
+    # Child rows scanned per second by the orphan cleanup (0 = unlimited)
+    CLEANUP_MAX_ROWS_PER_SECOND: int = int(os.getenv("CLEANUP_MAX_ROWS_PER_SECOND", "5000"))
+    # Storage objects younger than this are never garbage collected (uploads precede their rows)
+    STORAGE_GC_MIN_AGE_HOURS: int = int(os.getenv("STORAGE_GC_MIN_AGE_HOURS", "24"))
+
     @property
     def main_api_prefix(self) -> str:
         return f"{self.API_PREFIX}/v{self.MAIN_ROUTE_VERSION}"
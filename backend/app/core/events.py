@@ -0,0 +1,62 @@
+"""
+In-process Event Bus
+
+Minimal publish/subscribe used to tell in-memory indexes and caches that the
+data behind them changed, without the writing service knowing who listens.
+
+Handlers run synchronously in the publisher's thread and must be cheap (mark
+something stale, append to a buffer). A failing handler is logged and never
+breaks the write that published the event.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Songs were inserted, updated or deleted.
+# Payload: action ("insert" | "update" | "delete"), songs (list of song rows)
+CATALOG_CHANGED = "catalog.changed"
+
+# Play events were stored (published by the ingestion flusher; events whose
+# event_id was already stored are not included).
+# Payload: plays (list of play_events rows)
+PLAYS_RECORDED = "plays.recorded"
+
+# A user liked a song.
+# Payload: user_id, song_id
+SONG_LIKED = "song.liked"
+
+# Songs were added to a playlist.
+# Payload: playlist_id, song_ids (list of song ids)
+PLAYLIST_SONGS_ADDED = "playlist.songs_added"
+
+_subscribers: Dict[str, List[Callable]] = defaultdict(list)
+_lock = threading.Lock()
+
+
+def subscribe(event: str, handler: Callable) -> None:
+    """Register a handler to be called with the payload of every ``event``"""
+    with _lock:
+        if handler not in _subscribers[event]:
+            _subscribers[event].append(handler)
+
+
+def unsubscribe(event: str, handler: Callable) -> None:
+    """Remove a previously registered handler"""
+    with _lock:
+        if handler in _subscribers[event]:
+            _subscribers[event].remove(handler)
+
+
+def publish(event: str, **payload) -> None:
+    """Call every handler subscribed to ``event`` with the payload as keyword arguments"""
+    with _lock:
+        handlers = list(_subscribers[event])
+    for handler in handlers:
+        try:
+            handler(**payload)
+        except Exception as e:
+            logger.error(f"Handler {getattr(handler, '__qualname__', handler)} failed for {event}: {str(e)}")
@@ -0,0 +1,100 @@
+"""
+Background Job Registry
+
+Keeps track of long-running admin jobs (backfills, maintenance sweeps) that are
+started through FastAPI BackgroundTasks, so their progress can be polled.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Only the most recent jobs are kept in memory
+MAX_TRACKED_JOBS = 100
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+
+def create_job(name: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Register a new pending job and return its id"""
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "id": job_id,
+            "name": name,
+            "params": params or {},
+            "status": "pending",
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        # Drop the oldest finished jobs once the registry is full
+        if len(_jobs) > MAX_TRACKED_JOBS:
+            finished = sorted(
+                (job for job in _jobs.values() if job["status"] in ("completed", "failed")),
+                key=lambda job: job["created_at"],
+            )
+            for job in finished[: len(_jobs) - MAX_TRACKED_JOBS]:
+                _jobs.pop(job["id"], None)
+    return job_id
+
+
+def update_job_progress(job_id: str, **progress: Any) -> None:
+    """Merge progress counters into a job's progress report"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job["progress"].update(progress)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get a snapshot of a job's state"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        return {**job, "progress": dict(job["progress"])}
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    """List all tracked jobs, newest first"""
+    with _jobs_lock:
+        jobs = [{**job, "progress": dict(job["progress"])} for job in _jobs.values()]
+    return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+
+def run_job(job_id: str, func: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any) -> None:
+    """
+    Run a job function and record its outcome.
+
+    The function receives a ``progress`` keyword argument it can call with
+    counters (e.g. ``progress(processed=10)``) while it works.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job["status"] = "running"
+        job["started_at"] = time.time()
+
+    try:
+        result = func(*args, progress=lambda **fields: update_job_progress(job_id, **fields), **kwargs)
+        with _jobs_lock:
+            job["status"] = "completed"
+            job["result"] = result
+    except Exception as e:
+        logger.error(f"Job {job['name']} ({job_id}) failed: {str(e)}")
+        with _jobs_lock:
+            job["status"] = "failed"
+            job["error"] = str(e)
+    finally:
+        with _jobs_lock:
+            job["finished_at"] = time.time()
@@ -0,0 +1,252 @@
+"""
+Custom Response Classes
+
+Response types used where the default FastAPI responses are not enough.
+"""
+
+import itertools
+import logging
+import secrets
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+import anyio
+import orjson
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with orjson.
+
+    Return an instance directly from a route (rather than setting it as the
+    ``response_class``) so FastAPI skips ``jsonable_encoder`` and the content is
+    serialized in a single call. The content must already be JSON-native:
+    dicts, lists, strings, numbers, bools, None, plus datetimes and UUIDs,
+    which orjson handles itself.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+logger = logging.getLogger(__name__)
+
+
+def _json_array_chunks(pages: Iterable[List], key: str, count_key: Optional[str]) -> Iterator[bytes]:
+    """Encode pages of rows as ``{"key": [...], "count_key": n}``, one chunk per page"""
+    count = 0
+    yield b'{"' + key.encode() + b'":['
+    try:
+        for page in pages:
+            if not page:
+                continue
+            chunk = b",".join(orjson.dumps(row, option=orjson.OPT_NON_STR_KEYS) for row in page)
+            yield (b"," + chunk) if count else chunk
+            count += len(page)
+    except Exception as e:
+        # Headers are already sent; ending without the closing bracket makes
+        # the truncation visible to the client as invalid JSON
+        logger.error(f"Streaming {key} failed after {count} rows: {str(e)}")
+        return
+    yield b"]" + (b',"' + count_key.encode() + b'":' + str(count).encode() if count_key else b"") + b"}"
+
+
+def _ndjson_chunks(pages: Iterable[List], key: str) -> Iterator[bytes]:
+    """Encode pages of rows as newline-delimited JSON, one chunk per page"""
+    count = 0
+    try:
+        for page in pages:
+            if page:
+                yield b"".join(orjson.dumps(row, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE) for row in page)
+                count += len(page)
+    except Exception as e:
+        logger.error(f"Streaming {key} failed after {count} rows: {str(e)}")
+
+
+def stream_json(request: Request, pages: Iterable[List], key: str, count_key: Optional[str] = None) -> StreamingResponse:
+    """
+    Stream pages of rows to the client as they are fetched.
+
+    The body is a JSON object holding the rows under ``key`` (plus the row
+    count under ``count_key`` at the end), or NDJSON with one row per line
+    when the client sends ``Accept: application/x-ndjson``. Only one page is
+    held in memory at a time.
+
+    The first page is fetched before the response starts, so errors from the
+    initial query still reach the caller as exceptions and can become a
+    proper error status. Later failures can only truncate the stream.
+
+    Args:
+        request (Request): Incoming request, used for content negotiation
+        pages (Iterable[List]): Pages of JSON-native rows, e.g. from iter_table_pages
+        key (str): Name of the array in the JSON object
+        count_key (str, optional): Name of the trailing row count field
+
+    Returns:
+        StreamingResponse with an ``application/json`` or NDJSON body
+    """
+    pages = iter(pages)
+    first_page = next(pages, [])
+    pages = itertools.chain([first_page], pages)
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(_ndjson_chunks(pages, key), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(_json_array_chunks(pages, key, count_key), media_type="application/json")
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when none of the requested byte ranges overlap the file"""
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse an HTTP Range header into inclusive (start, end) byte ranges.
+
+    Supports ``bytes=a-b``, open-ended ``bytes=a-``, suffix ``bytes=-n`` and
+    comma-separated lists. Overlapping or adjacent ranges are merged.
+
+    Returns:
+        List of ranges, or None if the header is absent or not a bytes range
+        (the full file should then be served)
+
+    Raises:
+        RangeNotSatisfiable: If no requested range overlaps the file
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" not in part:
+            return None
+        first, _, last = part.partition("-")
+        try:
+            if first == "":
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and end < start:
+                    return None
+                if start >= size:
+                    continue
+                end = min(end, size - 1)
+        except ValueError:
+            return None
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class FileRangeResponse(Response):
+    """
+    Serve a local file, or byte ranges of it, with zero-copy when possible.
+
+    If the ASGI server advertises the ``http.response.zerocopysend`` extension
+    the file descriptor is handed to the server, which sends it with
+    ``sendfile``. Otherwise the file is read and sent in chunks.
+
+    Multiple ranges are sent as ``multipart/byteranges``.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, size: int, media_type: str, ranges: Optional[List[Tuple[int, int]]] = None,
+                 headers: Optional[dict] = None, handle: Optional[BinaryIO] = None):
+        super().__init__(content=None, status_code=206 if ranges else 200, headers=headers, media_type=None)
+        # Opened up front (or by the caller, passing ``handle``) so a concurrent
+        # cache eviction cannot remove the file mid-response
+        self.handle = handle if handle is not None else open(path, "rb")
+        self.size = size
+        self.file_media_type = media_type
+        self.ranges = ranges
+        self.boundary = secrets.token_hex(12)
+        self.parts = []  # (part header bytes, start, end) for multipart responses
+
+        self.headers["accept-ranges"] = "bytes"
+        if not ranges:
+            self.headers["content-type"] = media_type
+            self.headers["content-length"] = str(size)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.headers["content-type"] = media_type
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+        else:
+            length = 0
+            for start, end in ranges:
+                part_header = (
+                    f"--{self.boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode("latin-1")
+                self.parts.append((part_header, start, end))
+                length += len(part_header) + (end - start + 1) + 2
+            self.closing = f"--{self.boundary}--\r\n".encode("latin-1")
+            length += len(self.closing)
+            self.headers["content-type"] = f"multipart/byteranges; boundary={self.boundary}"
+            self.headers["content-length"] = str(length)
+
+    async def _send_file_range(self, send: Send, handle: BinaryIO, start: int, count: int, zerocopy: bool) -> None:
+        if zerocopy:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": handle.fileno(),
+                "offset": start,
+                "count": count,
+                "more_body": True
+            })
+            return
+        handle.seek(start)
+        remaining = count
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(handle.read, min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        with self.handle as handle:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope.get("method") == "HEAD":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+            if not self.ranges:
+                await self._send_file_range(send, handle, 0, self.size, zerocopy)
+            elif not self.parts:
+                start, end = self.ranges[0]
+                await self._send_file_range(send, handle, start, end - start + 1, zerocopy)
+            else:
+                for part_header, start, end in self.parts:
+                    await send({"type": "http.response.body", "body": part_header, "more_body": True})
+                    await self._send_file_range(send, handle, start, end - start + 1, zerocopy)
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+                await send({"type": "http.response.body", "body": self.closing, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
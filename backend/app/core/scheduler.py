@@ -0,0 +1,99 @@
+"""
+Periodic Task Scheduler
+
+Runs registered functions on a fixed interval in daemon threads, for
+background work such as publishing computed rankings. Tasks are started and
+stopped with the application lifecycle in app.main.
+
+A failing run is logged and the task keeps its schedule.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Calls ``func`` every ``interval`` seconds until stopped"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.runs = 0
+        self.failures = 0
+        self.last_run_at = None
+        self.last_error = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"task-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        # Wait one interval first so startup is not slowed by every task at once
+        while not self._stopping.wait(self.interval):
+            try:
+                self.func()
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Scheduled task {self.name} failed: {str(e)}")
+            self.runs += 1
+            self.last_run_at = time.time()
+
+    def get_status(self) -> Dict[str, any]:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error,
+        }
+
+
+_tasks: Dict[str, PeriodicTask] = {}
+_lock = threading.Lock()
+
+
+def schedule(name: str, interval: float, func: Callable[[], None]) -> PeriodicTask:
+    """Register a task to be run by start(); registering a name twice returns the existing task"""
+    with _lock:
+        if name in _tasks:
+            return _tasks[name]
+        task = PeriodicTask(name, interval, func)
+        _tasks[name] = task
+        return task
+
+
+def start() -> None:
+    """Start all registered tasks"""
+    with _lock:
+        tasks = list(_tasks.values())
+    for task in tasks:
+        task.start()
+
+
+def stop() -> None:
+    """Stop all registered tasks, waiting for running ones to finish"""
+    with _lock:
+        tasks = list(_tasks.values())
+    for task in tasks:
+        task.stop()
+
+
+def list_tasks() -> List[Dict[str, any]]:
+    with _lock:
+        return [task.get_status() for task in _tasks.values()]
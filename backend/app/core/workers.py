@@ -0,0 +1,31 @@
+"""
+Worker Coordination
+
+Identity of this worker process and named leases shared by every worker
+process (see sql/019), so that periodic jobs run by one replica at a time.
+"""
+
+import os
+import socket
+
+
+def get_worker_id() -> str:
+    """Identifier of this worker process, unique across hosts and restarts"""
+    return f"{socket.gethostname()}-{os.getpid()}"[:64]
+
+
+def acquire_worker_lease(name: str, holder: str, ttl_seconds: int) -> bool:
+    """
+    Take or renew a named lease shared by every worker process.
+
+    Returns True while ``holder`` owns the lease: when it was free, had
+    expired, or was already held by ``holder``, in which case it is extended.
+    Workers holding a lease must renew it more often than ``ttl_seconds``.
+    """
+    # Imported here: app.core does not depend on the service layer at import time
+    from app.services.base.base_client import get_supabase_admin_client
+
+    response = get_supabase_admin_client().rpc(
+        "acquire_worker_lease", {"p_name": name, "p_holder": holder, "p_ttl_seconds": ttl_seconds}
+    ).execute()
+    return bool(response.data)
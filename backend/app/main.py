@@ -62,6 +62,34 @@ async def startup_event():
     logging.info(f"[*]Admin Login: http://{display_host}:{port}{settings.admin_api_prefix}/admin/login?key={{YOUR_KEY}}")
     logging.info(f"[*]Codebase Explorer: http://{display_host}:{port}{settings.codebase_api_prefix}/codebase")
 
+    # Background work: trending scores, analytics aggregation, recommendations and their periodic tasks
+    from app.core import scheduler
+    from app.services.music.trending_engine import start_trending_engine
+    from app.services.analytics.song_metrics_service import start_metric_counters
+    from app.services.analytics.listener_sketch_service import start_listener_sketches
+    from app.services.analytics.rollup_store import start_rollup_sync
+    from app.services.music.similar_songs import start_similar_songs_builds
+    from app.services.music.artist_embeddings import start_artist_embedding_builds
+    start_trending_engine()
+    start_metric_counters()
+    start_listener_sketches()
+    start_rollup_sync()
+    start_similar_songs_builds()
+    start_artist_embedding_builds()
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Write buffered play events, counters and sketches before the process exits
+    from app.core import scheduler
+    from app.services.analytics.play_event_service import shutdown_play_event_pipeline
+    from app.services.analytics.song_metrics_service import shutdown_metric_counters
+    from app.services.analytics.listener_sketch_service import shutdown_listener_sketches
+    scheduler.stop()
+    shutdown_play_event_pipeline()
+    shutdown_metric_counters()
+    shutdown_listener_sketches()
+
 @app.get("/", tags=["health"])
 @limiter.limit("60/30seconds")
 def read_root(request: Request):
@@ -163,6 +163,7 @@ class TrendingSongModel(BaseSupabaseModel):
     rank_position: int = Field(..., ge=1)
     play_count: Optional[int] = Field(default=0, ge=0)
     trend_date: Optional[datetime] = None
+    version: Optional[int] = None  # trending_snapshots id the row was published under
     
     # Relationship fields
     song: Optional[SongModel] = None
@@ -180,6 +181,7 @@ class TrendingAlbumModel(BaseSupabaseModel):
     rank_position: int = Field(..., ge=1)
     play_count: Optional[int] = Field(default=0, ge=0)
     trend_date: Optional[datetime] = None
+    version: Optional[int] = None  # trending_snapshots id the row was published under
     
     # Relationship fields
     album: Optional[AlbumModel] = None
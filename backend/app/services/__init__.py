@@ -6,9 +6,11 @@ Exports all service classes for easy importing across the application.
 
 from app.services.base import BaseSupabaseClient, get_supabase_client, get_supabase_admin_client
 from app.services.auth import AuthService
-from app.services.music import SongService, PlaylistService, LikeService, TrendingService, ArtistService
+from app.services.music import SongService, PlaylistService, LikeService, TrendingService, ArtistService, QueueService, SimilarSongsService, ArtistEmbeddingService, HomeFeedService
 from app.services.admin import AdminService
-from app.services.external import SpotifyService, SupabaseService, StorageService
+from app.services.external import SpotifyService, SupabaseService, StorageService, StorageGCService
+from app.services.media import WaveformService, CoverImageService, AudioStreamService, SeekTableService
+from app.services.analytics import PlayEventService, SongMetricsService, ListenerSketchService
 
 __all__ = [
     "BaseSupabaseClient",
@@ -19,9 +21,21 @@ __all__ = [
     "PlaylistService",
     "LikeService",
     "StorageService",
+    "StorageGCService",
     "TrendingService",
     "ArtistService",
+    "QueueService",
+    "SimilarSongsService",
+    "ArtistEmbeddingService",
+    "HomeFeedService",
     "AdminService",
     "SpotifyService",
     "SupabaseService",
+    "WaveformService",
+    "CoverImageService",
+    "AudioStreamService",
+    "SeekTableService",
+    "PlayEventService",
+    "SongMetricsService",
+    "ListenerSketchService",
 ]
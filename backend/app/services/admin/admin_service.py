@@ -9,17 +9,33 @@ API Endpoints that use this service:
 - PUT /admin/songs/{song_id} -> update_song()
 - POST /admin/trending/songs -> update_trending_songs()
 - POST /admin/trending/albums -> update_trending_albums()
+- GET /admin/trending/snapshots -> list_trending_snapshots()
+- POST /admin/trending/rollback -> rollback_trending()
 - GET /admin/analytics/song/{song_id} -> get_song_analytics()
 - GET /admin/analytics/top-songs -> get_top_songs()
 - POST /admin/maintenance/cleanup -> cleanup_orphaned_data()
 """
 
 import logging
-from typing import List, Optional, Dict, Any
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, Optional, Dict, Any, Tuple
+from app.core import events
+from app.core.config import settings
+from app.services.admin.live_id_set import LiveIdSet
+from app.services.analytics.listener_sketch_service import ListenerSketchService
+from app.services.analytics.song_metrics_service import METRICS, WINDOWS, SongMetricsService
 from app.services.base.base_client import BaseSupabaseClient
+from app.services.external.storage_service import StorageService, decode_base64_with_hash
+from app.services.music.trending_service import TRENDING_KINDS, invalidate_trending_version
 
 logger = logging.getLogger(__name__)
 
+CLEANUP_PAGE_SIZE = 1000
+CLEANUP_DELETE_BATCH_SIZE = 200
+# Orphan ids included in the cleanup report per table
+CLEANUP_SAMPLE_SIZE = 20
+
 
 class AdminService(BaseSupabaseClient):
     """
@@ -204,6 +220,14 @@ class AdminService(BaseSupabaseClient):
                 - file_path (str, optional): Path to audio file
                 - cover_image_url (str, optional): Song cover image URL
                 - album_cover_url (str, optional): Album cover image URL
+                - file_content (str, optional): Base64 audio to store instead of file_path
+                - content_type (str, optional): MIME type of file_content (default audio/mpeg)
+                - cover_file_content (str, optional): Base64 cover to store instead of cover_image_url
+                - cover_file_name (str, optional): Cover file name, used for its extension
+                - cover_content_type (str, optional): MIME type of cover_file_content
+
+            Inline file content is stored through StorageService, so byte-identical
+            files already in storage are reused instead of written again.
 
         Returns:
             Dict containing:
@@ -223,6 +247,7 @@ class AdminService(BaseSupabaseClient):
             logger.info(f"Starting bulk insert of {len(songs_data)} songs")
 
             processed_songs = []
+            storage_service = None
 
             for song in songs_data:
                 # Validate required fields
@@ -257,13 +282,26 @@ class AdminService(BaseSupabaseClient):
                     else:
                         logger.warning(f"Failed to create album '{album_name}' for song '{song.get('title')}'")
 
+                file_path = song.get("file_path")
+                cover_image_url = song.get("cover_image_url")
+                if song.get("file_content") or song.get("cover_file_content"):
+                    if storage_service is None:
+                        storage_service = StorageService(use_service_role=True)
+                    try:
+                        file_path, cover_image_url = self._store_bulk_media(
+                            storage_service, song, artist_name.strip(), file_path, cover_image_url
+                        )
+                    except Exception as storage_error:
+                        logger.error(f"Failed to store media for song '{song.get('title')}': {str(storage_error)}")
+                        continue
+
                 # Prepare song data for insertion
                 song_data = {
                     "title": song["title"].strip(),
                     "artist_id": artist_id,
                     "duration_seconds": song.get("duration_seconds"),
-                    "file_path": song.get("file_path"),
-                    "cover_image_url": song.get("cover_image_url")
+                    "file_path": file_path,
+                    "cover_image_url": cover_image_url
                 }
 
                 # Add album_id if available
@@ -287,6 +325,7 @@ class AdminService(BaseSupabaseClient):
             )
 
             logger.info(f"Successfully bulk inserted {len(insert_result.data)} songs")
+            events.publish(events.CATALOG_CHANGED, action="insert", songs=insert_result.data)
             return {
                 "success": True,
                 "data": insert_result.data,
@@ -304,6 +343,35 @@ class AdminService(BaseSupabaseClient):
                 "error": error_msg
             }
 
+    def _store_bulk_media(self, storage_service: StorageService, song: Dict[str, Any], artist_name: str,
+                          file_path: Optional[str], cover_image_url: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Store inline base64 audio and cover content for a bulk import entry.
+
+        Used internally by bulk_insert_songs(). Paths follow the same naming as
+        single uploads, and deduplicated uploads resolve to the existing object.
+
+        Returns:
+            Tuple of (file_path, cover_image_url) for the song record
+        """
+        base_name = f"{artist_name.lower().replace(' ', '_')}_{song['title'].strip().lower().replace(' ', '_')}"
+
+        if song.get("file_content"):
+            file_content, file_hash = decode_base64_with_hash(song["file_content"])
+            file_path = storage_service.upload_file(
+                file_content, f"{base_name}.mp3", song.get("content_type") or "audio/mpeg", file_hash
+            )
+
+        if song.get("cover_file_content"):
+            cover_content, cover_hash = decode_base64_with_hash(song["cover_file_content"])
+            cover_file_name = song.get("cover_file_name") or ""
+            cover_ext = cover_file_name.split('.')[-1] if '.' in cover_file_name else 'jpg'
+            cover_image_url = storage_service.upload_cover(
+                cover_content, f"{base_name}.{cover_ext}", song.get("cover_content_type") or "image/jpeg", cover_hash
+            )
+
+        return file_path, cover_image_url
+
     def update_song(self, song_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Update song information.
@@ -340,6 +408,7 @@ class AdminService(BaseSupabaseClient):
 
             if update_result.data:
                 logger.info(f"Successfully updated song {song_id.strip()}")
+                events.publish(events.CATALOG_CHANGED, action="update", songs=update_result.data)
                 return {
                     "success": True,
                     "data": update_result.data
@@ -362,14 +431,73 @@ class AdminService(BaseSupabaseClient):
                 "error": error_msg
             }
 
+    def _publish_trending_snapshot(self, kind: str, rows: List[Dict[str, Any]]) -> Tuple[int, List[Dict]]:
+        """
+        Write a trending list as a new snapshot and make it the published version.
+
+        The rows are inserted under a fresh version id that no reader uses yet;
+        only then is the list's single pointer row moved to it, so readers see
+        either the old list or the new one, never a partial or empty one. If
+        the insert fails the unused snapshot is dropped and the pointer is left
+        alone. Snapshots beyond TRENDING_SNAPSHOT_RETENTION are pruned.
+        """
+        snapshot = (
+            self.supabase.table('trending_snapshots')
+            .insert({"kind": kind, "entries": len(rows)})
+            .execute()
+        )
+        version = snapshot.data[0]["id"]
+
+        try:
+            insert_result = (
+                self.supabase.table(TRENDING_KINDS[kind])
+                .insert([{**row, "version": version} for row in rows])
+                .execute()
+            )
+        except Exception:
+            # Deleting the snapshot cascades to any rows that made it in
+            self.supabase.table('trending_snapshots').delete().eq('id', version).execute()
+            raise
+
+        self._set_trending_pointer(kind, version)
+        self._prune_trending_snapshots(kind, version)
+        return version, insert_result.data
+
+    def _set_trending_pointer(self, kind: str, version: int) -> None:
+        self.supabase.table('trending_pointers').upsert({
+            "kind": kind,
+            "version": version,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }).execute()
+        invalidate_trending_version(kind)
+
+    def _prune_trending_snapshots(self, kind: str, current_version: int) -> None:
+        """Delete snapshots of a list beyond the retention count, never the published one"""
+        try:
+            stale = (
+                self.supabase.table('trending_snapshots')
+                .select('id')
+                .eq('kind', kind)
+                .order('id', desc=True)
+                .range(settings.TRENDING_SNAPSHOT_RETENTION, settings.TRENDING_SNAPSHOT_RETENTION + 999)
+                .execute()
+            )
+            stale_ids = [row["id"] for row in stale.data or [] if row["id"] != current_version]
+            if stale_ids:
+                self.supabase.table('trending_snapshots').delete().in_('id', stale_ids).execute()
+                logger.debug(f"Pruned {len(stale_ids)} old trending {kind} snapshots")
+        except Exception as e:
+            logger.warning(f"Could not prune trending {kind} snapshots: {str(e)}")
+
     def update_trending_songs(self, trending_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Update trending songs rankings.
 
         POST /admin/trending/songs
 
-        This method clears existing trending songs and inserts new trending data.
-        Used for updating the trending songs list based on play counts or other metrics.
+        Publishes the rankings as a new trending songs snapshot. The previous
+        list stays visible until the new one is fully written, and is kept
+        for rollback.
 
         Args:
             trending_data (List[Dict]): List of trending song data with ranking information
@@ -379,6 +507,7 @@ class AdminService(BaseSupabaseClient):
             - success (bool): True if operation succeeded
             - data (list): Inserted trending song records
             - count (int): Number of trending songs updated
+            - version (int): Published snapshot version
             - error (str, optional): Error message if operation failed
 
         Raises:
@@ -391,28 +520,14 @@ class AdminService(BaseSupabaseClient):
         try:
             logger.info(f"Updating trending songs with {len(trending_data)} entries")
 
-            # Clear existing trending songs (delete all records)
-            clear_result = (
-                self.supabase.table('trending_songs')
-                .delete()
-                .neq('id', 0)  # Delete all records
-                .execute()
-            )
-
-            logger.debug(f"Cleared {len(clear_result.data) if clear_result.data else 0} existing trending songs")
+            version, inserted = self._publish_trending_snapshot("songs", trending_data)
 
-            # Insert new trending data
-            insert_result = (
-                self.supabase.table('trending_songs')
-                .insert(trending_data)
-                .execute()
-            )
-
-            logger.info(f"Successfully updated {len(insert_result.data)} trending songs")
+            logger.info(f"Successfully published {len(inserted)} trending songs as version {version}")
             return {
                 "success": True,
-                "data": insert_result.data,
-                "count": len(insert_result.data)
+                "data": inserted,
+                "count": len(inserted),
+                "version": version
             }
 
         except ValueError as ve:
@@ -432,7 +547,8 @@ class AdminService(BaseSupabaseClient):
 
         POST /admin/trending/albums
 
-        This method clears existing trending albums and inserts new trending data.
+        Publishes the rankings as a new trending albums snapshot, like
+        update_trending_songs().
 
         Args:
             albums_data (List[Dict]): List of trending album data with ranking information
@@ -442,6 +558,7 @@ class AdminService(BaseSupabaseClient):
             - success (bool): True if operation succeeded
             - data (list): Inserted trending album records
             - count (int): Number of trending albums updated
+            - version (int): Published snapshot version
             - error (str, optional): Error message if operation failed
 
         Raises:
@@ -454,26 +571,14 @@ class AdminService(BaseSupabaseClient):
         try:
             logger.info(f"Updating trending albums with {len(albums_data)} entries")
 
-            # Clear existing trending albums
-            clear_result = (
-                self.supabase.table('trending_albums')
-                .delete()
-                .neq('id', 0)
-                .execute()
-            )
-
-            # Insert new trending data
-            insert_result = (
-                self.supabase.table('trending_albums')
-                .insert(albums_data)
-                .execute()
-            )
+            version, inserted = self._publish_trending_snapshot("albums", albums_data)
 
-            logger.info(f"Successfully updated {len(insert_result.data)} trending albums")
+            logger.info(f"Successfully published {len(inserted)} trending albums as version {version}")
             return {
                 "success": True,
-                "data": insert_result.data,
-                "count": len(insert_result.data)
+                "data": inserted,
+                "count": len(inserted),
+                "version": version
             }
 
         except ValueError as ve:
@@ -487,32 +592,140 @@ class AdminService(BaseSupabaseClient):
                 "error": error_msg
             }
 
-    def get_song_analytics(self, song_id: str) -> Dict[str, Any]:
+    def list_trending_snapshots(self, kind: str) -> Dict[str, Any]:
+        """
+        List the retained snapshots of a trending list, newest first.
+
+        GET /admin/trending/snapshots
+
+        Args:
+            kind (str): "songs" or "albums"
+
+        Returns:
+            Dict containing:
+            - kind (str): The list
+            - current_version (int): Published version, None if nothing was published
+            - snapshots (list): id, entries, created_at and current for each snapshot
+            - error (str, optional): Error message if operation failed
+
+        Raises:
+            ValueError: If kind is unknown
+        """
+        if kind not in TRENDING_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(TRENDING_KINDS)}")
+
+        try:
+            pointer = self.supabase.table('trending_pointers').select('version').eq('kind', kind).execute()
+            current = pointer.data[0]["version"] if pointer.data else None
+            snapshots = (
+                self.supabase.table('trending_snapshots')
+                .select('id, entries, created_at')
+                .eq('kind', kind)
+                .order('id', desc=True)
+                .execute()
+            )
+            return {
+                "kind": kind,
+                "current_version": current,
+                "snapshots": [{**row, "current": row["id"] == current} for row in snapshots.data or []]
+            }
+
+        except Exception as e:
+            error_msg = f"Failed to list trending snapshots: {str(e)}"
+            logger.error(f"Error in list_trending_snapshots: {error_msg}")
+            return {"error": error_msg}
+
+    def rollback_trending(self, kind: str, version: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Publish a retained snapshot of a trending list again.
+
+        POST /admin/trending/rollback
+
+        Args:
+            kind (str): "songs" or "albums"
+            version (int, optional): Snapshot to publish (default: the one before the current)
+
+        Returns:
+            Dict containing:
+            - kind (str): The list
+            - version (int): Now published version
+            - previous_version (int): Version published before the rollback
+            - error (str, optional): Error message if operation failed
+
+        Raises:
+            ValueError: If kind is unknown or there is no such snapshot to roll back to
+        """
+        if kind not in TRENDING_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(TRENDING_KINDS)}")
+
+        try:
+            pointer = self.supabase.table('trending_pointers').select('version').eq('kind', kind).execute()
+            current = pointer.data[0]["version"] if pointer.data else None
+
+            query = self.supabase.table('trending_snapshots').select('id').eq('kind', kind)
+            if version is not None:
+                query = query.eq('id', version)
+            elif current is not None:
+                query = query.lt('id', current).order('id', desc=True).limit(1)
+            else:
+                raise ValueError(f"No trending {kind} have been published")
+            target = query.execute().data
+            if not target:
+                raise ValueError(
+                    f"Trending {kind} snapshot {version} not found" if version is not None
+                    else f"No earlier trending {kind} snapshot to roll back to"
+                )
+
+            target_version = target[0]["id"]
+            self._set_trending_pointer(kind, target_version)
+            logger.info(f"Rolled trending {kind} back from version {current} to {target_version}")
+            return {"kind": kind, "version": target_version, "previous_version": current}
+
+        except ValueError as ve:
+            logger.error(f"Validation error in rollback_trending: {str(ve)}")
+            raise ve
+        except Exception as e:
+            error_msg = f"Failed to roll back trending {kind}: {str(e)}"
+            logger.error(f"Error in rollback_trending: {error_msg}")
+            return {"error": error_msg}
+
+    def get_song_analytics(self, song_id: str, start_date: Optional[date] = None,
+                           end_date: Optional[date] = None) -> Dict[str, Any]:
         """
         Get analytics data for a specific song.
 
         GET /admin/analytics/song/{song_id}
 
-        Note: Currently returns basic song info. Full analytics would require
-        additional tables for play counts, user interactions, etc.
+        Play, like and playlist-add counts come from the pre-aggregated
+        song metric counters; the favorites count is the current number of
+        liked_songs rows. Unique listeners are estimated from per-day
+        HyperLogLog sketches over the requested date range.
 
         Args:
             song_id (str): ID of the song to get analytics for
+            start_date (date, optional): First day for unique listeners (default: 29 days before end_date)
+            end_date (date, optional): Last day for unique listeners (default: today, UTC)
 
         Returns:
-            Dict containing song info and placeholder analytics data:
+            Dict containing song info and analytics data:
             - song (dict): Basic song information
-            - total_plays (int): Placeholder for play count
-            - unique_listeners (int): Placeholder for unique listeners
-            - favorites_count (int): Placeholder for favorites count
+            - total_plays (int): All-time play count
+            - plays (dict): Play counts per window ("24h", "7d", "30d", "all")
+            - likes (dict): Like events per window
+            - playlist_adds (dict): Playlist additions per window
+            - unique_listeners (dict): Approximate unique listeners in the date range:
+              estimate, relative_error, lower, upper, start_date, end_date
+            - favorites_count (int): Number of users who currently like the song
             - error (str, optional): Error message if song not found
 
         Raises:
-            ValueError: If song_id is empty
+            ValueError: If song_id is empty or the date range is invalid
         """
         # Input validation
         if not song_id or not song_id.strip():
             raise ValueError("Song ID cannot be empty")
+        end_date = end_date or datetime.now(timezone.utc).date()
+        start_date = start_date or end_date - timedelta(days=29)
 
         try:
             logger.info(f"Getting analytics for song {song_id.strip()}")
@@ -531,13 +744,25 @@ class AdminService(BaseSupabaseClient):
 
             song_data = song_result.data[0]
 
-            # TODO: Implement actual analytics queries when analytics tables are created
-            # For now, return placeholder data
+            metrics_service = SongMetricsService(use_service_role=True)
+            counts = {metric: metrics_service.get_song_counts(song_id.strip(), metric) for metric in METRICS}
+
+            favorites_result = (
+                self.supabase.table('liked_songs')
+                .select('id', count='exact')
+                .eq('song_id', song_id.strip())
+                .limit(1)
+                .execute()
+            )
+
             analytics = {
                 "song": song_data,
-                "total_plays": 0,  # Would query user_song_plays table
-                "unique_listeners": 0,  # Would count distinct users
-                "favorites_count": 0  # Would query liked_songs table
+                "total_plays": counts["plays"]["all"],
+                **counts,
+                "unique_listeners": ListenerSketchService(use_service_role=True).get_unique_listeners(
+                    song_id.strip(), start_date, end_date
+                ),
+                "favorites_count": favorites_result.count or 0
             }
 
             logger.info(f"Retrieved analytics for song: {song_data.get('title', 'Unknown')}")
@@ -551,48 +776,70 @@ class AdminService(BaseSupabaseClient):
             logger.error(f"Error getting analytics for song {song_id.strip()}: {error_msg}")
             return {"error": error_msg}
 
-    def get_top_songs(self, limit: int = 50) -> Dict[str, Any]:
+    def get_top_songs(self, limit: int = 50, window: str = "7d", metric: str = "plays") -> Dict[str, Any]:
         """
-        Get top songs by some criteria (currently just returns recent songs).
+        Get the top songs by play count (or another metric) over a time window.
 
         GET /admin/analytics/top-songs
 
-        Note: Currently returns songs ordered by ID (recent first).
-        Full implementation would use play counts or other metrics.
+        Rankings are computed from pre-aggregated hourly/daily counters by
+        SongMetricsService, never from raw play events.
 
         Args:
             limit (int): Maximum number of songs to return (default: 50)
+            window (str): "24h", "7d", "30d" or "all" (default: "7d")
+            metric (str): "plays", "likes" or "playlist_adds" (default: "plays")
 
         Returns:
             Dict containing:
             - success (bool): True if operation succeeded
-            - data (list): List of top songs
+            - data (list): Top songs, each with rank and count added
+            - window (str): Window used
+            - metric (str): Metric used
             - error (str, optional): Error message if operation failed
 
         Raises:
-            ValueError: If limit is invalid
+            ValueError: If limit, window or metric is invalid
         """
         # Input validation
         if limit <= 0 or limit > 1000:
             raise ValueError("Limit must be between 1 and 1000")
+        if window not in WINDOWS:
+            raise ValueError(f"Window must be one of: {', '.join(WINDOWS)}")
+        if metric not in METRICS:
+            raise ValueError(f"Metric must be one of: {', '.join(METRICS)}")
 
         try:
-            logger.info(f"Getting top {limit} songs")
-
-            # TODO: Implement actual top songs logic based on play counts/analytics
-            # For now, just return recent songs
-            songs_query = (
-                self.supabase.table('songs')
-                .select('*')
-                .limit(limit)
-                .order('id', desc=True)  # Most recent first
-            )
-            songs_result = songs_query.execute()
+            logger.info(f"Getting top {limit} songs by {metric} over {window}")
+
+            # Ask for a few extra in case some ranked songs were deleted since
+            ranking = SongMetricsService(use_service_role=True).get_top_songs(metric, window, limit + 20)
+
+            songs_by_id = {}
+            if ranking:
+                songs_result = (
+                    self.supabase.table('songs')
+                    .select('*')
+                    .in_('id', [song_id for song_id, _ in ranking])
+                    .execute()
+                )
+                songs_by_id = {song['id']: song for song in songs_result.data}
+
+            top_songs = []
+            for song_id, count in ranking:
+                song = songs_by_id.get(song_id)
+                if song is None:
+                    continue
+                top_songs.append({**song, "rank": len(top_songs) + 1, "count": count})
+                if len(top_songs) == limit:
+                    break
 
-            logger.info(f"Retrieved {len(songs_result.data)} top songs")
+            logger.info(f"Retrieved {len(top_songs)} top songs")
             return {
                 "success": True,
-                "data": songs_result.data
+                "data": top_songs,
+                "window": window,
+                "metric": metric
             }
 
         except ValueError as ve:
@@ -606,38 +853,131 @@ class AdminService(BaseSupabaseClient):
                 "error": error_msg
             }
 
-    def cleanup_orphaned_data(self) -> Dict[str, Any]:
+    def _load_live_ids(self, table: str) -> LiveIdSet:
+        """Load every id of a table into a compact in-memory set"""
+        pages = self._iter_table_pages(table, "id", page_size=CLEANUP_PAGE_SIZE)
+        return LiveIdSet([row["id"] for row in page] for page in pages)
+
+    def _confirm_missing(self, table: str, ids: List[str]) -> List[str]:
+        """Re-check candidate missing ids with batched IN lookups, in case they were created during the sweep"""
+        missing = set(ids)
+        for start in range(0, len(ids), CLEANUP_DELETE_BATCH_SIZE):
+            batch = ids[start:start + CLEANUP_DELETE_BATCH_SIZE]
+            found = self.supabase.table(table).select("id").in_("id", batch).execute().data or []
+            missing.difference_update(row["id"] for row in found)
+        return [value for value in ids if value in missing]
+
+    def cleanup_orphaned_data(self, dry_run: bool = False, rows_per_second: Optional[int] = None,
+                              progress: Optional[Callable] = None) -> Dict[str, Any]:
         """
         Clean up orphaned records in the database.
 
         POST /admin/maintenance/cleanup
 
-        This method identifies and removes records that reference non-existent entities.
-        Currently returns placeholder data as cleanup requires custom SQL functions.
+        Removes playlist_songs, liked_songs and trending_songs rows whose
+        song or playlist no longer exists. The ids of live songs and
+        playlists are loaded once into compact in-memory sets; each child
+        table is then scanned with keyset pagination and a whole page of
+        references is checked against the sets at once. Candidates are
+        confirmed with batched IN lookups before being deleted in batches.
+
+        Args:
+            dry_run (bool): Report orphans without deleting them
+            rows_per_second (int, optional): Maximum child rows scanned per second
+                (default: CLEANUP_MAX_ROWS_PER_SECOND; 0 disables the limit)
+            progress (Callable, optional): Called with running counters
 
         Returns:
             Dict containing cleanup results:
             - message (str): Status message
-            - orphaned_playlist_songs (int): Number of orphaned playlist songs removed
-            - orphaned_trending_songs (int): Number of orphaned trending songs removed
+            - dry_run (bool): Whether anything was deleted
+            - tables (dict): Per table: scanned, orphaned, deleted and sample (orphan ids)
+            - orphaned_playlist_songs (int): Number of orphaned playlist songs found
+            - orphaned_liked_songs (int): Number of orphaned liked songs found
+            - orphaned_trending_songs (int): Number of orphaned trending songs found
+            - elapsed_seconds (float): Duration of the sweep
             - error (str, optional): Error message if operation failed
+
+        Raises:
+            ValueError: If rows_per_second is negative
         """
+        if rows_per_second is None:
+            rows_per_second = settings.CLEANUP_MAX_ROWS_PER_SECOND
+        if rows_per_second < 0:
+            raise ValueError("rows_per_second cannot be negative")
+
         try:
-            logger.info("Starting database cleanup operation")
+            logger.info(f"Starting database cleanup operation (dry_run={dry_run})")
+            started = time.monotonic()
 
-            # TODO: Implement actual cleanup logic with custom SQL functions in Supabase
-            # This would require stored procedures or complex queries to find:
-            # - Playlist songs referencing deleted songs/playlists
-            # - Trending entries referencing deleted songs/albums
-            # - Other orphaned relationships
+            live = {
+                "songs": self._load_live_ids("songs"),
+                "playlists": self._load_live_ids("playlists"),
+            }
+            logger.info(f"Loaded {len(live['songs'])} live songs and {len(live['playlists'])} live playlists")
+
+            # Child table -> reference column -> parent table
+            children = {
+                "playlist_songs": {"song_id": "songs", "playlist_id": "playlists"},
+                "liked_songs": {"song_id": "songs"},
+                "trending_songs": {"song_id": "songs"},
+            }
+            report = {}
+            scanned_total = 0
+
+            for table, references in children.items():
+                stats = {"scanned": 0, "orphaned": 0, "deleted": 0, "sample": []}
+                report[table] = stats
+                columns = ", ".join(["id", *references])
+
+                for page in self._iter_table_pages(table, columns, page_size=CLEANUP_PAGE_SIZE):
+                    orphaned = set()
+                    for column, parent in references.items():
+                        referenced = [row[column] for row in page]
+                        absent = ~live[parent].contains(referenced)
+                        candidates = list(dict.fromkeys(
+                            value for value, is_absent in zip(referenced, absent) if is_absent and value
+                        ))
+                        missing = set(self._confirm_missing(parent, candidates)) if candidates else set()
+                        # A null reference is an orphan too
+                        orphaned.update(row["id"] for row in page if not row[column] or row[column] in missing)
+
+                    orphan_ids = [row["id"] for row in page if row["id"] in orphaned]
+                    stats["scanned"] += len(page)
+                    stats["orphaned"] += len(orphan_ids)
+                    stats["sample"].extend(orphan_ids[:CLEANUP_SAMPLE_SIZE - len(stats["sample"])])
+
+                    if orphan_ids and not dry_run:
+                        for start in range(0, len(orphan_ids), CLEANUP_DELETE_BATCH_SIZE):
+                            batch = orphan_ids[start:start + CLEANUP_DELETE_BATCH_SIZE]
+                            deleted = self.supabase.table(table).delete().in_("id", batch).execute()
+                            # Count what the database removed, not what was requested
+                            stats["deleted"] += len(deleted.data or [])
+
+                    scanned_total += len(page)
+                    if progress:
+                        progress(table=table, **{
+                            f"{table}_{name}": value for name, value in stats.items() if name != "sample"
+                        })
+                    if rows_per_second:
+                        # Sleep until the sweep is back under the rate limit
+                        ahead = scanned_total / rows_per_second - (time.monotonic() - started)
+                        if ahead > 0:
+                            time.sleep(ahead)
+
+                logger.info(f"Cleanup of {table}: {stats['orphaned']} orphaned, {stats['deleted']} deleted")
 
             cleanup_result = {
-                "message": "Cleanup functionality needs custom SQL functions in Supabase",
-                "orphaned_playlist_songs": 0,
-                "orphaned_trending_songs": 0
+                "message": "Dry run completed, nothing deleted" if dry_run else "Cleanup completed",
+                "dry_run": dry_run,
+                "tables": report,
+                "orphaned_playlist_songs": report["playlist_songs"]["orphaned"],
+                "orphaned_liked_songs": report["liked_songs"]["orphaned"],
+                "orphaned_trending_songs": report["trending_songs"]["orphaned"],
+                "elapsed_seconds": round(time.monotonic() - started, 2)
             }
 
-            logger.info("Cleanup operation completed (placeholder implementation)")
+            logger.info("Cleanup operation completed")
             return cleanup_result
 
         except Exception as e:
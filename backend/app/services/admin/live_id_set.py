@@ -0,0 +1,50 @@
+"""
+Live ID Set Module
+
+Compact, read-only set of UUIDs used by maintenance sweeps to tell whether
+a referenced row still exists without a query per reference.
+
+IDs are stored as a sorted NumPy array of 16-byte values (16 bytes per ID,
+versus roughly 100 for a Python set of strings), and a whole page of
+references is tested at once with ``np.searchsorted``.
+"""
+
+import uuid
+from typing import Iterable, List
+
+import numpy as np
+
+
+def _to_bytes(ids: Iterable[str]) -> np.ndarray:
+    return np.array([uuid.UUID(value).bytes for value in ids], dtype="S16")
+
+
+class LiveIdSet:
+    """Sorted array of UUIDs supporting vectorized membership tests"""
+
+    def __init__(self, pages: Iterable[List[str]]):
+        chunks = [_to_bytes(page) for page in pages if page]
+        ids = np.concatenate(chunks) if chunks else np.empty(0, dtype="S16")
+        self._ids = np.unique(ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def contains(self, ids: List[str]) -> np.ndarray:
+        """Boolean mask of which ``ids`` are in the set; malformed IDs are treated as absent"""
+        mask = np.zeros(len(ids), dtype=bool)
+        valid = []
+        positions = []
+        for position, value in enumerate(ids):
+            try:
+                valid.append(uuid.UUID(value).bytes)
+                positions.append(position)
+            except (TypeError, ValueError, AttributeError):
+                continue
+        if not valid or not len(self._ids):
+            return mask
+        probe = np.array(valid, dtype="S16")
+        found = np.searchsorted(self._ids, probe)
+        found = np.minimum(found, len(self._ids) - 1)
+        mask[positions] = self._ids[found] == probe
+        return mask
@@ -0,0 +1,21 @@
+"""
+Analytics Services Module
+
+Handles ingestion and aggregation of listening activity.
+"""
+
+from .play_event_service import PlayEventService
+from .song_metrics_service import SongMetricsService
+from .listener_sketch_service import ListenerSketchService
+from .hyperloglog import HyperLogLog
+from .rollup_store import RollupSyncService
+from .export_service import AnalyticsExportService
+
+__all__ = [
+    "PlayEventService",
+    "SongMetricsService",
+    "ListenerSketchService",
+    "HyperLogLog",
+    "RollupSyncService",
+    "AnalyticsExportService",
+]
@@ -0,0 +1,287 @@
+"""
+Listener Sketch Service Module
+
+Approximate unique-listener counts per song over any range of days, using
+one HyperLogLog sketch per song per day.
+
+Listeners of played songs are collected in memory and folded into the stored
+sketches every ANALYTICS_SKETCH_FLUSH_SECONDS. Each worker keeps its own row
+per song and day (``worker_id``): a flush reads the worker's current sketch,
+merges the new listeners into it and writes it back, so no two workers ever
+write the same row. A query merges the sketches of every worker and every
+day in the range, which gives the distinct listeners of the whole range.
+
+Row ids are slots (``slot-0``, ``slot-1``, ...) held through worker leases
+rather than process ids, so a restarted or redeployed worker takes over a
+freed slot and keeps writing existing rows. The rows per song and day are
+bounded by the number of workers running at once, not by restarts.
+
+Estimates have a relative standard error of about 1.6% (p=12).
+
+API Endpoints that use this service:
+- GET /admin/analytics/song/{song_id} -> AdminService.get_song_analytics() -> get_unique_listeners()
+"""
+
+import base64
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core import events, scheduler
+from app.core.config import settings
+from app.core.workers import acquire_worker_lease, get_worker_id
+from app.services.analytics.hyperloglog import HyperLogLog
+from app.services.base.base_client import BaseSupabaseClient
+
+logger = logging.getLogger(__name__)
+
+MAX_RANGE_DAYS = 366
+SLOT_LEASE_PREFIX = "listener-sketch-slot-"
+# Slots tried before giving up; far more than the workers of any deployment
+MAX_SLOTS = 256
+FLUSH_BATCH_SIZE = 200
+# Bounds reported with an estimate span two standard errors (~95%)
+ERROR_BOUND_SIGMAS = 2
+
+SketchKey = Tuple[str, str]  # (song_id, day)
+
+
+_slot: Optional[int] = None
+_slot_lock = threading.Lock()
+
+
+def get_sketch_worker_id() -> str:
+    """
+    Identifier of this worker's sketch rows.
+
+    ANALYTICS_WORKER_ID when configured; otherwise the lowest sketch slot
+    whose lease is free, renewed on every call (sql/019).
+
+    Raises:
+        RuntimeError: If every slot is held by another worker
+    """
+    global _slot
+    if settings.ANALYTICS_WORKER_ID:
+        return settings.ANALYTICS_WORKER_ID
+
+    # Held across flushes that last a few intervals before another worker may take it over
+    ttl = 5 * settings.ANALYTICS_SKETCH_FLUSH_SECONDS
+    holder = get_worker_id()
+    with _slot_lock:
+        if _slot is not None and acquire_worker_lease(f"{SLOT_LEASE_PREFIX}{_slot}", holder, ttl):
+            return f"slot-{_slot}"
+        if _slot is not None:
+            logger.warning(f"Lost listener sketch slot {_slot}; taking another")
+        for slot in range(MAX_SLOTS):
+            if acquire_worker_lease(f"{SLOT_LEASE_PREFIX}{slot}", holder, ttl):
+                _slot = slot
+                return f"slot-{slot}"
+        _slot = None
+    raise RuntimeError(f"All {MAX_SLOTS} listener sketch slots are taken")
+
+
+class ListenerBuffer:
+    """
+    Listeners seen since the last flush, per song and day.
+
+    Plain sets are kept rather than sketches: a flush interval holds far
+    fewer listeners per song than the 4 KB a dense sketch would take.
+    """
+
+    def __init__(self):
+        self._pending: Dict[SketchKey, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def on_plays(self, plays: List[Dict[str, any]], **_) -> None:
+        with self._lock:
+            for play in plays:
+                if not play.get("user_id"):
+                    continue  # Anonymous plays have no listener to count
+                try:
+                    day = datetime.fromisoformat(play["played_at"]).astimezone(timezone.utc).date()
+                except (KeyError, TypeError, ValueError):
+                    day = datetime.now(timezone.utc).date()
+                self._pending[(play["song_id"], day.isoformat())].add(play["user_id"])
+
+    def drain(self) -> Dict[SketchKey, Set[str]]:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(set)
+            return pending
+
+    def restore(self, pending: Dict[SketchKey, Set[str]]) -> None:
+        with self._lock:
+            for key, listeners in pending.items():
+                self._pending[key].update(listeners)
+
+    def peek(self, song_id: str, days: Set[str]) -> Set[str]:
+        """Unflushed listeners of a song on the given days"""
+        with self._lock:
+            return set().union(*(
+                listeners for (pending_song, day), listeners in self._pending.items()
+                if pending_song == song_id and day in days
+            ))
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+_buffer: Optional[ListenerBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_listener_buffer() -> ListenerBuffer:
+    """Get or create the process-wide listener buffer, subscribed to play events"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                listener_buffer = ListenerBuffer()
+                events.subscribe(events.PLAYS_RECORDED, listener_buffer.on_plays)
+                _buffer = listener_buffer
+    return _buffer
+
+
+def _encode(sketch: HyperLogLog) -> str:
+    return base64.b64encode(sketch.to_bytes()).decode("ascii")
+
+
+def _decode(text: str) -> HyperLogLog:
+    return HyperLogLog.from_bytes(base64.b64decode(text))
+
+
+class ListenerSketchService(BaseSupabaseClient):
+    """
+    Service for persisting and querying per-song daily listener sketches.
+    """
+
+    def flush_sketches(self) -> int:
+        """
+        Merge buffered listeners into this worker's stored sketches.
+
+        Returns:
+            int: Number of sketches written
+
+        Raises:
+            Exception: If reading or writing sketches fails; the listeners are
+                kept for the next flush
+        """
+        listener_buffer = get_listener_buffer()
+        if not len(listener_buffer):
+            return 0
+        # Renews the slot lease; taken before draining so a failure loses nothing
+        worker_id = get_sketch_worker_id()
+        pending = listener_buffer.drain()
+        if not pending:
+            return 0
+
+        by_day: Dict[str, List[str]] = defaultdict(list)
+        for song_id, day in pending:
+            by_day[day].append(song_id)
+
+        written = 0
+        try:
+            for day, song_ids in by_day.items():
+                for start in range(0, len(song_ids), FLUSH_BATCH_SIZE):
+                    batch = song_ids[start:start + FLUSH_BATCH_SIZE]
+                    existing = (
+                        self.supabase.table("song_listener_sketches")
+                        .select("song_id, sketch")
+                        .eq("day", day)
+                        .eq("worker_id", worker_id)
+                        .in_("song_id", batch)
+                        .execute()
+                        .data or []
+                    )
+                    stored = {row["song_id"]: _decode(row["sketch"]) for row in existing}
+
+                    rows = []
+                    for song_id in batch:
+                        sketch = stored.get(song_id) or HyperLogLog()
+                        sketch.update(pending[(song_id, day)])
+                        rows.append({
+                            "song_id": song_id,
+                            "day": day,
+                            "worker_id": worker_id,
+                            "sketch": _encode(sketch),
+                            "updated_at": datetime.now(timezone.utc).isoformat()
+                        })
+                    self.supabase.table("song_listener_sketches").upsert(
+                        rows, on_conflict="song_id,day,worker_id"
+                    ).execute()
+                    for song_id in batch:
+                        # Written; nothing to restore for these on a later failure
+                        del pending[(song_id, day)]
+                    written += len(rows)
+        except Exception:
+            listener_buffer.restore(pending)
+            raise
+        return written
+
+    def get_unique_listeners(self, song_id: str, start_date: date, end_date: date) -> Dict[str, any]:
+        """
+        Estimate the distinct listeners of a song between two dates (inclusive).
+
+        Args:
+            song_id (str): ID of the song
+            start_date (date): First day of the range (UTC)
+            end_date (date): Last day of the range (UTC)
+
+        Returns:
+            Dict containing:
+            - estimate (int): Approximate number of unique listeners
+            - relative_error (float): Relative standard error of the estimate
+            - lower (int), upper (int): Bounds of +/- two standard errors (~95%)
+            - start_date (str), end_date (str): The range counted
+
+        Raises:
+            ValueError: If the range is reversed or longer than MAX_RANGE_DAYS
+        """
+        if end_date < start_date:
+            raise ValueError("end_date must not be before start_date")
+        if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+            raise ValueError(f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+
+        rows = (
+            self.supabase.table("song_listener_sketches")
+            .select("day, sketch")
+            .eq("song_id", song_id)
+            .gte("day", start_date.isoformat())
+            .lte("day", end_date.isoformat())
+            .execute()
+            .data or []
+        )
+        merged = HyperLogLog()
+        for row in rows:
+            merged.merge(_decode(row["sketch"]))
+
+        days = {date.fromordinal(ordinal).isoformat() for ordinal in range(start_date.toordinal(), end_date.toordinal() + 1)}
+        merged.update(get_listener_buffer().peek(song_id, days))
+
+        estimate = merged.count()
+        margin = ERROR_BOUND_SIGMAS * merged.relative_error
+        return {
+            "estimate": estimate,
+            "relative_error": round(merged.relative_error, 4),
+            "lower": int(estimate * (1 - margin)),
+            "upper": int(round(estimate * (1 + margin))),
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat()
+        }
+
+
+def start_listener_sketches() -> None:
+    """Start collecting listeners and schedule periodic sketch flushes"""
+    get_listener_buffer()
+    service = ListenerSketchService(use_service_role=True)
+    scheduler.schedule("listener-sketches-flush", settings.ANALYTICS_SKETCH_FLUSH_SECONDS, service.flush_sketches)
+
+
+def shutdown_listener_sketches() -> None:
+    """Flush buffered listeners on application shutdown"""
+    if _buffer is not None and len(_buffer):
+        try:
+            ListenerSketchService(use_service_role=True).flush_sketches()
+        except Exception as e:
+            logger.error(f"Failed to flush listener sketches on shutdown: {str(e)}")
@@ -0,0 +1,426 @@
+"""
+Play Event Service Module
+
+Ingests play events at high rates without a database round trip per play.
+
+Accepted events are validated, stamped, and put into a fixed-size in-memory
+ring buffer. A background flusher drains it into the ``play_events`` table
+with bulk inserts, once PLAY_EVENTS_FLUSH_SIZE events are waiting or
+PLAY_EVENTS_FLUSH_INTERVAL_SECONDS have passed, whichever comes first.
+
+Backpressure and failure handling:
+- When the ring buffer is full, new batches are rejected (HTTP 429) instead
+  of growing memory without bound
+- When an insert fails (for example Supabase is unavailable), the batch is
+  appended to a local NDJSON spill file and replayed once inserts succeed
+  again. Inserts are idempotent on ``event_id``, so replays never duplicate
+- When the spill file has also reached PLAY_EVENTS_SPILL_MAX_BYTES, the
+  pipeline reports itself unavailable (HTTP 503) until it recovers
+- Spill lines that cannot be decoded (a crash mid-append leaves a truncated
+  last line) are moved to ``<spill file>.bad`` instead of blocking replay
+- Any other flusher error is logged and retried after RETRY_BACKOFF_SECONDS,
+  so the flusher thread never dies
+
+PLAYS_RECORDED is published by the flusher with the rows each insert
+actually stored, so retried (duplicate) and dropped events are never counted.
+
+API Endpoints that use this service:
+- POST /events/plays -> PlayEventPipeline.submit()
+- GET /admin/maintenance/play-events -> PlayEventPipeline.get_stats()
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from app.core import events
+from app.core.config import settings
+from app.services.base.base_client import BaseSupabaseClient
+
+logger = logging.getLogger(__name__)
+
+MAX_SOURCE_LENGTH = 32
+# Seconds to wait before retrying inserts after a failure
+RETRY_BACKOFF_SECONDS = 30
+
+
+def normalize_play_event(raw: Dict[str, Any], received_at: datetime) -> Dict[str, Any]:
+    """
+    Validate a client play event and convert it to a play_events row.
+
+    Args:
+        raw (dict): Event with song_id and optional event_id, user_id,
+            played_at (ISO 8601 string or epoch milliseconds),
+            duration_played_ms and source
+        received_at (datetime): Default for played_at
+
+    Returns:
+        Dict: Row ready for bulk insert
+
+    Raises:
+        ValueError: If the event is malformed
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Each play event must be an object")
+    try:
+        song_id = str(uuid.UUID(raw["song_id"]))
+        event_id = str(uuid.UUID(raw["event_id"])) if raw.get("event_id") else str(uuid.uuid4())
+        user_id = str(uuid.UUID(raw["user_id"])) if raw.get("user_id") else None
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValueError("song_id is required, and song_id, event_id and user_id must be UUIDs")
+
+    played_at = raw.get("played_at")
+    if played_at is None:
+        played_at = received_at
+    elif isinstance(played_at, (int, float)):
+        played_at = datetime.fromtimestamp(played_at / 1000, tz=timezone.utc)
+    else:
+        try:
+            played_at = datetime.fromisoformat(str(played_at).replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError("played_at must be an ISO 8601 timestamp or epoch milliseconds")
+        if played_at.tzinfo is None:
+            played_at = played_at.replace(tzinfo=timezone.utc)
+
+    duration = raw.get("duration_played_ms")
+    if duration is not None and (not isinstance(duration, int) or duration < 0):
+        raise ValueError("duration_played_ms must be a non-negative integer")
+
+    source = raw.get("source")
+    if source is not None:
+        source = str(source)[:MAX_SOURCE_LENGTH]
+
+    return {
+        "event_id": event_id,
+        "song_id": song_id,
+        "user_id": user_id,
+        "played_at": played_at.isoformat(),
+        "duration_played_ms": duration,
+        "source": source,
+    }
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of preallocated slots.
+
+    Batches are all-or-nothing: a batch that does not fit is refused, so
+    callers can tell the client to back off.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._slots: List[Optional[Dict]] = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put_many(self, items: List[Dict], notify_at: int) -> bool:
+        """Append items, waking the consumer once ``notify_at`` items are waiting"""
+        with self._lock:
+            if self._size + len(items) > self.capacity:
+                return False
+            tail = (self._head + self._size) % self.capacity
+            first = min(len(items), self.capacity - tail)
+            self._slots[tail:tail + first] = items[:first]
+            self._slots[:len(items) - first] = items[first:]
+            self._size += len(items)
+            if self._size >= notify_at:
+                self._ready.notify()
+            return True
+
+    def take(self, max_items: int) -> List[Dict]:
+        """Remove and return up to max_items of the oldest items"""
+        with self._lock:
+            count = min(max_items, self._size)
+            end = self._head + count
+            if end <= self.capacity:
+                items = self._slots[self._head:end]
+                self._slots[self._head:end] = [None] * count
+            else:
+                wrapped = end - self.capacity
+                items = self._slots[self._head:] + self._slots[:wrapped]
+                self._slots[self._head:] = [None] * (self.capacity - self._head)
+                self._slots[:wrapped] = [None] * wrapped
+            self._head = end % self.capacity
+            self._size -= count
+            return items
+
+    def wait(self, min_items: int, timeout: float) -> None:
+        """Block until min_items are waiting, the timeout passes, or wake() is called"""
+        with self._lock:
+            if self._size < min_items:
+                self._ready.wait(timeout)
+
+    def wake(self) -> None:
+        with self._lock:
+            self._ready.notify_all()
+
+
+class PlayEventService(BaseSupabaseClient):
+    """
+    Service for writing play events to the database.
+    """
+
+    def insert_events(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Bulk insert play events, ignoring events that were already stored.
+
+        Returns:
+            List[Dict]: The rows that were newly stored (duplicates excluded)
+
+        Raises:
+            Exception: If the insert fails
+        """
+        response = self.supabase.table("play_events").upsert(
+            rows, on_conflict="event_id", ignore_duplicates=True
+        ).execute()
+        return response.data or []
+
+
+class PlayEventPipeline:
+    """
+    Buffers play events and flushes them to the database in the background.
+    """
+
+    def __init__(self, service: PlayEventService, capacity: int, flush_size: int, flush_interval: float,
+                 spill_path: str, spill_max_bytes: int):
+        self.service = service
+        self.buffer = RingBuffer(capacity)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self._spill_lock = threading.Lock()
+        self._stats = Counter()
+        self._last_error: Optional[str] = None
+        self._retry_at = 0.0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="play-event-flusher", daemon=True)
+        self._thread.start()
+
+    # Ingestion
+
+    def submit(self, raw_events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validate and buffer a batch of play events.
+
+        Args:
+            raw_events (List[Dict]): Events as sent by the client
+
+        Returns:
+            Dict containing:
+            - accepted (int): Number of events buffered
+            - status (str): "accepted", "full" (buffer full, retry shortly)
+              or "unavailable" (database down and spill file full)
+
+        Raises:
+            ValueError: If any event is malformed or the batch is too large
+        """
+        if not raw_events:
+            raise ValueError("No play events provided")
+        if len(raw_events) > settings.PLAY_EVENTS_MAX_BATCH:
+            raise ValueError(f"At most {settings.PLAY_EVENTS_MAX_BATCH} play events per request")
+
+        received_at = datetime.now(timezone.utc)
+        rows = [normalize_play_event(raw, received_at) for raw in raw_events]
+
+        if self._spill_full():
+            self._stats["rejected_unavailable"] += len(rows)
+            return {"accepted": 0, "status": "unavailable"}
+        if not self.buffer.put_many(rows, notify_at=self.flush_size):
+            self._stats["rejected_full"] += len(rows)
+            return {"accepted": 0, "status": "full"}
+
+        self._stats["accepted"] += len(rows)
+        return {"accepted": len(rows), "status": "accepted"}
+
+    # Flushing
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.buffer.wait(self.flush_size, self.flush_interval)
+                self.flush()
+                if time.time() >= self._retry_at:
+                    self._replay_spill()
+            except Exception as e:
+                # Keep the thread alive; a dead flusher would leave the buffer full for good
+                self._last_error = str(e)
+                self._retry_at = time.time() + RETRY_BACKOFF_SECONDS
+                self._stats["flusher_errors"] += 1
+                logger.exception(f"Play event flusher failed, retrying in {RETRY_BACKOFF_SECONDS}s: {str(e)}")
+                self._stopping.wait(RETRY_BACKOFF_SECONDS)
+
+    def flush(self) -> None:
+        """Write everything currently buffered, in batches of flush_size"""
+        while len(self.buffer):
+            batch = self.buffer.take(self.flush_size)
+            if time.time() < self._retry_at:
+                # The database failed recently; go straight to the spill file
+                self._spill(batch)
+                continue
+            self._write(batch)
+
+    def _write(self, batch: List[Dict]) -> bool:
+        try:
+            stored = self.service.insert_events(batch)
+            self._stats["flushed"] += len(batch)
+            self._stats["flushes"] += 1
+            self._publish(batch, stored)
+            return True
+        except Exception as e:
+            self._last_error = str(e)
+            self._retry_at = time.time() + RETRY_BACKOFF_SECONDS
+            logger.error(f"Play event insert failed, spilling {len(batch)} events: {str(e)}")
+            self._spill(batch)
+            return False
+
+    def _publish(self, batch: List[Dict], stored: List[Dict]) -> None:
+        """Announce the newly stored plays; the rest of the batch were already stored"""
+        self._stats["duplicates"] += len(batch) - len(stored)
+        if stored:
+            events.publish(events.PLAYS_RECORDED, plays=stored)
+
+    # Spill file
+
+    def _spill_full(self) -> bool:
+        try:
+            return os.path.getsize(self.spill_path) >= self.spill_max_bytes
+        except OSError:
+            return False
+
+    def _spill(self, batch: List[Dict]) -> None:
+        with self._spill_lock:
+            if self._spill_full():
+                self._stats["dropped"] += len(batch)
+                logger.error(f"Spill file full; dropped {len(batch)} play events")
+                return
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "ab") as spill:
+                spill.write(b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in batch))
+            self._stats["spilled"] += len(batch)
+
+    def _replay_spill(self) -> None:
+        """Insert spilled events back into the database, oldest first"""
+        replay_path = f"{self.spill_path}.replay"
+        # A replay file left by an interrupted replay (or a restart) is finished first
+        if not os.path.exists(replay_path) and not os.path.exists(self.spill_path):
+            return
+        with self._spill_lock:
+            if not os.path.exists(replay_path):
+                os.replace(self.spill_path, replay_path)
+
+        with open(replay_path, "rb") as replay:
+            batch = []
+            for line in replay:
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    self._quarantine(line)
+                    continue
+                if len(batch) >= self.flush_size:
+                    if not self._replay_batch(batch, replay):
+                        return
+                    batch = []
+            if batch and not self._replay_batch(batch, replay):
+                return
+        os.remove(replay_path)
+        logger.info("Play event spill file replayed")
+
+    def _quarantine(self, line: bytes) -> None:
+        """Move an undecodable spill line aside so it cannot block replay"""
+        self._stats["quarantined"] += 1
+        logger.warning(f"Skipping undecodable play event spill line ({len(line)} bytes)")
+        with open(f"{self.spill_path}.bad", "ab") as bad:
+            bad.write(line if line.endswith(b"\n") else line + b"\n")
+
+    def _replay_batch(self, batch: List[Dict], replay) -> bool:
+        try:
+            stored = self.service.insert_events(batch)
+            self._stats["replayed"] += len(batch)
+            self._publish(batch, stored)
+            return True
+        except Exception as e:
+            self._last_error = str(e)
+            self._retry_at = time.time() + RETRY_BACKOFF_SECONDS
+            logger.warning(f"Play event replay failed, will retry: {str(e)}")
+            # Keep the failed batch and everything after it for the next attempt
+            remaining = b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in batch) + replay.read()
+            with open(f"{self.spill_path}.replay.tmp", "wb") as rest:
+                rest.write(remaining)
+            replay.close()
+            os.replace(f"{self.spill_path}.replay.tmp", f"{self.spill_path}.replay")
+            return False
+
+    def stop(self) -> None:
+        """Stop the flusher after writing (or spilling) everything buffered"""
+        self._stopping.set()
+        self.buffer.wake()
+        self._thread.join(timeout=10)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pipeline counters and buffer state"""
+        try:
+            spill_bytes = os.path.getsize(self.spill_path)
+        except OSError:
+            spill_bytes = 0
+        return {
+            "buffered": len(self.buffer),
+            "capacity": self.buffer.capacity,
+            "accepted": self._stats["accepted"],
+            "flushed": self._stats["flushed"],
+            "flushes": self._stats["flushes"],
+            "rejected_full": self._stats["rejected_full"],
+            "rejected_unavailable": self._stats["rejected_unavailable"],
+            "spilled": self._stats["spilled"],
+            "replayed": self._stats["replayed"],
+            "dropped": self._stats["dropped"],
+            "duplicates": self._stats["duplicates"],
+            "quarantined": self._stats["quarantined"],
+            "flusher_errors": self._stats["flusher_errors"],
+            "spill_bytes": spill_bytes,
+            "degraded": time.time() < self._retry_at,
+            "last_error": self._last_error,
+        }
+
+
+_pipeline: Optional[PlayEventPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_play_event_pipeline() -> PlayEventPipeline:
+    """Get or create the process-wide play event pipeline"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = PlayEventPipeline(
+                    PlayEventService(use_service_role=True),
+                    capacity=settings.PLAY_EVENTS_BUFFER_SIZE,
+                    flush_size=settings.PLAY_EVENTS_FLUSH_SIZE,
+                    flush_interval=settings.PLAY_EVENTS_FLUSH_INTERVAL_SECONDS,
+                    spill_path=settings.PLAY_EVENTS_SPILL_PATH,
+                    spill_max_bytes=settings.PLAY_EVENTS_SPILL_MAX_BYTES,
+                )
+    return _pipeline
+
+
+def shutdown_play_event_pipeline() -> None:
+    """Flush buffered events on application shutdown"""
+    if _pipeline is not None:
+        _pipeline.stop()
@@ -0,0 +1,393 @@
+"""
+Rollup Store Module
+
+Columnar time series of per-song plays, likes and playlist adds at hour and
+day granularity, for dashboards and sparklines.
+
+Each (metric, granularity) series is split into segments (one month of hour
+buckets, one year of day buckets). A segment is a 2-D uint32 array of
+song row x bucket, saved as a ``.npy`` file under ANALYTICS_ROLLUP_DIR and
+opened with ``np.lib.format.open_memmap``, so queries touch only the pages
+they slice and nothing is loaded up front:
+
+- One song's series is a row slice
+- The catalog-wide series is a column sum over the slice
+
+Song ids map to row numbers through ``songs.npy``, which only grows; a
+segment is reallocated with more rows when new songs no longer fit.
+
+The store is filled from ``song_metric_counters`` (already aggregated per
+hour and day across all workers) rather than from this process' own events.
+A sync reads the counter rows of the buckets that may have changed since the
+last sync, overwriting cells, so it is idempotent and can be re-run from any
+point. Writes are serialized across processes with a lock file.
+
+API Endpoints that use this store:
+- GET /admin/analytics/timeseries -> RollupSyncService.get_timeseries()
+- POST /admin/analytics/rollups/rebuild -> RollupSyncService.sync(full=True)
+"""
+
+import calendar
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core import scheduler
+from app.core.config import settings
+from app.services.analytics.song_metrics_service import METRICS
+from app.services.base.base_client import BaseSupabaseClient, iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("hour", "day")
+MIN_ROWS = 1024
+# Longest series a single query may return
+MAX_BUCKETS = {"hour": 24 * 92, "day": 366 * 10}
+
+
+def _floor(moment: datetime, granularity: str) -> datetime:
+    moment = moment.astimezone(timezone.utc)
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _step(granularity: str) -> timedelta:
+    return timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+
+
+def _segment(moment: datetime, granularity: str) -> Tuple[str, datetime, datetime]:
+    """Name, start and end (exclusive) of the segment containing ``moment``"""
+    if granularity == "hour":
+        start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        days = calendar.monthrange(start.year, start.month)[1]
+        return start.strftime("%Y-%m"), start, start + timedelta(days=days)
+    start = moment.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    return start.strftime("%Y"), start, start.replace(year=start.year + 1)
+
+
+def _column(moment: datetime, segment_start: datetime, granularity: str) -> int:
+    return int((moment - segment_start) // _step(granularity))
+
+
+class RollupStore:
+    """
+    Memory-mapped song x bucket arrays on disk.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._index_path = os.path.join(root, "songs.npy")
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._index_mtime = None
+        # path -> (inode, memmap); reopened when a writer replaces the file
+        self._segments: Dict[str, Tuple[int, np.memmap]] = {}
+        self._lock = threading.RLock()
+
+    # Song index
+
+    def _load_index(self) -> None:
+        try:
+            mtime = os.stat(self._index_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._index_mtime:
+            self._ids = [song_id.decode("ascii") for song_id in np.load(self._index_path)]
+            self._rows = {song_id: row for row, song_id in enumerate(self._ids)}
+            self._index_mtime = mtime
+
+    def _save_index(self) -> None:
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "wb") as tmp:
+            np.save(tmp, np.array(self._ids, dtype="S36"))
+        os.replace(tmp_path, self._index_path)
+        self._index_mtime = os.stat(self._index_path).st_mtime_ns
+
+    def song_count(self) -> int:
+        with self._lock:
+            self._load_index()
+            return len(self._ids)
+
+    # Segments
+
+    def _path(self, metric: str, granularity: str, name: str) -> str:
+        return os.path.join(self.root, metric, granularity, f"{name}.npy")
+
+    def _open(self, path: str) -> Optional[np.memmap]:
+        try:
+            inode = os.stat(path).st_ino
+        except FileNotFoundError:
+            return None
+        cached = self._segments.get(path)
+        if cached and cached[0] == inode:
+            return cached[1]
+        segment = np.lib.format.open_memmap(path, mode="r+")
+        self._segments[path] = (inode, segment)
+        return segment
+
+    def _ensure(self, metric: str, granularity: str, moment: datetime, rows: int) -> Tuple[np.memmap, datetime]:
+        """Open the segment for ``moment`` with at least ``rows`` rows, creating or growing it"""
+        name, start, end = _segment(moment, granularity)
+        path = self._path(metric, granularity, name)
+        segment = self._open(path)
+        if segment is not None and segment.shape[0] >= rows:
+            return segment, start
+
+        capacity = max(MIN_ROWS, 1 << (rows - 1).bit_length())
+        buckets = _column(end, start, granularity)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint32, shape=(capacity, buckets))
+        if segment is not None:
+            grown[:segment.shape[0]] = segment
+        grown.flush()
+        del grown
+        os.replace(tmp_path, path)
+        return self._open(path), start
+
+    # Writing
+
+    def write(self, metric: str, granularity: str, cells: List[Tuple[str, datetime, int]]) -> None:
+        """
+        Set counts of (song_id, bucket_start, count) cells.
+
+        Callers must hold write_lock().
+        """
+        with self._lock:
+            self._load_index()
+            added = False
+            for song_id, _, _ in cells:
+                if song_id not in self._rows:
+                    self._rows[song_id] = len(self._ids)
+                    self._ids.append(song_id)
+                    added = True
+            if added:
+                self._save_index()
+
+            by_segment: Dict[str, List[Tuple[int, datetime, int]]] = {}
+            for song_id, bucket, count in cells:
+                by_segment.setdefault(_segment(bucket, granularity)[0], []).append((self._rows[song_id], bucket, count))
+
+            for entries in by_segment.values():
+                segment, start = self._ensure(metric, granularity, entries[0][1], len(self._ids))
+                rows = np.fromiter((row for row, _, _ in entries), dtype=np.int64, count=len(entries))
+                columns = np.fromiter((_column(bucket, start, granularity) for _, bucket, _ in entries),
+                                      dtype=np.int64, count=len(entries))
+                segment[rows, columns] = np.fromiter((count for _, _, count in entries), dtype=np.uint32,
+                                                     count=len(entries))
+                segment.flush()
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Exclusive lock across processes sharing the rollup directory"""
+        with open(os.path.join(self.root, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Reading
+
+    def series(self, metric: str, granularity: str, start: datetime, end: datetime,
+               song_id: Optional[str] = None) -> Tuple[List[datetime], np.ndarray]:
+        """
+        Counts per bucket from ``start`` to ``end`` (inclusive).
+
+        Args:
+            metric (str): "plays", "likes" or "playlist_adds"
+            granularity (str): "hour" or "day"
+            start (datetime): First bucket (floored to the granularity)
+            end (datetime): Last bucket (floored to the granularity)
+            song_id (str, optional): One song's series; the catalog-wide total when omitted
+
+        Returns:
+            Tuple of the bucket starts and a uint64 array of counts
+        """
+        start, end = _floor(start, granularity), _floor(end, granularity)
+        with self._lock:
+            self._load_index()
+            row = self._rows.get(song_id) if song_id else None
+            song_rows = len(self._ids)
+
+        parts = []
+        cursor = start
+        while cursor <= end:
+            name, segment_start, segment_end = _segment(cursor, granularity)
+            last = min(end + _step(granularity), segment_end)
+            first_column = _column(cursor, segment_start, granularity)
+            last_column = _column(last, segment_start, granularity)
+            with self._lock:
+                segment = self._open(self._path(metric, granularity, name))
+
+            if segment is None or (song_id and (row is None or row >= segment.shape[0])):
+                parts.append(np.zeros(last_column - first_column, dtype=np.uint64))
+            elif song_id:
+                parts.append(segment[row, first_column:last_column].astype(np.uint64))
+            else:
+                parts.append(segment[:song_rows, first_column:last_column].sum(axis=0, dtype=np.uint64))
+            cursor = last
+
+        values = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64)
+        buckets = [start + _step(granularity) * offset for offset in range(len(values))]
+        return buckets, values
+
+
+_store: Optional[RollupStore] = None
+_store_lock = threading.Lock()
+
+
+def get_rollup_store() -> RollupStore:
+    """Get or create the process-wide rollup store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RollupStore(settings.ANALYTICS_ROLLUP_DIR)
+    return _store
+
+
+class RollupSyncService(BaseSupabaseClient):
+    """
+    Service for filling the rollup store from song metric counters and
+    answering time-series queries from it.
+    """
+
+    def _state_path(self) -> str:
+        return os.path.join(get_rollup_store().root, "state.json")
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            with open(self._state_path()) as state_file:
+                return json.load(state_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self, state: Dict[str, str]) -> None:
+        tmp_path = f"{self._state_path()}.tmp"
+        with open(tmp_path, "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, self._state_path())
+
+    def sync(self, full: bool = False, progress: Optional[Callable] = None) -> Dict[str, any]:
+        """
+        Copy changed counter buckets into the rollup store.
+
+        Incremental syncs re-read everything from the bucket before the last
+        synced one, which picks up the still-open bucket and late events.
+        A full sync re-reads ANALYTICS_ROLLUP_HOURLY_DAYS of hour buckets and
+        ANALYTICS_ROLLUP_DAILY_DAYS of day buckets.
+
+        Args:
+            full (bool): Ignore the sync state and re-read the whole retention
+            progress (Callable, optional): Called with running counters
+
+        Returns:
+            Dict containing:
+            - cells (int): Number of song/bucket cells written
+            - series (dict): Last synced bucket per "metric:granularity"
+        """
+        store = get_rollup_store()
+        now = datetime.now(timezone.utc)
+        retention = {
+            "hour": timedelta(days=settings.ANALYTICS_ROLLUP_HOURLY_DAYS),
+            "day": timedelta(days=settings.ANALYTICS_ROLLUP_DAILY_DAYS),
+        }
+        cells_written = 0
+
+        with store.write_lock():
+            state = {} if full else self._load_state()
+            for metric in METRICS:
+                for granularity in GRANULARITIES:
+                    series_key = f"{metric}:{granularity}"
+                    oldest = _floor(now - retention[granularity], granularity)
+                    if series_key in state:
+                        latest = datetime.fromisoformat(state[series_key])
+                        since = max(latest - _step(granularity), oldest)
+                    else:
+                        latest = since = oldest
+
+                    pages = iter_table_pages(
+                        self.supabase, "song_metric_counters", "song_id, bucket_start, count",
+                        page_size=1000, key="song_id", sort="bucket_start",
+                        filters=lambda query, m=metric, g=granularity, s=since: (
+                            query.eq("metric", m).eq("granularity", g).gte("bucket_start", s.isoformat())
+                        )
+                    )
+                    for page in pages:
+                        cells = []
+                        for row in page:
+                            bucket = datetime.fromisoformat(row["bucket_start"]).astimezone(timezone.utc)
+                            cells.append((row["song_id"], bucket, row["count"]))
+                            latest = max(latest, bucket)
+                        store.write(metric, granularity, cells)
+                        cells_written += len(cells)
+                        if progress:
+                            progress(cells=cells_written, series=series_key)
+                    state[series_key] = latest.isoformat()
+            self._save_state(state)
+
+        logger.info(f"Synced {cells_written} rollup cells")
+        return {"cells": cells_written, "series": state}
+
+    def get_timeseries(self, metric: str = "plays", granularity: str = "day", start: Optional[datetime] = None,
+                       end: Optional[datetime] = None, song_id: Optional[str] = None) -> Dict[str, any]:
+        """
+        Get a song's or the whole catalog's series of a metric.
+
+        GET /admin/analytics/timeseries
+
+        Args:
+            metric (str): "plays", "likes" or "playlist_adds"
+            granularity (str): "hour" or "day"
+            start (datetime, optional): First bucket (default: 30 days or 48 hours before end)
+            end (datetime, optional): Last bucket (default: now)
+            song_id (str, optional): Song to chart; the catalog-wide total when omitted
+
+        Returns:
+            Dict containing:
+            - metric, granularity, song_id: The query
+            - buckets (List[str]): Bucket start times (UTC, ISO 8601)
+            - values (List[int]): Count per bucket
+            - total (int): Sum of values
+
+        Raises:
+            ValueError: If metric or granularity is unknown or the range is too long
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of: {', '.join(METRICS)}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+
+        end = (end or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        default_span = timedelta(days=29) if granularity == "day" else timedelta(hours=47)
+        start = (start or end - default_span).astimezone(timezone.utc)
+        if end < start:
+            raise ValueError("end must not be before start")
+        if (_floor(end, granularity) - _floor(start, granularity)) // _step(granularity) >= MAX_BUCKETS[granularity]:
+            raise ValueError(f"At most {MAX_BUCKETS[granularity]} {granularity} buckets per query")
+
+        buckets, values = get_rollup_store().series(metric, granularity, start, end, song_id=song_id)
+        return {
+            "metric": metric,
+            "granularity": granularity,
+            "song_id": song_id,
+            "buckets": [bucket.isoformat() for bucket in buckets],
+            "values": values.tolist(),
+            "total": int(values.sum())
+        }
+
+
+def start_rollup_sync() -> None:
+    """Schedule periodic rollup syncs"""
+    service = RollupSyncService(use_service_role=True)
+    scheduler.schedule("analytics-rollup-sync", settings.ANALYTICS_ROLLUP_SYNC_SECONDS, service.sync)
@@ -0,0 +1,308 @@
+"""
+Song Metrics Service Module
+
+Per-song event counters for ranking songs by plays, likes or playlist adds
+over a time window, without scanning raw events.
+
+Events are counted in process memory as they happen and flushed every
+ANALYTICS_COUNTER_FLUSH_SECONDS to ``song_metric_counters`` with one RPC
+call that adds the deltas. Every event increments three counters: its hour
+bucket, its day bucket and the all-time total. Deltas from several workers
+simply add up.
+
+Windows are answered from buckets:
+- 24h: the last 24 hour buckets
+- 7d / 30d: the last 7 / 30 day buckets
+- all: the all-time totals, ranked by the database
+
+Bucket contents are cached in memory; closed buckets rarely change, so only
+the current bucket is re-read on each refresh. The per-bucket counts are
+summed and the top-K is taken with a heap.
+
+API Endpoints that use this service:
+- GET /admin/analytics/top-songs -> AdminService.get_top_songs() -> get_top_songs()
+- GET /admin/analytics/song/{song_id} -> AdminService.get_song_analytics() -> get_song_counts()
+"""
+
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+from app.core import events, scheduler
+from app.core.config import settings
+from app.services.base.base_client import BaseSupabaseClient, iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("plays", "likes", "playlist_adds")
+# Window -> (bucket granularity, number of buckets)
+WINDOWS = {
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+    "30d": ("day", 30),
+    "all": ("all", 1),
+}
+ALL_TIME_BUCKET = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+BUCKET_CACHE_SIZE = 256
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the bucket containing ``moment``"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ALL_TIME_BUCKET
+
+
+def window_buckets(window: str, now: Optional[datetime] = None) -> Tuple[str, List[datetime]]:
+    """Granularity and bucket starts covering a window, oldest first"""
+    granularity, count = WINDOWS[window]
+    if granularity == "all":
+        return granularity, [ALL_TIME_BUCKET]
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    current = bucket_start(now or datetime.now(timezone.utc), granularity)
+    return granularity, [current - step * offset for offset in range(count - 1, -1, -1)]
+
+
+class MetricCounter:
+    """
+    Counter deltas accumulated in memory between flushes.
+    """
+
+    def __init__(self):
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, metric: str, song_id: str, moment: Optional[datetime] = None, amount: int = 1) -> None:
+        now = datetime.now(timezone.utc)
+        # Buckets are UTC; events from the future count as now
+        moment = min(moment.astimezone(timezone.utc), now) if moment else now
+        with self._lock:
+            for granularity in ("hour", "day", "all"):
+                self._pending[(metric, granularity, bucket_start(moment, granularity).isoformat(), song_id)] += amount
+
+    def drain(self) -> Counter:
+        """Take all pending deltas"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            return pending
+
+    def restore(self, deltas: Counter) -> None:
+        """Put deltas back after a failed flush"""
+        with self._lock:
+            self._pending.update(deltas)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # Event handlers
+
+    def on_plays(self, plays: List[Dict[str, any]], **_) -> None:
+        for play in plays:
+            try:
+                moment = datetime.fromisoformat(play["played_at"])
+            except (KeyError, TypeError, ValueError):
+                moment = None
+            self.add("plays", play["song_id"], moment)
+
+    def on_like(self, song_id: str, **_) -> None:
+        self.add("likes", song_id)
+
+    def on_playlist_songs_added(self, song_ids: List[str], **_) -> None:
+        for song_id in song_ids:
+            self.add("playlist_adds", song_id)
+
+
+_counter: Optional[MetricCounter] = None
+_counter_lock = threading.Lock()
+
+# (metric, granularity, bucket_start) -> (fetched_at, {song_id: count})
+_bucket_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict[str, int]]]" = OrderedDict()
+# (metric, window) -> (computed_at, limit, [(song_id, count), ...] in rank order)
+_ranking_cache: Dict[Tuple[str, str], Tuple[float, int, List[Tuple[str, int]]]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_metric_counter() -> MetricCounter:
+    """Get or create the process-wide counter, subscribed to play, like and playlist events"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                counter = MetricCounter()
+                events.subscribe(events.PLAYS_RECORDED, counter.on_plays)
+                events.subscribe(events.SONG_LIKED, counter.on_like)
+                events.subscribe(events.PLAYLIST_SONGS_ADDED, counter.on_playlist_songs_added)
+                _counter = counter
+    return _counter
+
+
+class SongMetricsService(BaseSupabaseClient):
+    """
+    Service for flushing and querying per-song metric counters.
+    """
+
+    def flush_counters(self) -> int:
+        """
+        Add the pending counter deltas to the database.
+
+        Returns:
+            int: Number of counter rows updated
+
+        Raises:
+            Exception: If the RPC fails; the deltas are kept for the next flush
+        """
+        counter = get_metric_counter()
+        deltas = counter.drain()
+        if not deltas:
+            return 0
+        rows = [
+            {"metric": metric, "granularity": granularity, "bucket_start": start, "song_id": song_id, "count": count}
+            for (metric, granularity, start, song_id), count in deltas.items()
+        ]
+        try:
+            self.supabase.rpc("increment_song_metric_counters", {"deltas": rows}).execute()
+        except Exception:
+            counter.restore(deltas)
+            raise
+
+        # Late events can change closed buckets; drop those from the cache
+        touched = {(metric, granularity, start) for metric, granularity, start, _ in deltas}
+        with _cache_lock:
+            for key in touched:
+                _bucket_cache.pop(key, None)
+        return len(rows)
+
+    def _fetch_bucket(self, metric: str, granularity: str, start: datetime, is_open: bool) -> Dict[str, int]:
+        """Counts of every song in one bucket, cached"""
+        key = (metric, granularity, start.isoformat())
+        ttl = settings.ANALYTICS_COUNTER_FLUSH_SECONDS if is_open else settings.ANALYTICS_BUCKET_CACHE_SECONDS
+        with _cache_lock:
+            cached = _bucket_cache.get(key)
+            if cached and time.time() - cached[0] < ttl:
+                _bucket_cache.move_to_end(key)
+                return cached[1]
+
+        counts = {}
+        pages = iter_table_pages(
+            self.supabase, "song_metric_counters", "song_id, count", page_size=1000, key="song_id",
+            filters=lambda query: query.eq("metric", metric).eq("granularity", granularity).eq("bucket_start", key[2])
+        )
+        for page in pages:
+            counts.update((row["song_id"], row["count"]) for row in page)
+
+        with _cache_lock:
+            _bucket_cache[key] = (time.time(), counts)
+            _bucket_cache.move_to_end(key)
+            while len(_bucket_cache) > BUCKET_CACHE_SIZE:
+                _bucket_cache.popitem(last=False)
+        return counts
+
+    def get_top_songs(self, metric: str = "plays", window: str = "7d", limit: int = 50) -> List[Tuple[str, int]]:
+        """
+        Rank songs by a metric over a window.
+
+        Args:
+            metric (str): "plays", "likes" or "playlist_adds"
+            window (str): "24h", "7d", "30d" or "all"
+            limit (int): Number of songs to return
+
+        Returns:
+            List[Tuple[str, int]]: (song_id, count) pairs, highest count first
+
+        Raises:
+            ValueError: If metric or window is unknown
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of: {', '.join(METRICS)}")
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of: {', '.join(WINDOWS)}")
+
+        with _cache_lock:
+            cached = _ranking_cache.get((metric, window))
+        if cached and time.time() - cached[0] < settings.ANALYTICS_COUNTER_FLUSH_SECONDS and cached[1] >= limit:
+            return cached[2][:limit]
+
+        if window == "all":
+            # A single bucket: let the index on count return the top rows directly
+            rows = (
+                self.supabase.table("song_metric_counters")
+                .select("song_id, count")
+                .eq("metric", metric)
+                .eq("granularity", "all")
+                .eq("bucket_start", ALL_TIME_BUCKET.isoformat())
+                .order("count", desc=True)
+                .limit(limit)
+                .execute()
+                .data or []
+            )
+            ranking = [(row["song_id"], row["count"]) for row in rows]
+        else:
+            granularity, starts = window_buckets(window)
+            totals: Counter = Counter()
+            for start in starts:
+                totals.update(self._fetch_bucket(metric, granularity, start, is_open=start == starts[-1]))
+            ranking = heapq.nlargest(limit, totals.items(), key=itemgetter(1))
+
+        with _cache_lock:
+            _ranking_cache[(metric, window)] = (time.time(), limit, ranking)
+        return ranking
+
+    def get_song_counts(self, song_id: str, metric: str = "plays") -> Dict[str, int]:
+        """
+        Counts of one metric for one song in every window.
+
+        Returns:
+            Dict[str, int]: Window name ("24h", "7d", "30d", "all") to count
+        """
+        now = datetime.now(timezone.utc)
+        oldest_hour = window_buckets("24h", now)[1][0]
+        oldest_day = window_buckets("30d", now)[1][0]
+        rows = (
+            self.supabase.table("song_metric_counters")
+            .select("granularity, bucket_start, count")
+            .eq("song_id", song_id)
+            .eq("metric", metric)
+            .or_(
+                f"and(granularity.eq.hour,bucket_start.gte.\"{oldest_hour.isoformat()}\"),"
+                f"and(granularity.eq.day,bucket_start.gte.\"{oldest_day.isoformat()}\"),"
+                "granularity.eq.all"
+            )
+            .execute()
+            .data or []
+        )
+
+        seven_days_ago = window_buckets("7d", now)[1][0]
+        counts = {window: 0 for window in WINDOWS}
+        for row in rows:
+            if row["granularity"] == "hour":
+                counts["24h"] += row["count"]
+            elif row["granularity"] == "day":
+                counts["30d"] += row["count"]
+                if datetime.fromisoformat(row["bucket_start"]) >= seven_days_ago:
+                    counts["7d"] += row["count"]
+            else:
+                counts["all"] += row["count"]
+        return counts
+
+
+def start_metric_counters() -> None:
+    """Start counting events and schedule periodic flushes"""
+    get_metric_counter()
+    service = SongMetricsService(use_service_role=True)
+    scheduler.schedule("metric-counters-flush", settings.ANALYTICS_COUNTER_FLUSH_SECONDS, service.flush_counters)
+
+
+def shutdown_metric_counters() -> None:
+    """Flush pending counter deltas on application shutdown"""
+    if _counter is not None and len(_counter):
+        try:
+            SongMetricsService(use_service_role=True).flush_counters()
+        except Exception as e:
+            logger.error(f"Failed to flush metric counters on shutdown: {str(e)}")
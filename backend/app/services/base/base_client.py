@@ -5,8 +5,10 @@ Provides shared Supabase client initialization and configuration
 for all service modules.
 """
 
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from supabase import create_client, Client
 from app.core.config import settings
+from app.services.base.url_signer import get_url_signer
 
 _supabase_client = None
 _supabase_admin_client = None
@@ -42,6 +44,70 @@ def get_supabase_admin_client() -> Client:
     return _supabase_admin_client
 
 
+def get_storage_urls(bucket: str, file_paths: Iterable[str]) -> Dict[str, str]:
+    """
+    Get client-facing URLs for many files in a storage bucket.
+
+    Public buckets get plain public URLs. Buckets listed in
+    PRIVATE_STORAGE_BUCKETS get signed URLs, minted in one batch for every
+    path not already cached.
+    """
+    paths = [path for path in file_paths if path]
+    if bucket not in settings.PRIVATE_STORAGE_BUCKETS:
+        return {path: f"{settings.SUPABASE_URL}/storage/v1/object/public/{bucket}/{path}" for path in paths}
+    return get_url_signer().sign(get_supabase_admin_client(), bucket, paths)
+
+
+def iter_table_pages(client: Client, table: str, columns: str, page_size: int = 500, key: str = "id",
+                     sort: Optional[str] = None, desc: bool = False,
+                     filters: Optional[Callable] = None) -> Iterator[List[Dict]]:
+    """
+    Iterate over a table in pages using keyset pagination.
+
+    Each page is fetched with ``key > last_key ORDER BY key LIMIT page_size``,
+    so the cost per page stays constant regardless of how deep the scan is.
+    The key column must be unique and included in ``columns``.
+
+    Args:
+        client (Client): Supabase client to query with
+        table (str): Table name
+        columns (str): Columns to select
+        page_size (int): Rows per page
+        key (str): Unique column used as the keyset (and tie-breaker)
+        sort (str, optional): Non-unique column to order by before ``key``,
+            e.g. ``created_at``; must also be included in ``columns``
+        desc (bool): Iterate in descending order
+        filters (Callable, optional): Applies extra filters to each page query
+    """
+    op = "lt" if desc else "gt"
+    last_row = None
+    while True:
+        query = client.table(table).select(columns)
+        if filters:
+            query = filters(query)
+        if sort:
+            query = query.order(sort, desc=desc)
+        query = query.order(key, desc=desc).limit(page_size)
+
+        if last_row is not None:
+            if sort:
+                # Row-value comparison (sort, key) > (last sort, last key), spelled out for PostgREST
+                last_sort = f'"{last_row[sort]}"'
+                query = query.or_(
+                    f"{sort}.{op}.{last_sort},and({sort}.eq.{last_sort},{key}.{op}.{last_row[key]})"
+                )
+            else:
+                query = getattr(query, op)(key, last_row[key])
+
+        rows = query.execute().data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_row = rows[-1]
+
+
 class BaseSupabaseClient:
     """Base class for Supabase service clients with common functionality"""
 
@@ -60,9 +126,20 @@ class BaseSupabaseClient:
         self.supabase: Client = create_client(url, key)
         self.bucket_name = "songs"  # Using hardcoded value from .env
         self.supabase_url = url
+        self.supabase_key = key
 
     def _get_audio_url(self, file_path: str) -> str | None:
-        """Generate public URL for an audio file"""
+        """Generate URL for an audio file (signed if the bucket is private)"""
         if not file_path:
             return None
-        return f"{self.supabase_url}/storage/v1/object/public/{self.bucket_name}/{file_path}"
+        return self._get_audio_urls([file_path]).get(file_path)
+
+    def _get_audio_urls(self, file_paths: Iterable[str]) -> Dict[str, str]:
+        """Generate URLs for many audio files at once, signing private ones in a single batch"""
+        return get_storage_urls(self.bucket_name, file_paths)
+
+    def _iter_table_pages(self, table: str, columns: str, page_size: int = 500, key: str = "id",
+                          sort: Optional[str] = None, desc: bool = False,
+                          filters: Optional[Callable] = None) -> Iterator[List[Dict]]:
+        """Iterate over a table in keyset-paginated pages (see iter_table_pages)"""
+        return iter_table_pages(self.supabase, table, columns, page_size, key, sort, desc, filters)
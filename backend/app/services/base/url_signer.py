@@ -0,0 +1,129 @@
+"""
+URL Signer Module
+
+Mints signed storage URLs for private buckets in batches and caches them until
+shortly before they expire.
+
+A list page of songs needs one URL per row. Signing them one by one would cost
+a storage round trip per song, so callers pass every path of the page at once.
+Paths with a cached URL that is still comfortably valid are answered from
+memory, and the rest are signed with a single ``create_signed_urls`` call.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from supabase import Client
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on paths per signing request
+SIGN_BATCH_SIZE = 1000
+
+
+class UrlSigner:
+    """
+    Expiry-aware LRU cache of signed storage URLs.
+    """
+
+    def __init__(self, ttl_seconds: int, refresh_margin_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        # Cached URLs are only handed out while they have at least this long left
+        self.refresh_margin_seconds = min(refresh_margin_seconds, ttl_seconds // 2)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    def sign(self, client: Client, bucket: str, paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Get signed URLs for many files in a bucket.
+
+        Args:
+            client (Client): Supabase client allowed to read the bucket
+            bucket (str): Storage bucket name
+            paths (Iterable[str]): Object paths; empty values and duplicates are ignored
+
+        Returns:
+            Dict mapping each path to its signed URL. Paths that could not be
+            signed are left out.
+        """
+        now = time.time()
+        urls = {}
+        missing = []
+        with self._lock:
+            for path in dict.fromkeys(path for path in paths if path):
+                entry = self._entries.get((bucket, path))
+                if entry and entry[1] - self.refresh_margin_seconds > now:
+                    self._entries.move_to_end((bucket, path))
+                    urls[path] = entry[0]
+                    self._stats["hits"] += 1
+                else:
+                    missing.append(path)
+            self._stats["misses"] += len(missing)
+
+        for start in range(0, len(missing), SIGN_BATCH_SIZE):
+            batch = missing[start:start + SIGN_BATCH_SIZE]
+            try:
+                signed = client.storage.from_(bucket).create_signed_urls(batch, self.ttl_seconds)
+            except Exception as e:
+                logger.error(f"Failed to sign {len(batch)} URLs in bucket {bucket}: {str(e)}")
+                self._stats["errors"] += len(batch)
+                continue
+            self._stats["sign_calls"] += 1
+
+            expires_at = now + self.ttl_seconds
+            with self._lock:
+                for item in signed:
+                    url = item.get("signedURL") or item.get("signedUrl")
+                    if item.get("error") or not url:
+                        self._stats["errors"] += 1
+                        continue
+                    urls[item["path"]] = url
+                    self._entries[(bucket, item["path"])] = (url, expires_at)
+                    self._entries.move_to_end((bucket, item["path"]))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return urls
+
+    def invalidate(self, bucket: str, path: str) -> None:
+        """Forget the cached URL of a file, e.g. after it is deleted"""
+        with self._lock:
+            self._entries.pop((bucket, path), None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache size and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "sign_calls": self._stats["sign_calls"],
+                "errors": self._stats["errors"],
+            }
+
+
+_url_signer: Optional[UrlSigner] = None
+_url_signer_lock = threading.Lock()
+
+
+def get_url_signer() -> UrlSigner:
+    """Get or create the process-wide URL signer"""
+    global _url_signer
+    if _url_signer is None:
+        with _url_signer_lock:
+            if _url_signer is None:
+                _url_signer = UrlSigner(
+                    settings.SIGNED_URL_TTL_SECONDS,
+                    settings.SIGNED_URL_REFRESH_MARGIN_SECONDS,
+                    settings.SIGNED_URL_CACHE_SIZE,
+                )
+    return _url_signer
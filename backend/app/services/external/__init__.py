@@ -7,9 +7,11 @@ Handles integrations with external services like Spotify, Supabase, Storage.
 from .spotify_service import SpotifyService
 from .supabase_service import SupabaseService
 from .storage_service import StorageService
+from .storage_gc_service import StorageGCService
 
 __all__ = [
     "SpotifyService",
     "SupabaseService",
     "StorageService",
+    "StorageGCService",
 ]
\ No newline at end of file
@@ -1,5 +1,12 @@
 from app.utils.supabase_client import get_supabase_client
-from typing import Optional, Dict, Any, List
+from app.services.base.base_client import get_storage_urls, get_supabase_admin_client, iter_table_pages
+from app.services.music.catalog_index import MATCH_MODES, get_catalog_index
+from typing import Optional, Dict, Any, Iterator, List
+
+# Ids per IN query, keeping the PostgREST URL well under common length limits
+DOWNLOAD_URL_BATCH_SIZE = 200
+MAX_DOWNLOAD_URLS = 1000
+
 
 class SpotifyService:
     def __init__(self):
@@ -7,20 +14,58 @@ class SpotifyService:
     
     def search_tracks(self, title: str = None, artist: str = None, album: str = None, genre: str = None) -> List[Dict[Any, Any]]:
         """Search tracks with multiple filters"""
-        query = self.supabase.table('songs').select('*')
-        
-        if title:
-            query = query.ilike('title', f'%{title}%')
-        if artist:
-            query = query.ilike('artist', f'%{artist}%')
-        if album:
-            query = query.ilike('album', f'%{album}%')
-        if genre:
-            query = query.ilike('genre', f'%{genre}%')
-            
-        response = query.execute()
-        return response.data
+        return [track for page in self.iter_tracks(title, artist, album, genre) for track in page]
+
+    def iter_tracks(self, title: str = None, artist: str = None, album: str = None, genre: str = None,
+                    page_size: int = 500) -> Iterator[List[Dict[Any, Any]]]:
+        """Search tracks with multiple filters, yielding keyset-paginated pages of rows"""
+        def apply_filters(query):
+            if title:
+                query = query.ilike('title', f'%{title}%')
+            if artist:
+                query = query.ilike('artist', f'%{artist}%')
+            if album:
+                query = query.ilike('album', f'%{album}%')
+            if genre:
+                query = query.ilike('genre', f'%{genre}%')
+            return query
+
+        return iter_table_pages(self.supabase, 'songs', '*', page_size=page_size, filters=apply_filters)
     
+    def filter_tracks(self, title: str = None, artist: str = None, album: str = None, genre: str = None,
+                      mode: str = "contains", limit: int = 50, cursor: str = None,
+                      facet_limit: int = 20) -> Dict[str, Any]:
+        """
+        Filter tracks through the in-memory catalog index.
+
+        Matching, paging and facet counts are answered from the index; the
+        database is only asked for the rows of the returned page.
+
+        Returns:
+            Dict with tracks, count (all matches), next_cursor and facets
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"mode must be one of: {', '.join(MATCH_MODES)}")
+        if limit < 1 or limit > 200:
+            raise ValueError("Limit must be between 1 and 200")
+
+        result = get_catalog_index().query(
+            {"title": title, "artist": artist, "album": album, "genre": genre},
+            mode=mode, limit=limit, cursor=cursor, facet_limit=facet_limit
+        )
+
+        tracks = []
+        if result["ids"]:
+            rows = self.supabase.table('songs').select('*').in_('id', result["ids"]).execute().data or []
+            by_id = {row['id']: row for row in rows}
+            # Songs deleted since the index was built are simply skipped
+            tracks = [by_id[song_id] for song_id in result["ids"] if song_id in by_id]
+
+        response = {"tracks": tracks, "count": result["count"], "next_cursor": result["next_cursor"]}
+        if facet_limit:
+            response["facets"] = result["facets"]
+        return response
+
     def get_track_by_name(self, track_name: str) -> Optional[Dict[Any, Any]]:
         """Get track from database by name"""
         response = self.supabase.table('songs').select('*').ilike('title', f'%{track_name}%').execute()
@@ -31,5 +76,69 @@ class SpotifyService:
         response = self.supabase.table('songs').select('file_path').eq('id', track_id).execute()
         if response.data:
             file_path = response.data[0]['file_path']
-            return self.supabase.storage.from_('songs').get_public_url(file_path)
-        return None
\ No newline at end of file
+            return get_storage_urls('songs', [file_path]).get(file_path)
+        return None
+
+    def get_track_download_urls(self, track_ids: List[str] = None, playlist_id: str = None,
+                                user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get download URLs for many tracks at once, e.g. for offline playlist sync.
+
+        File paths are resolved with one IN query per batch of ids (or one
+        query for a whole playlist), and all URLs are minted in one bulk call.
+
+        Args:
+            track_ids (List[str], optional): Song ids, returned in this order
+            playlist_id (str, optional): Resolve every song of a playlist, in playlist order
+            user_id (str, optional): Caller, who may also read their own private playlists
+
+        Returns:
+            Dict containing:
+            - urls (List[Dict]): {"song_id", "download_url"} for every resolvable song
+            - missing (List[str]): Requested ids with no song or no file
+            - error (str, optional): "Playlist not found" if the playlist does not
+              exist or is private to another user
+
+        Raises:
+            ValueError: If neither or both inputs are given, or too many ids are requested
+        """
+        if bool(track_ids) == bool(playlist_id):
+            raise ValueError("Provide either song_ids or playlist_id")
+
+        if playlist_id:
+            # RLS would make unknown and inaccessible playlists look empty, so
+            # access is checked here and the songs read with the service role
+            admin_client = get_supabase_admin_client()
+            playlist = admin_client.table('playlists').select('user_id, is_public').eq('id', playlist_id).execute()
+            if not playlist.data or not (
+                playlist.data[0].get('is_public') or (user_id and playlist.data[0].get('user_id') == user_id)
+            ):
+                return {"error": "Playlist not found", "urls": [], "missing": []}
+            response = (
+                admin_client.table('playlist_songs')
+                .select('song_id, songs(file_path)')
+                .eq('playlist_id', playlist_id)
+                .order('position')
+                .execute()
+            )
+            track_ids = [row['song_id'] for row in response.data]
+            file_paths = {row['song_id']: (row.get('songs') or {}).get('file_path') for row in response.data}
+        else:
+            track_ids = list(dict.fromkeys(track_id for track_id in track_ids if track_id))
+            if len(track_ids) > MAX_DOWNLOAD_URLS:
+                raise ValueError(f"At most {MAX_DOWNLOAD_URLS} songs can be requested at once")
+            file_paths = {}
+            for start in range(0, len(track_ids), DOWNLOAD_URL_BATCH_SIZE):
+                batch = track_ids[start:start + DOWNLOAD_URL_BATCH_SIZE]
+                response = self.supabase.table('songs').select('id, file_path').in_('id', batch).execute()
+                file_paths.update({row['id']: row.get('file_path') for row in response.data})
+
+        urls = get_storage_urls('songs', file_paths.values())
+        resolved, missing = [], []
+        for track_id in track_ids:
+            url = urls.get(file_paths.get(track_id))
+            if url:
+                resolved.append({"song_id": track_id, "download_url": url})
+            else:
+                missing.append(track_id)
+        return {"urls": resolved, "missing": missing}
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Storage GC Service Module
+
+Reconciles the songs and covers storage buckets against the database and
+removes objects nothing refers to: audio left behind when a song delete could
+not remove its file, re-uploads stored under a new name, derivatives of
+deleted songs, and so on.
+
+One keyset pass over each referencing table builds the set of referenced
+paths per bucket:
+- songs bucket: every ``songs.file_path`` plus its waveform and seek table
+- covers bucket: ``songs.cover_image_url``, every resized variant in
+  ``songs.cover_images``, ``albums.cover_image_url``, ``artists.image_url``
+  and ``trending_albums.album_cover_url``
+
+Each bucket is then listed recursively with paginated ``list()`` calls and
+diffed against the set as it streams, and unreferenced objects are removed
+in batched ``remove()`` calls. Objects younger than STORAGE_GC_MIN_AGE_HOURS
+are never removed, since an upload is stored before its song row exists.
+
+API Endpoints that use this service:
+- POST /admin/maintenance/storage/gc -> collect_garbage()
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.base.base_client import BaseSupabaseClient
+from app.services.base.url_signer import get_url_signer
+from app.services.external.storage_service import COVERS_BUCKET
+from app.services.media.cover_image_service import cover_path_from_url
+from app.services.media.seek_table_service import seek_table_path
+from app.services.media.waveform_service import waveform_path
+
+logger = logging.getLogger(__name__)
+
+LIST_PAGE_SIZE = 1000
+REMOVE_BATCH_SIZE = 100
+# Unreferenced paths included in the report per bucket
+SAMPLE_SIZE = 20
+# Created by the dashboard when a folder is made; not a real object
+PLACEHOLDER_NAME = ".emptyFolderPlaceholder"
+
+
+class StorageGCService(BaseSupabaseClient):
+    """
+    Service for removing storage objects that are no longer referenced.
+    """
+
+    def _referenced_paths(self) -> Dict[str, Set[str]]:
+        """Collect every referenced object path per bucket in one pass over each table"""
+        songs_paths: Set[str] = set()
+        cover_paths: Set[str] = set()
+
+        def add_cover(url: Optional[str]) -> None:
+            path = cover_path_from_url(url)
+            if path:
+                cover_paths.add(path)
+
+        song_count = 0
+        for page in self._iter_table_pages("songs", "id, file_path, cover_image_url, cover_images", page_size=1000):
+            for song in page:
+                song_count += 1
+                file_path = song.get("file_path")
+                if file_path:
+                    songs_paths.update((file_path, waveform_path(file_path), seek_table_path(file_path)))
+                add_cover(song.get("cover_image_url"))
+                for variants in (song.get("cover_images") or {}).values():
+                    for url in (variants or {}).values():
+                        add_cover(url)
+
+        for table, column in (("albums", "cover_image_url"), ("artists", "image_url"),
+                              ("trending_albums", "album_cover_url")):
+            for page in self._iter_table_pages(table, f"id, {column}", page_size=1000):
+                for row in page:
+                    add_cover(row.get(column))
+
+        if not song_count:
+            # An empty result here is far more likely a broken query than an empty catalog
+            raise RuntimeError("No songs found; refusing to treat every stored object as unreferenced")
+        return {self.bucket_name: songs_paths, COVERS_BUCKET: cover_paths}
+
+    def _iter_objects(self, bucket: str, prefix: str = "") -> Iterator[Tuple[str, Dict]]:
+        """Yield (path, object) for every object in a bucket, descending into folders"""
+        offset = 0
+        while True:
+            entries = self.supabase.storage.from_(bucket).list(
+                prefix, {"limit": LIST_PAGE_SIZE, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}
+            )
+            for entry in entries:
+                name = entry.get("name")
+                if not name or name == PLACEHOLDER_NAME:
+                    continue
+                path = f"{prefix}/{name}" if prefix else name
+                if entry.get("id") is None:
+                    # Folders are listed without an id
+                    yield from self._iter_objects(bucket, path)
+                else:
+                    yield path, entry
+            if len(entries) < LIST_PAGE_SIZE:
+                return
+            offset += LIST_PAGE_SIZE
+
+    def _remove(self, bucket: str, paths: list) -> None:
+        self.supabase.storage.from_(bucket).remove(paths)
+        try:
+            self.supabase.table("storage_objects").delete().eq("bucket", bucket).in_("path", paths).execute()
+        except Exception as e:
+            logger.warning(f"Could not drop {len(paths)} removed objects from the content index: {str(e)}")
+        signer = get_url_signer()
+        for path in paths:
+            signer.invalidate(bucket, path)
+
+    def collect_garbage(self, dry_run: bool = False, min_age_hours: Optional[int] = None,
+                        progress: Optional[Callable] = None) -> Dict[str, any]:
+        """
+        Remove storage objects not referenced by any song, album, artist or trending album.
+
+        POST /admin/maintenance/storage/gc
+
+        Args:
+            dry_run (bool): Report unreferenced objects without removing them
+            min_age_hours (int, optional): Keep objects younger than this
+                (default: STORAGE_GC_MIN_AGE_HOURS)
+            progress (Callable, optional): Called with running counters
+
+        Returns:
+            Dict containing:
+            - dry_run (bool): Whether anything was removed
+            - buckets (dict): Per bucket: scanned, scanned_bytes, referenced,
+              unreferenced, skipped_recent, removed, reclaimed_bytes and sample
+            - reclaimed_bytes (int): Bytes removed (or removable, in a dry run) across buckets
+
+        Raises:
+            RuntimeError: If the referenced set cannot be built safely
+        """
+        if min_age_hours is None:
+            min_age_hours = settings.STORAGE_GC_MIN_AGE_HOURS
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=min_age_hours)
+
+        referenced = self._referenced_paths()
+        logger.info(
+            "Storage GC referenced set: "
+            + ", ".join(f"{bucket}={len(paths)}" for bucket, paths in referenced.items())
+        )
+
+        report = {}
+        for bucket, keep in referenced.items():
+            stats = {"scanned": 0, "scanned_bytes": 0, "referenced": 0, "unreferenced": 0,
+                     "skipped_recent": 0, "removed": 0, "reclaimed_bytes": 0, "sample": []}
+            report[bucket] = stats
+            # Removing while listing would shift the offsets of the pages still to list,
+            # so the whole bucket is listed before anything is removed
+            unreferenced = []
+
+            for path, entry in self._iter_objects(bucket):
+                size = (entry.get("metadata") or {}).get("size") or 0
+                stats["scanned"] += 1
+                stats["scanned_bytes"] += size
+                if progress and stats["scanned"] % LIST_PAGE_SIZE == 0:
+                    progress(bucket=bucket, **{f"{bucket}_{name}": value for name, value in stats.items()
+                                               if name != "sample"})
+                if path in keep:
+                    stats["referenced"] += 1
+                    continue
+
+                created_at = entry.get("created_at")
+                if created_at and datetime.fromisoformat(created_at.replace("Z", "+00:00")) > cutoff:
+                    stats["skipped_recent"] += 1
+                    continue
+
+                stats["unreferenced"] += 1
+                stats["reclaimed_bytes"] += size
+                if len(stats["sample"]) < SAMPLE_SIZE:
+                    stats["sample"].append(path)
+                unreferenced.append(path)
+
+            if not dry_run:
+                for start in range(0, len(unreferenced), REMOVE_BATCH_SIZE):
+                    batch = unreferenced[start:start + REMOVE_BATCH_SIZE]
+                    self._remove(bucket, batch)
+                    stats["removed"] += len(batch)
+                    if progress:
+                        progress(bucket=bucket, **{f"{bucket}_{name}": value for name, value in stats.items()
+                                                   if name != "sample"})
+            if progress:
+                progress(bucket=bucket, **{f"{bucket}_{name}": value for name, value in stats.items()
+                                           if name != "sample"})
+            logger.info(
+                f"Storage GC of {bucket}: {stats['unreferenced']} unreferenced of {stats['scanned']} objects, "
+                f"{stats['reclaimed_bytes']} bytes {'reclaimable' if dry_run else 'reclaimed'}"
+            )
+
+        return {
+            "dry_run": dry_run,
+            "buckets": report,
+            "reclaimed_bytes": sum(stats["reclaimed_bytes"] for stats in report.values())
+        }
@@ -2,44 +2,229 @@
 Storage Service Module
 
 Handles file uploads to Supabase Storage.
+
+Uploads are deduplicated by content: every object written is recorded in the
+``storage_objects`` table under its SHA-256 digest, and an upload whose digest
+is already indexed reuses the stored object instead of writing a new one.
+
+Objects are never overwritten. Other songs may point at an object through
+deduplication, and stream ETags and cached file sizes assume the bytes at a
+path never change, so an upload to an occupied path is stored under
+``{stem}_{hash12}{ext}`` instead.
+
+API Endpoints that use this service:
+- POST /admin/songs/upload -> upload_file(), upload_cover()
+- POST /admin/songs/bulk -> upload_file(), upload_cover() (via AdminService)
+- GET /admin/maintenance/dedup/report -> get_dedup_report()
 """
 
+import base64
+import binascii
+import hashlib
+import logging
 import os
+from typing import Dict, Optional, Tuple
+from storage3.exceptions import StorageApiError
 from app.services.base.base_client import BaseSupabaseClient
 
+logger = logging.getLogger(__name__)
+
+COVERS_BUCKET = "covers"
+
+# Base64 input is decoded in slices of this many characters (multiple of 4)
+HASH_CHUNK_CHARS = 4 * 256 * 1024
+
+
+def sha256_hex(data: bytes, chunk_size: int = 1024 * 1024) -> str:
+    """Hash bytes in fixed-size chunks without copying them"""
+    digest = hashlib.sha256()
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        digest.update(view[start:start + chunk_size])
+    return digest.hexdigest()
+
+
+def _is_conflict(error: Exception) -> bool:
+    """Whether a storage error means an object already exists at the path"""
+    return isinstance(error, StorageApiError) and (str(error.status) == "409" or error.code == "Duplicate")
+
+
+def decode_base64_with_hash(b64_content: str) -> Tuple[bytes, str]:
+    """
+    Decode base64 upload content and hash it in a single streaming pass.
+
+    The payload is decoded slice by slice and each decoded slice is fed to
+    SHA-256 as it is produced, so the file is never walked a second time
+    just to hash it.
+
+    Returns:
+        Tuple of (decoded bytes, SHA-256 hex digest)
+
+    Raises:
+        ValueError: If the content is not valid base64
+    """
+    digest = hashlib.sha256()
+    decoded = bytearray()
+    # Whitespace would break the 4-character alignment of the slices
+    if any(c in b64_content for c in " \r\n\t"):
+        b64_content = "".join(b64_content.split())
+
+    try:
+        for start in range(0, len(b64_content), HASH_CHUNK_CHARS):
+            chunk = base64.b64decode(b64_content[start:start + HASH_CHUNK_CHARS])
+            digest.update(chunk)
+            decoded += chunk
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 content: {str(e)}")
+
+    return bytes(decoded), digest.hexdigest()
+
 
 class StorageService(BaseSupabaseClient):
     """Service for file storage operations"""
 
-    def upload_file(self, file_content: bytes, file_path: str, content_type: str) -> str:
-        """Upload file to Supabase Storage songs bucket"""
+    def _find_object_by_hash(self, bucket: str, content_hash: str) -> Optional[Dict]:
+        """Look up an indexed object with the given content hash"""
+        response = (
+            self.supabase.table("storage_objects")
+            .select("path, size_bytes")
+            .eq("bucket", bucket)
+            .eq("content_hash", content_hash)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    def _find_object_by_path(self, bucket: str, path: str) -> Optional[Dict]:
+        """Look up the indexed object stored at a path"""
+        response = (
+            self.supabase.table("storage_objects")
+            .select("content_hash")
+            .eq("bucket", bucket)
+            .eq("path", path)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    def _store_deduplicated(self, bucket: str, file_content: bytes, file_path: str,
+                            content_type: str, content_hash: Optional[str] = None) -> Dict[str, any]:
+        """
+        Write an object unless byte-identical content is already stored.
+
+        Args:
+            bucket (str): Target storage bucket
+            file_content (bytes): Object bytes
+            file_path (str): Desired path for a new object
+            content_type (str): MIME type of the object
+            content_hash (str, optional): Precomputed SHA-256 hex digest
+
+        Returns:
+            Dict containing:
+            - path (str): Path of the stored object (existing path if deduplicated)
+            - content_hash (str): SHA-256 hex digest
+            - deduplicated (bool): True if the storage write was skipped
+        """
+        content_hash = content_hash or sha256_hex(file_content)
+
         try:
-            self.supabase.storage.from_(self.bucket_name).upload(
-                path=file_path,
-                file=file_content,
-                file_options={"content-type": content_type, "upsert": "true"}
-            )
+            existing = self._find_object_by_hash(bucket, content_hash)
+            if existing:
+                logger.info(f"Reusing {bucket}/{existing['path']} for upload of {file_path} (sha256 {content_hash[:12]})")
+                try:
+                    self.supabase.rpc(
+                        "record_storage_dedup_hit",
+                        {"p_bucket": bucket, "p_content_hash": content_hash}
+                    ).execute()
+                except Exception as e:
+                    logger.warning(f"Could not record dedup hit for {content_hash[:12]}: {str(e)}")
+                return {"path": existing["path"], "content_hash": content_hash, "deduplicated": True}
+
+            # Never overwrite an indexed object with different bytes: other songs
+            # may have been pointed at it by earlier deduplicated uploads
+            occupied = self._find_object_by_path(bucket, file_path)
+            if occupied and occupied["content_hash"] != content_hash:
+                stem, ext = os.path.splitext(file_path)
+                file_path = f"{stem}_{content_hash[:12]}{ext}"
+        except Exception as e:
+            # Index lookups are an optimization; fall back to a plain (non-overwriting) write
+            logger.warning(f"Content index unavailable, uploading without dedup: {str(e)}")
+
+        file_path = self._upload_new(bucket, file_content, file_path, content_type, content_hash)
+
+        try:
+            self.supabase.table("storage_objects").upsert({
+                "bucket": bucket,
+                "path": file_path,
+                "content_hash": content_hash,
+                "size_bytes": len(file_content),
+                "content_type": content_type
+            }, on_conflict="bucket,path").execute()
+        except Exception as e:
+            # A concurrent upload of the same bytes may have indexed it first
+            logger.warning(f"Could not index {bucket}/{file_path}: {str(e)}")
+
+        return {"path": file_path, "content_hash": content_hash, "deduplicated": False}
+
+    def _upload_new(self, bucket: str, file_content: bytes, file_path: str, content_type: str,
+                    content_hash: str) -> str:
+        """
+        Write an object without overwriting anything already stored.
+
+        An occupied path (for example an object stored before the content
+        index existed) moves the upload to the content-addressed name. If that
+        name is occupied too, it already holds these bytes and is reused.
+
+        Returns:
+            str: Path the content is stored at
+        """
+        file_options = {"content-type": content_type, "upsert": "false"}
+        try:
+            self.supabase.storage.from_(bucket).upload(path=file_path, file=file_content, file_options=file_options)
             return file_path
+        except Exception as e:
+            if not _is_conflict(e):
+                raise
+
+        stem, ext = os.path.splitext(file_path)
+        hashed_path = f"{stem}_{content_hash[:12]}{ext}"
+        if hashed_path == file_path:
+            return file_path
+        logger.info(f"{bucket}/{file_path} already exists; storing upload as {hashed_path}")
+        try:
+            self.supabase.storage.from_(bucket).upload(path=hashed_path, file=file_content, file_options=file_options)
+        except Exception as e:
+            if not _is_conflict(e):
+                raise
+        return hashed_path
+
+    def upload_file(self, file_content: bytes, file_path: str, content_type: str,
+                    content_hash: Optional[str] = None) -> str:
+        """
+        Upload file to Supabase Storage songs bucket.
+
+        Returns the storage path of the file, which is the path of an existing
+        byte-identical object when the upload was deduplicated.
+        """
+        try:
+            result = self._store_deduplicated(self.bucket_name, file_content, file_path, content_type, content_hash)
+            return result["path"]
         except Exception as e:
             print(f"Upload error: {str(e)}")
             raise e
 
-    def upload_cover(self, file_content: bytes, file_path: str, content_type: str) -> str:
+    def upload_cover(self, file_content: bytes, file_path: str, content_type: str,
+                     content_hash: Optional[str] = None) -> str:
         """Upload cover image to Supabase Storage covers bucket"""
         try:
-            covers_bucket = "covers"
-            print(f"Uploading cover to: {covers_bucket}/{file_path}")
+            print(f"Uploading cover to: {COVERS_BUCKET}/{file_path}")
             print(f"Content type: {content_type}")
             print(f"File size: {len(file_content)} bytes")
 
-            result = self.supabase.storage.from_(covers_bucket).upload(
-                path=file_path,
-                file=file_content,
-                file_options={"content-type": content_type, "upsert": "true"}
-            )
+            result = self._store_deduplicated(COVERS_BUCKET, file_content, file_path, content_type, content_hash)
             print(f"Upload result: {result}")
 
-            public_url = f"{self.supabase_url}/storage/v1/object/public/{covers_bucket}/{file_path}"
+            public_url = f"{self.supabase_url}/storage/v1/object/public/{COVERS_BUCKET}/{result['path']}"
             print(f"Cover URL: {public_url}")
             return public_url
         except Exception as e:
@@ -47,3 +232,41 @@ class StorageService(BaseSupabaseClient):
             import traceback
             traceback.print_exc()
             raise e
+
+    def get_dedup_report(self) -> Dict[str, any]:
+        """
+        Summarize storage saved by content-hash deduplication.
+
+        GET /admin/maintenance/dedup/report
+
+        Returns:
+            Dict containing:
+            - objects (int): Indexed objects
+            - stored_bytes (int): Bytes actually stored for indexed objects
+            - dedup_hits (int): Uploads that reused an existing object
+            - bytes_saved (int): Bytes that would have been written without dedup
+            - buckets (dict): The same figures per bucket
+            - error (str, optional): Error message if operation failed
+        """
+        try:
+            buckets: Dict[str, Dict[str, int]] = {}
+            for page in self._iter_table_pages("storage_objects", "id, bucket, size_bytes, dedup_hits"):
+                for row in page:
+                    stats = buckets.setdefault(
+                        row["bucket"],
+                        {"objects": 0, "stored_bytes": 0, "dedup_hits": 0, "bytes_saved": 0}
+                    )
+                    size = row.get("size_bytes") or 0
+                    hits = row.get("dedup_hits") or 0
+                    stats["objects"] += 1
+                    stats["stored_bytes"] += size
+                    stats["dedup_hits"] += hits
+                    stats["bytes_saved"] += size * hits
+
+            totals = {key: sum(stats[key] for stats in buckets.values())
+                      for key in ("objects", "stored_bytes", "dedup_hits", "bytes_saved")}
+            return {**totals, "buckets": buckets}
+        except Exception as e:
+            error_msg = f"Failed to build dedup report: {str(e)}"
+            logger.error(error_msg)
+            return {"error": error_msg}
@@ -0,0 +1,17 @@
+"""
+Media Services Module
+
+Handles processing of stored audio and image files.
+"""
+
+from .waveform_service import WaveformService
+from .cover_image_service import CoverImageService
+from .stream_service import AudioStreamService
+from .seek_table_service import SeekTableService
+
+__all__ = [
+    "WaveformService",
+    "CoverImageService",
+    "AudioStreamService",
+    "SeekTableService",
+]
@@ -0,0 +1,301 @@
+"""
+Audio Disk Cache Module
+
+Size-bounded local disk cache for audio files streamed through the API.
+
+Files are kept in LRU order and evicted once the cache exceeds its byte
+budget. A miss starts a background fill that downloads the file from storage
+into a ``.part`` file. Any number of concurrent readers can tail that file and
+stream bytes to their clients as soon as they arrive, so the first listener
+does not wait for the whole download. A completed fill is renamed into place
+and later requests are served straight from disk.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import BinaryIO, Dict, Iterator, Optional
+
+import requests
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How long a reader waits for new bytes from a stalled fill before giving up
+FILL_STALL_TIMEOUT_SECONDS = 30
+
+
+class CacheFill:
+    """State of one in-progress download into the cache"""
+
+    def __init__(self, key: str, part_path: str, final_path: str):
+        self.key = key
+        self.part_path = part_path
+        self.final_path = final_path
+        self.size: Optional[int] = None
+        self.content_type: Optional[str] = None
+        self.written = 0
+        self.done = False
+        self.error: Optional[str] = None
+        self.ready = threading.Event()  # Set once response headers are known
+        self.finished = threading.Event()
+        self.condition = threading.Condition()
+
+    def open(self) -> Optional[BinaryIO]:
+        """
+        Open the file being filled for reading.
+
+        Returns None when the finished file was already evicted (or the fill
+        failed) before it could be opened. An open handle stays readable
+        whatever happens to the file afterwards.
+        """
+        try:
+            return open(self.part_path, "rb")
+        except FileNotFoundError:
+            pass
+        try:
+            # The fill finished and was renamed before this reader opened it
+            return open(self.final_path, "rb")
+        except FileNotFoundError:
+            return None
+
+    def read(self, handle: BinaryIO, start: int, end: Optional[int], chunk_size: int) -> Iterator[bytes]:
+        """
+        Yield bytes [start, end] of the file as the fill writes them, closing ``handle`` when done.
+
+        ``handle`` comes from open(); ``end`` is inclusive and None reads
+        until the download completes.
+        """
+        with handle:
+            position = start
+            handle.seek(position)
+            while end is None or position <= end:
+                with self.condition:
+                    while self.written <= position and not self.done and not self.error:
+                        if not self.condition.wait(timeout=FILL_STALL_TIMEOUT_SECONDS):
+                            raise IOError(f"Audio fill for {self.key} stalled")
+                    if self.error:
+                        raise IOError(self.error)
+                    available = self.written
+                if available <= position:
+                    return  # Download complete and fully read
+
+                limit = available - 1 if end is None else min(end, available - 1)
+                while position <= limit:
+                    chunk = handle.read(min(chunk_size, limit - position + 1))
+                    if not chunk:
+                        break
+                    position += len(chunk)
+                    yield chunk
+
+
+class AudioDiskCache:
+    """
+    LRU disk cache of audio files keyed by storage path.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, chunk_size: int = 64 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        self._fills: Dict[str, CacheFill] = {}
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._plays = Counter()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_existing()
+
+    def _key(self, file_path: str, version: Optional[str] = None) -> str:
+        # The version (content hash) keeps a changed object from being served from an old copy
+        name = f"{file_path}#{version}" if version else file_path
+        return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+    def _final_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.audio")
+
+    def _load_existing(self) -> None:
+        """Index files left by a previous process, least recently used first"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".part"):
+                # Leftover partial download; recent ones may belong to another worker
+                if time.time() - os.stat(path).st_mtime > 3600:
+                    os.remove(path)
+            elif name.endswith(".audio"):
+                stat = os.stat(path)
+                found.append((stat.st_atime, name[: -len(".audio")], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        with self._lock:
+            self._evict_locked()
+        logger.info(f"Audio cache ready: {len(self._entries)} files, {self._total_bytes} bytes in {self.cache_dir}")
+
+    def _evict_locked(self) -> None:
+        """Drop least recently used files until the cache fits its budget"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._stats["evictions"] += 1
+            try:
+                # Readers that already opened the file keep their handle
+                os.remove(self._final_path(key))
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, file_path: str, version: Optional[str] = None) -> Optional[Dict[str, any]]:
+        """
+        Return the cached file for a storage path, marking it recently used.
+
+        ``version`` identifies the stored content (see AudioStreamService.get_song_file).
+
+        Returns:
+            Dict with ``path`` and ``size`` of the local file, or None on a miss
+        """
+        key = self._key(file_path, version)
+        with self._lock:
+            size = self._entries.get(key)
+            if size is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return {"path": self._final_path(key), "size": size}
+
+    def start_fill(self, file_path: str, source_url: str, headers: Dict[str, str],
+                   version: Optional[str] = None) -> CacheFill:
+        """
+        Start (or join) a background download of a file into the cache.
+
+        Returns once the upstream response headers are known, so callers can
+        read ``size`` and ``content_type`` and start streaming immediately.
+        """
+        key = self._key(file_path, version)
+        with self._lock:
+            fill = self._fills.get(key)
+            if fill is None:
+                fill = CacheFill(key, os.path.join(self.cache_dir, f"{key}.{time.time_ns()}.part"), self._final_path(key))
+                self._fills[key] = fill
+                threading.Thread(
+                    target=self._run_fill, args=(fill, source_url, headers), name=f"audio-fill-{key[:8]}", daemon=True
+                ).start()
+
+        fill.ready.wait(timeout=FILL_STALL_TIMEOUT_SECONDS)
+        if not fill.ready.is_set():
+            raise IOError("Timed out waiting for storage")
+        if fill.error:
+            raise IOError(fill.error)
+        return fill
+
+    def _run_fill(self, fill: CacheFill, source_url: str, headers: Dict[str, str]) -> None:
+        """Download a file into its .part file, notifying readers as bytes land"""
+        try:
+            with requests.get(source_url, headers=headers, stream=True, timeout=(5, FILL_STALL_TIMEOUT_SECONDS)) as response:
+                response.raise_for_status()
+                length = response.headers.get("Content-Length")
+                fill.size = int(length) if length else None
+                fill.content_type = response.headers.get("Content-Type") or "audio/mpeg"
+
+                with open(fill.part_path, "wb") as part:
+                    fill.ready.set()
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if not chunk:
+                            continue
+                        part.write(chunk)
+                        part.flush()
+                        with fill.condition:
+                            fill.written += len(chunk)
+                            fill.condition.notify_all()
+
+            if fill.size is not None and fill.written != fill.size:
+                raise IOError(f"Incomplete download: {fill.written} of {fill.size} bytes")
+            fill.size = fill.written
+            self._commit(fill)
+        except Exception as e:
+            logger.warning(f"Audio cache fill failed for {fill.key}: {str(e)}")
+            self._stats["fill_errors"] += 1
+            with fill.condition:
+                fill.error = str(e)
+                fill.condition.notify_all()
+            fill.ready.set()
+            try:
+                os.remove(fill.part_path)
+            except FileNotFoundError:
+                pass
+        finally:
+            with fill.condition:
+                fill.done = True
+                fill.condition.notify_all()
+            with self._lock:
+                self._fills.pop(fill.key, None)
+            fill.finished.set()
+
+    def _commit(self, fill: CacheFill) -> None:
+        """Move a completed download into the cache and enforce the byte budget"""
+        if fill.size > self.max_bytes:
+            # Too large to ever fit; it was only streamed through
+            os.remove(fill.part_path)
+            return
+
+        os.replace(fill.part_path, fill.final_path)
+        with self._lock:
+            previous = self._entries.pop(fill.key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._entries[fill.key] = fill.size
+            self._total_bytes += fill.size
+            self._stats["fills"] += 1
+            self._evict_locked()
+
+    def record_stream(self, song_id: str, bytes_sent: int, from_start: bool) -> None:
+        """Count the bytes a stream request will serve, and a play if it starts at byte 0"""
+        with self._lock:
+            if from_start:
+                self._plays[song_id] += 1
+            self._stats["bytes_served"] += bytes_sent
+
+    def get_stats(self, top: int = 20) -> Dict[str, any]:
+        """Cache usage counters and the most streamed songs"""
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "active_fills": len(self._fills),
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "fills": self._stats["fills"],
+                "fill_errors": self._stats["fill_errors"],
+                "evictions": self._stats["evictions"],
+                "bytes_served": self._stats["bytes_served"],
+                "top_streamed": [
+                    {"song_id": song_id, "streams": count} for song_id, count in self._plays.most_common(top)
+                ],
+            }
+
+
+_audio_cache: Optional[AudioDiskCache] = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioDiskCache:
+    """Get or create the process-wide audio disk cache"""
+    global _audio_cache
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioDiskCache(
+                    settings.STREAM_CACHE_DIR,
+                    settings.STREAM_CACHE_MAX_BYTES,
+                    settings.STREAM_CHUNK_SIZE,
+                )
+    return _audio_cache
@@ -0,0 +1,182 @@
+"""
+Cover Image Service Module
+
+Generates resized cover thumbnails so list views do not have to download the
+full-size original for every row.
+
+Each cover is rendered at a few fixed widths in both JPEG and WebP. Resizing
+runs in a shared worker pool, and the derivatives are stored in the covers
+bucket under ``derived/``. The resulting URL map is stored on the song as
+``cover_images``:
+
+    {"64": {"jpeg": url, "webp": url}, "300": {...}, "640": {...}}
+
+API Endpoints that use this service:
+- POST /admin/songs/upload -> generate_cover_images()
+- POST /admin/maintenance/covers/backfill -> backfill_cover_images()
+"""
+
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services.base.base_client import BaseSupabaseClient
+from app.services.external.storage_service import COVERS_BUCKET
+
+logger = logging.getLogger(__name__)
+
+COVER_SIZES = (64, 300, 640)
+DERIVED_FOLDER = "derived"
+
+_FORMATS = {
+    "jpeg": {"ext": "jpg", "content_type": "image/jpeg", "options": {"quality": 85, "optimize": True, "progressive": True}},
+    "webp": {"ext": "webp", "content_type": "image/webp", "options": {"quality": 80, "method": 4}},
+}
+
+# Shared across requests so concurrent uploads cannot spawn unbounded threads
+_image_pool = ThreadPoolExecutor(max_workers=settings.COVER_IMAGE_WORKERS, thread_name_prefix="cover-images")
+
+
+def cover_path_from_url(cover_url: str) -> Optional[str]:
+    """Extract the covers bucket path from a public cover URL"""
+    if not cover_url:
+        return None
+    marker = f"/object/public/{COVERS_BUCKET}/"
+    if marker not in cover_url:
+        return None
+    return cover_url.split(marker, 1)[1].split("?", 1)[0]
+
+
+def cover_variant_path(cover_path: str, size: int, fmt: str) -> str:
+    """Storage path of one resized variant of a cover"""
+    stem = os.path.splitext(cover_path)[0]
+    return f"{DERIVED_FOLDER}/{stem}_{size}.{_FORMATS[fmt]['ext']}"
+
+
+def render_size(image: Image.Image, size: int) -> Dict[str, bytes]:
+    """Resize an image to fit within size x size and encode it in every format"""
+    resized = image.copy()
+    # thumbnail() keeps the aspect ratio and never upscales
+    resized.thumbnail((size, size), Image.LANCZOS)
+
+    encoded = {}
+    for fmt, spec in _FORMATS.items():
+        buffer = io.BytesIO()
+        resized.save(buffer, format=fmt.upper(), **spec["options"])
+        encoded[fmt] = buffer.getvalue()
+    return encoded
+
+
+class CoverImageService(BaseSupabaseClient):
+    """
+    Service for generating and storing resized cover image variants.
+    """
+
+    def _public_cover_url(self, path: str) -> str:
+        return f"{self.supabase_url}/storage/v1/object/public/{COVERS_BUCKET}/{path}"
+
+    def _render_and_store(self, image: Image.Image, cover_path: str, size: int) -> Dict[str, str]:
+        """Render one size and upload its variants; runs in the worker pool"""
+        urls = {}
+        for fmt, content in render_size(image, size).items():
+            path = cover_variant_path(cover_path, size, fmt)
+            self.supabase.storage.from_(COVERS_BUCKET).upload(
+                path=path,
+                file=content,
+                file_options={
+                    "content-type": _FORMATS[fmt]["content_type"],
+                    "upsert": "true",
+                    "cache-control": "31536000"
+                }
+            )
+            urls[fmt] = self._public_cover_url(path)
+        return urls
+
+    def generate_cover_images(self, image_bytes: bytes, cover_path: str) -> Dict[str, Dict[str, str]]:
+        """
+        Generate every thumbnail size of a cover and store them.
+
+        Sizes are rendered in parallel on the shared image worker pool.
+
+        Args:
+            image_bytes (bytes): Original cover image content
+            cover_path (str): Path of the original in the covers bucket
+
+        Returns:
+            Dict mapping size (as a string) to {"jpeg": url, "webp": url}
+
+        Raises:
+            ValueError: If the image cannot be decoded
+        """
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            image.load()
+        except Exception as e:
+            raise ValueError(f"Could not decode cover image: {str(e)}")
+
+        # JPEG has no alpha channel or palette
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        futures = {
+            size: _image_pool.submit(self._render_and_store, image, cover_path, size)
+            for size in COVER_SIZES
+        }
+        cover_images = {str(size): future.result() for size, future in futures.items()}
+        logger.info(f"Generated {len(cover_images)} cover sizes for {cover_path}")
+        return cover_images
+
+    def backfill_cover_images(self, overwrite: bool = False, progress: Optional[Callable] = None) -> Dict[str, any]:
+        """
+        Generate cover thumbnails for existing songs.
+
+        POST /admin/maintenance/covers/backfill
+
+        Songs are scanned with keyset pagination. Songs that share a cover
+        file (for example after deduplicated uploads) are processed once.
+
+        Args:
+            overwrite (bool): Regenerate songs that already have cover_images
+            progress (Callable, optional): Called with running counters
+
+        Returns:
+            Dict containing:
+            - scanned (int): Songs examined
+            - updated (int): Songs whose cover_images were written
+            - skipped (int): Songs without a stored cover or already processed
+            - failed (int): Songs whose cover could not be processed
+        """
+        report = {"scanned": 0, "updated": 0, "skipped": 0, "failed": 0}
+        generated: Dict[str, Dict] = {}
+
+        for page in self._iter_table_pages("songs", "id, cover_image_url, cover_images"):
+            for song in page:
+                report["scanned"] += 1
+                cover_path = cover_path_from_url(song.get("cover_image_url"))
+                if not cover_path or (song.get("cover_images") and not overwrite):
+                    report["skipped"] += 1
+                    continue
+
+                try:
+                    if cover_path not in generated:
+                        original = self.supabase.storage.from_(COVERS_BUCKET).download(cover_path)
+                        generated[cover_path] = self.generate_cover_images(original, cover_path)
+
+                    self.supabase.table("songs").update(
+                        {"cover_images": generated[cover_path]}
+                    ).eq("id", song["id"]).execute()
+                    report["updated"] += 1
+                except Exception as e:
+                    logger.warning(f"Could not generate cover images for song {song['id']}: {str(e)}")
+                    report["failed"] += 1
+
+            if progress:
+                progress(**report)
+
+        logger.info(f"Cover image backfill finished: {report}")
+        return report
@@ -0,0 +1,515 @@
+"""
+Seek Table Service Module
+
+Builds a time-to-byte seek table for MP3 tracks so players can jump to a
+timestamp with a single precise Range request instead of guessing from the
+average bitrate, which is inaccurate for VBR files.
+
+At ingest time every MPEG audio frame header is walked to record the size of
+each frame. Every frame of a stream holds the same number of samples, so the
+frame containing any timestamp is known exactly, and its byte offset is the
+sum of the sizes before it. If the frame walk cannot cover the file (for
+example a damaged stream), the Xing/Info or VBRI table of contents in the
+first frame is used instead, which is coarser but still VBR-aware.
+
+Blob layout (little-endian):
+- header: magic ``b"MSEK"`` (4s), version (B), kind (B), sample rate (I),
+  samples per frame (H), offset of the first audio frame (I), count (I)
+- kind 0 (frames): ``count`` frame sizes as unsigned 16-bit integers
+- kind 1 (toc): total audio bytes (I) followed by 101 byte offsets (I) at
+  0%, 1%, ..., 100% of the duration; ``count`` is the total frame count
+
+API Endpoints that use this service:
+- GET /songs/{song_id}/seek -> get_seek_position()
+- POST /admin/maintenance/seek-tables/backfill -> backfill_seek_tables()
+"""
+
+import logging
+import struct
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.base.base_client import BaseSupabaseClient
+
+logger = logging.getLogger(__name__)
+
+SEEK_TABLE_MAGIC = b"MSEK"
+SEEK_TABLE_VERSION = 1
+SEEK_TABLE_FOLDER = "seektables"
+
+KIND_FRAMES = 0
+KIND_TOC = 1
+
+# A frame walk that stops before this share of the file falls back to the TOC
+MIN_FRAME_COVERAGE = 0.9
+# How far past a damaged frame to look for the next valid one
+RESYNC_WINDOW_BYTES = 64 * 1024
+# Decoded seek tables kept in memory
+SEEK_TABLE_CACHE_SIZE = 256
+
+_HEADER = struct.Struct("<4sBBIHII")
+
+# Bitrates in kbps indexed by [version family][layer][bitrate index]
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Sample rates indexed by version bits (0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+
+def seek_table_path(file_path: str) -> str:
+    """Storage path of the seek table blob for an audio file"""
+    return f"{SEEK_TABLE_FOLDER}/{file_path}.seek"
+
+
+def parse_frame_header(data: bytes, offset: int) -> Optional[Dict[str, int]]:
+    """
+    Parse the MPEG audio frame header at an offset.
+
+    Returns:
+        Dict with version, layer, sample_rate, samples_per_frame, frame_size
+        and channel_mode, or None if the bytes are not a valid header
+    """
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        # Reserved values, or free-format bitrate which has no computable size
+        return None
+
+    family = 1 if version == 3 else 2
+    bitrate = _BITRATES[(family, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_size = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if layer == 2 or family == 1 else 576
+        frame_size = (samples_per_frame // 8) * bitrate // sample_rate + padding
+
+    return {
+        "version": version,
+        "layer": layer,
+        "sample_rate": sample_rate,
+        "samples_per_frame": samples_per_frame,
+        "frame_size": frame_size,
+        "channel_mode": b3 >> 6,
+    }
+
+
+def _same_stream(header: Dict[str, int], reference: Dict[str, int]) -> bool:
+    return (
+        header["version"] == reference["version"]
+        and header["layer"] == reference["layer"]
+        and header["sample_rate"] == reference["sample_rate"]
+    )
+
+
+def _id3v2_size(data: bytes) -> int:
+    """Size of a leading ID3v2 tag, including its header and footer"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    # Tag size is stored as a 28-bit synchsafe integer
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _find_frame(data: bytes, start: int, reference: Optional[Dict[str, int]] = None,
+                limit: Optional[int] = None) -> Optional[Tuple[int, Dict[str, int]]]:
+    """
+    Find the next frame header at or after start.
+
+    A candidate only counts if the frame right after it is also a valid
+    header of the same stream, which rules out stray 0xFF bytes in tags or
+    audio data.
+    """
+    end = len(data) - 4 if limit is None else min(len(data) - 4, start + limit)
+    position = data.find(b"\xff", start)
+    while 0 <= position <= end:
+        header = parse_frame_header(data, position)
+        if header and (reference is None or _same_stream(header, reference)):
+            following = parse_frame_header(data, position + header["frame_size"])
+            at_end = position + header["frame_size"] >= len(data)
+            if at_end or (following and _same_stream(following, header)):
+                return position, header
+        position = data.find(b"\xff", position + 1)
+    return None
+
+
+def _side_info_size(header: Dict[str, int]) -> int:
+    mono = header["channel_mode"] == 3
+    if header["version"] == 3:
+        return 17 if mono else 32
+    return 9 if mono else 17
+
+
+def parse_vbr_header(data: bytes, offset: int, header: Dict[str, int]) -> Optional[Dict[str, any]]:
+    """
+    Read a Xing/Info or VBRI header from the first frame, if present.
+
+    Returns:
+        Dict with ``frames``, ``bytes`` and ``toc`` (101 fractions of the
+        audio bytes at 0%..100% of the duration, or None), or None if the
+        frame carries no VBR header
+    """
+    xing = offset + 4 + _side_info_size(header)
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", data, xing + 4)[0]
+        cursor = xing + 8
+        frames = total_bytes = toc = None
+        if flags & 0x1:
+            frames = struct.unpack_from(">I", data, cursor)[0]
+            cursor += 4
+        if flags & 0x2:
+            total_bytes = struct.unpack_from(">I", data, cursor)[0]
+            cursor += 4
+        if flags & 0x4:
+            # 100 entries of 1/256ths of the file; append 100% for interpolation
+            toc = [value / 256.0 for value in data[cursor:cursor + 100]] + [1.0]
+        return {"frames": frames, "bytes": total_bytes, "toc": toc}
+
+    vbri = offset + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        total_bytes, frames, entries, scale, entry_size, frames_per_entry = struct.unpack_from(
+            ">IIHHHH", data, vbri + 10
+        )
+        cursor = vbri + 26
+        positions = [0]
+        for _ in range(entries):
+            delta = int.from_bytes(data[cursor:cursor + entry_size], "big") * scale
+            positions.append(positions[-1] + delta)
+            cursor += entry_size
+
+        # VBRI entries are every frames_per_entry frames; resample to percent steps
+        toc = None
+        if frames and total_bytes and entries:
+            entry_frames = np.arange(len(positions)) * frames_per_entry
+            percent_frames = np.linspace(0, frames, 101)
+            toc = list(np.interp(percent_frames, entry_frames, positions) / total_bytes)
+            toc[-1] = 1.0
+        return {"frames": frames, "bytes": total_bytes, "toc": toc}
+
+    return None
+
+
+def build_seek_table(data: bytes) -> bytes:
+    """
+    Build the seek table blob for an MP3 file.
+
+    Args:
+        data (bytes): Raw MP3 file content
+
+    Returns:
+        bytes: Encoded seek table blob
+
+    Raises:
+        ValueError: If no MPEG audio stream is found
+    """
+    found = _find_frame(data, _id3v2_size(data))
+    if not found:
+        raise ValueError("No MPEG audio frames found")
+    first_offset, first = found
+
+    # A Xing/Info/VBRI frame is metadata, not audio; the stream starts after it
+    vbr = parse_vbr_header(data, first_offset, first)
+    audio_start = first_offset + first["frame_size"] if vbr else first_offset
+
+    sizes: List[int] = []
+    position = audio_start
+    while position < len(data):
+        header = parse_frame_header(data, position)
+        if header is None or not _same_stream(header, first):
+            resync = _find_frame(data, position + 1, first, RESYNC_WINDOW_BYTES)
+            if resync is None:
+                break
+            # Fold the junk into the previous frame so offsets stay exact
+            if sizes:
+                sizes[-1] += resync[0] - position
+            elif resync[0] != position:
+                audio_start = resync[0]
+            position = resync[0]
+            continue
+        sizes.append(header["frame_size"])
+        position += header["frame_size"]
+
+    audio_end = audio_start + sum(sizes)
+    stream_bytes = len(data) - audio_start
+    covered = (audio_end - audio_start) / stream_bytes if stream_bytes else 0
+
+    if covered >= MIN_FRAME_COVERAGE and max(sizes, default=0) <= 0xFFFF:
+        body = np.asarray(sizes, dtype="<u2").tobytes()
+        return _HEADER.pack(
+            SEEK_TABLE_MAGIC, SEEK_TABLE_VERSION, KIND_FRAMES, first["sample_rate"],
+            first["samples_per_frame"], audio_start, len(sizes)
+        ) + body
+
+    if vbr and vbr.get("toc") and vbr.get("frames"):
+        total_bytes = vbr.get("bytes") or stream_bytes
+        offsets = np.round(np.asarray(vbr["toc"]) * total_bytes).astype("<u4")
+        logger.info(f"Frame walk covered {covered:.0%} of the file; using the VBR table of contents")
+        return _HEADER.pack(
+            SEEK_TABLE_MAGIC, SEEK_TABLE_VERSION, KIND_TOC, first["sample_rate"],
+            first["samples_per_frame"], audio_start, vbr["frames"]
+        ) + struct.pack("<I", total_bytes) + offsets.tobytes()
+
+    raise ValueError(f"MPEG frame walk only covered {covered:.0%} of the file and no VBR table is present")
+
+
+def decode_seek_table(blob: bytes) -> Dict[str, any]:
+    """
+    Unpack a seek table blob.
+
+    Returns:
+        Dict with kind, sample_rate, samples_per_frame, audio_start, frames,
+        and either ``offsets`` (byte offset of every frame plus the end of the
+        stream) or ``toc`` (byte offsets at each percent of the duration)
+    """
+    magic, version, kind, sample_rate, samples_per_frame, audio_start, count = _HEADER.unpack_from(blob, 0)
+    if magic != SEEK_TABLE_MAGIC or version != SEEK_TABLE_VERSION:
+        raise ValueError("Unsupported seek table blob")
+
+    table = {
+        "kind": kind,
+        "sample_rate": sample_rate,
+        "samples_per_frame": samples_per_frame,
+        "audio_start": audio_start,
+        "frames": count,
+    }
+    if kind == KIND_FRAMES:
+        sizes = np.frombuffer(blob, dtype="<u2", count=count, offset=_HEADER.size)
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        table["offsets"] = offsets + audio_start
+    elif kind == KIND_TOC:
+        table["toc"] = np.frombuffer(blob, dtype="<u4", count=101, offset=_HEADER.size + 4).astype(np.int64) + audio_start
+    else:
+        raise ValueError(f"Unknown seek table kind {kind}")
+    return table
+
+
+def seek_position(table: Dict[str, any], seconds: float) -> Dict[str, any]:
+    """
+    Resolve a timestamp to the byte offset where playback should start.
+
+    Args:
+        table (dict): Decoded seek table
+        seconds (float): Requested position in seconds
+
+    Returns:
+        Dict containing:
+        - time (float): Start time of the returned offset, at or before ``seconds``
+        - byte_offset (int): File offset to request from
+        - exact (bool): True if the offset is an exact frame boundary
+        - duration (float): Track duration in seconds
+    """
+    frame_seconds = table["samples_per_frame"] / table["sample_rate"]
+    duration = table["frames"] * frame_seconds
+    seconds = min(max(seconds, 0.0), duration)
+
+    if table["kind"] == KIND_FRAMES:
+        frame = min(int(seconds / frame_seconds), max(table["frames"] - 1, 0))
+        return {
+            "time": round(frame * frame_seconds, 6),
+            "byte_offset": int(table["offsets"][frame]),
+            "exact": True,
+            "duration": round(duration, 6),
+        }
+
+    percent = seconds / duration * 100 if duration else 0.0
+    offset = int(np.interp(percent, np.arange(101), table["toc"]))
+    return {"time": round(seconds, 6), "byte_offset": offset, "exact": False, "duration": round(duration, 6)}
+
+
+class SeekTableService(BaseSupabaseClient):
+    """
+    Service for generating and querying MP3 seek tables.
+
+    Tables are stored in the songs bucket under ``seektables/``. Decoded
+    tables are kept in a small in-process LRU so repeated seeks within a
+    track only cost the song lookup.
+    """
+
+    _cache: "OrderedDict[str, Dict]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def generate_for_track(self, audio_bytes: bytes, file_path: str) -> Dict[str, any]:
+        """
+        Build a track's seek table and store it next to the audio file.
+
+        Runs as an ingest stage after uploads, so failures are logged and
+        reported rather than raised.
+
+        Args:
+            audio_bytes (bytes): Raw MP3 file content
+            file_path (str): Storage path of the audio file in the songs bucket
+
+        Returns:
+            Dict containing:
+            - success (bool): True if the seek table was stored
+            - path (str): Storage path of the seek table blob
+            - size (int): Blob size in bytes
+            - error (str, optional): Error message if operation failed
+        """
+        if not file_path:
+            return {"success": False, "error": "file_path is required"}
+
+        try:
+            blob = build_seek_table(audio_bytes)
+            path = seek_table_path(file_path)
+            self.supabase.storage.from_(self.bucket_name).upload(
+                path=path,
+                file=blob,
+                file_options={"content-type": "application/octet-stream", "upsert": "true"}
+            )
+            with self._cache_lock:
+                self._cache.pop(file_path, None)
+            logger.info(f"Stored seek table for {file_path} ({len(blob)} bytes)")
+            return {"success": True, "path": path, "size": len(blob)}
+        except Exception as e:
+            error_msg = f"Failed to build seek table: {str(e)}"
+            logger.warning(f"Error building seek table for {file_path}: {error_msg}")
+            return {"success": False, "error": error_msg}
+
+    def _load_table(self, file_path: str) -> Dict[str, any]:
+        """Fetch and decode a seek table, using the in-process LRU"""
+        with self._cache_lock:
+            table = self._cache.get(file_path)
+            if table is not None:
+                self._cache.move_to_end(file_path)
+                return table
+
+        table = decode_seek_table(self.supabase.storage.from_(self.bucket_name).download(seek_table_path(file_path)))
+        with self._cache_lock:
+            self._cache[file_path] = table
+            while len(self._cache) > SEEK_TABLE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return table
+
+    def get_seek_position(self, song_id: str, seconds: float) -> Dict[str, any]:
+        """
+        Get the byte offset to request for playback from a timestamp.
+
+        GET /songs/{song_id}/seek?t=
+
+        Args:
+            song_id (str): ID of the song
+            seconds (float): Requested position in seconds
+
+        Returns:
+            Dict containing:
+            - time (float): Start time of the returned offset
+            - byte_offset (int): File offset to request from
+            - range (str): Range header value for the stream request
+            - exact (bool): True if the offset is an exact frame boundary
+            - duration (float): Track duration in seconds
+            - error (str, optional): Error message if no seek table is available
+
+        Raises:
+            ValueError: If song_id is empty or seconds is negative
+        """
+        if not song_id or not song_id.strip():
+            raise ValueError("Song ID cannot be empty")
+        if seconds < 0:
+            raise ValueError("Seek time cannot be negative")
+
+        try:
+            song_response = (
+                self.supabase.table("songs")
+                .select("file_path")
+                .eq("id", song_id.strip())
+                .execute()
+            )
+            if not song_response.data or not song_response.data[0].get("file_path"):
+                return {"error": "Song not found"}
+
+            position = seek_position(self._load_table(song_response.data[0]["file_path"]), seconds)
+            position["range"] = f"bytes={position['byte_offset']}-"
+            return position
+        except Exception as e:
+            logger.warning(f"Seek table not available for song {song_id.strip()}: {str(e)}")
+            return {"error": "Seek table not available"}
+
+    def _existing_seek_tables(self) -> set:
+        """List the audio paths that already have a stored seek table"""
+        existing = set()
+        offset = 0
+        page_size = 1000
+        while True:
+            objects = self.supabase.storage.from_(self.bucket_name).list(
+                SEEK_TABLE_FOLDER, {"limit": page_size, "offset": offset}
+            )
+            for obj in objects:
+                name = obj.get("name", "")
+                if name.endswith(".seek"):
+                    existing.add(name[: -len(".seek")])
+            if len(objects) < page_size:
+                return existing
+            offset += page_size
+
+    def backfill_seek_tables(self, overwrite: bool = False, progress: Optional[Callable] = None) -> Dict[str, any]:
+        """
+        Build seek tables for every MP3 in the catalog that lacks one.
+
+        POST /admin/maintenance/seek-tables/backfill
+
+        Args:
+            overwrite (bool): Rebuild seek tables that already exist
+            progress (Callable, optional): Called with running counters
+
+        Returns:
+            Dict containing:
+            - scanned (int): Songs examined
+            - generated (int): Seek tables written
+            - skipped (int): Songs that are not MP3 or already had a table
+            - failed (int): Songs whose audio could not be processed
+        """
+        report = {"scanned": 0, "generated": 0, "skipped": 0, "failed": 0}
+        existing = set() if overwrite else self._existing_seek_tables()
+        logger.info(f"Starting seek table backfill ({len(existing)} tables already stored)")
+
+        for page in self._iter_table_pages("songs", "id, file_path"):
+            for song in page:
+                report["scanned"] += 1
+                file_path = song.get("file_path")
+                if not file_path or not file_path.lower().endswith(".mp3") or file_path in existing:
+                    report["skipped"] += 1
+                    continue
+
+                try:
+                    audio_bytes = self.supabase.storage.from_(self.bucket_name).download(file_path)
+                except Exception as e:
+                    logger.warning(f"Could not download {file_path} for seek table backfill: {str(e)}")
+                    report["failed"] += 1
+                    continue
+
+                result = self.generate_for_track(audio_bytes, file_path)
+                report["generated" if result.get("success") else "failed"] += 1
+
+            if progress:
+                progress(**report)
+
+        logger.info(f"Seek table backfill finished: {report}")
+        return report
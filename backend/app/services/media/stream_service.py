@@ -0,0 +1,148 @@
+"""
+Audio Stream Service Module
+
+Resolves songs to their audio files and serves them through the local audio
+disk cache instead of sending clients to the public storage URL.
+
+API Endpoints that use this service:
+- GET /songs/{song_id}/stream -> get_song_file(), open_stream()
+"""
+
+import hashlib
+import logging
+import mimetypes
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from app.services.base.base_client import BaseSupabaseClient
+from app.services.media.audio_cache import get_audio_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AudioStreamService(BaseSupabaseClient):
+    """
+    Service for streaming song audio from the local disk cache.
+
+    Cache misses are fetched from storage with the service's own credentials,
+    so streaming also works for private buckets.
+    """
+
+    def get_song_file(self, song_id: str) -> Dict[str, any]:
+        """
+        Look up the audio file of a song.
+
+        Args:
+            song_id (str): ID of the song
+
+        Returns:
+            Dict containing:
+            - file_path (str): Storage path of the audio file
+            - media_type (str): MIME type guessed from the file name
+            - etag (str): Strong validator for the stored file: its content
+              hash from the storage object index, or a hash of the path for
+              objects stored before the index existed (paths are never
+              rewritten, see StorageService)
+            - error (str, optional): Error message if the song has no file
+
+        Raises:
+            ValueError: If song_id is empty
+        """
+        if not song_id or not song_id.strip():
+            raise ValueError("Song ID cannot be empty")
+
+        try:
+            response = (
+                self.supabase.table("songs")
+                .select("file_path")
+                .eq("id", song_id.strip())
+                .execute()
+            )
+            if not response.data or not response.data[0].get("file_path"):
+                return {"error": "Song not found or no file available"}
+
+            file_path = response.data[0]["file_path"]
+            return {
+                "file_path": file_path,
+                "media_type": mimetypes.guess_type(file_path)[0] or "audio/mpeg",
+                "etag": self._get_content_etag(file_path) or hashlib.sha1(file_path.encode("utf-8")).hexdigest()[:16],
+            }
+        except Exception as e:
+            error_msg = f"Failed to resolve song file: {str(e)}"
+            logger.error(f"Error resolving file for song {song_id.strip()}: {error_msg}")
+            return {"error": error_msg}
+
+    def _get_content_etag(self, file_path: str) -> Optional[str]:
+        """Content hash of an indexed audio file, or None if it is not indexed"""
+        try:
+            response = (
+                self.supabase.table("storage_objects")
+                .select("content_hash")
+                .eq("bucket", self.bucket_name)
+                .eq("path", file_path)
+                .limit(1)
+                .execute()
+            )
+        except Exception as e:
+            logger.warning(f"Could not look up content hash of {file_path}: {str(e)}")
+            return None
+        return response.data[0]["content_hash"][:32] if response.data else None
+
+    def open_stream(self, file_path: str, version: Optional[str] = None) -> Dict[str, any]:
+        """
+        Open a song's audio from the disk cache, starting a fill on a miss.
+
+        Args:
+            file_path (str): Storage path of the audio file
+            version (str, optional): Content version (the song file's etag),
+                so a changed object is never served from an old cached copy
+
+        Returns:
+            Dict containing either:
+            - cached (dict): ``path`` and ``size`` of the local cached file, and
+              ``handle``, the file already opened so a concurrent eviction
+              cannot remove it before it is served; the caller must close it
+            or:
+            - fill (CacheFill): In-progress download that can be read while it fills
+            - handle: The fill's file, already opened for CacheFill.read(); the
+              caller must close it if it does not read
+
+        Raises:
+            IOError: If storage cannot be reached
+        """
+        cache = get_audio_cache()
+        cached = self._open_cached(file_path, version)
+        if cached:
+            return {"cached": cached}
+
+        source_url = f"{self.supabase_url}/storage/v1/object/{self.bucket_name}/{quote(file_path)}"
+        headers = {"Authorization": f"Bearer {self.supabase_key}", "apikey": self.supabase_key}
+        # A joined fill may finish and its file be evicted before it is opened; then fetch again
+        for _ in range(2):
+            fill = cache.start_fill(file_path, source_url, headers, version)
+
+            if fill.size is None:
+                # Without a length we cannot answer ranges while filling; wait for the file
+                fill.finished.wait()
+                cached = self._open_cached(file_path, version)
+                if not cached:
+                    raise IOError(fill.error or "Audio file could not be cached")
+                return {"cached": cached}
+
+            handle = fill.open()
+            if handle is not None:
+                return {"fill": fill, "handle": handle}
+            if fill.error:
+                raise IOError(fill.error)
+        raise IOError("Audio file was evicted before it could be streamed")
+
+    def _open_cached(self, file_path: str, version: Optional[str] = None) -> Optional[Dict[str, any]]:
+        """Look up and open a cached file, treating one evicted since the lookup as a miss"""
+        cached = get_audio_cache().lookup(file_path, version)
+        if not cached:
+            return None
+        try:
+            return {**cached, "handle": open(cached["path"], "rb")}
+        except FileNotFoundError:
+            logger.debug(f"Cached audio evicted before it was opened: {file_path}")
+            return None
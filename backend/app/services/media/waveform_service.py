@@ -0,0 +1,295 @@
+"""
+Waveform Service Module
+
+Precomputes waveform peak data for uploaded tracks so the player can draw a
+waveform without downloading the whole audio file.
+
+Each track is decoded once at ingest time, and min/max peaks are computed at a
+few zoom levels. The peaks are stored as a compact binary blob next to the
+audio file in storage.
+
+Blob layout (little-endian):
+- header: magic ``b"WAVP"`` (4s), version (B), bits per peak (B),
+  sample rate (I), number of levels (H)
+- per level: samples per peak (I), peak count (I), followed by
+  ``peak count`` interleaved (min, max) pairs as signed 8-bit integers
+
+API Endpoints that use this service:
+- GET /songs/{song_id}/waveform -> get_waveform()
+- POST /admin/maintenance/waveforms/backfill -> backfill_waveforms()
+"""
+
+import logging
+import struct
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from app.services.base.base_client import BaseSupabaseClient
+
+try:
+    import miniaudio
+except ImportError:  # pragma: no cover - optional decoder
+    miniaudio = None
+
+logger = logging.getLogger(__name__)
+
+WAVEFORM_MAGIC = b"WAVP"
+WAVEFORM_VERSION = 1
+WAVEFORM_FOLDER = "waveforms"
+
+# Tracks are decoded to mono at this rate; plenty for drawing peaks
+DECODE_SAMPLE_RATE = 22050
+
+# Zoom levels as samples per peak, finest first. Each level is a whole multiple
+# of the previous one so coarser levels are reduced from finer ones.
+ZOOM_LEVELS = (256, 1024, 4096)
+
+_HEADER = struct.Struct("<4sBBIH")
+_LEVEL_HEADER = struct.Struct("<II")
+
+
+def waveform_path(file_path: str) -> str:
+    """Storage path of the waveform blob for an audio file"""
+    return f"{WAVEFORM_FOLDER}/{file_path}.peaks"
+
+
+def compute_peaks(samples: np.ndarray, zoom_levels=ZOOM_LEVELS) -> Dict[int, np.ndarray]:
+    """
+    Compute min/max peaks for each zoom level.
+
+    Args:
+        samples (np.ndarray): Mono int16 PCM samples
+        zoom_levels (tuple): Samples per peak for each level, finest first
+
+    Returns:
+        Dict mapping samples-per-peak to an (N, 2) int16 array of (min, max) pairs
+    """
+    finest = zoom_levels[0]
+    # Pad the tail so the last partial block still produces a peak
+    remainder = len(samples) % finest
+    if remainder or len(samples) == 0:
+        samples = np.concatenate([samples, np.zeros(finest - remainder, dtype=samples.dtype)])
+
+    blocks = samples.reshape(-1, finest)
+    mins = blocks.min(axis=1)
+    maxs = blocks.max(axis=1)
+
+    levels = {finest: np.stack([mins, maxs], axis=1)}
+    previous = finest
+    for level in zoom_levels[1:]:
+        factor = level // previous
+        remainder = len(mins) % factor
+        if remainder:
+            mins = np.concatenate([mins, np.zeros(factor - remainder, dtype=mins.dtype)])
+            maxs = np.concatenate([maxs, np.zeros(factor - remainder, dtype=maxs.dtype)])
+        mins = mins.reshape(-1, factor).min(axis=1)
+        maxs = maxs.reshape(-1, factor).max(axis=1)
+        levels[level] = np.stack([mins, maxs], axis=1)
+        previous = level
+
+    return levels
+
+
+def encode_peaks(levels: Dict[int, np.ndarray], sample_rate: int = DECODE_SAMPLE_RATE) -> bytes:
+    """Pack peak levels into the compact 8-bit binary blob format"""
+    parts = [_HEADER.pack(WAVEFORM_MAGIC, WAVEFORM_VERSION, 8, sample_rate, len(levels))]
+    for samples_per_peak, peaks in sorted(levels.items()):
+        # Quantize int16 peaks down to int8 by keeping the high byte
+        quantized = (peaks.astype(np.int16) >> 8).astype(np.int8)
+        parts.append(_LEVEL_HEADER.pack(samples_per_peak, len(quantized)))
+        parts.append(quantized.tobytes())
+    return b"".join(parts)
+
+
+def decode_peaks(blob: bytes) -> Dict[str, any]:
+    """Unpack a waveform blob into its sample rate and per-level (min, max) arrays"""
+    magic, version, bits, sample_rate, level_count = _HEADER.unpack_from(blob, 0)
+    if magic != WAVEFORM_MAGIC or version != WAVEFORM_VERSION or bits != 8:
+        raise ValueError("Unsupported waveform blob")
+
+    offset = _HEADER.size
+    levels = {}
+    for _ in range(level_count):
+        samples_per_peak, count = _LEVEL_HEADER.unpack_from(blob, offset)
+        offset += _LEVEL_HEADER.size
+        levels[samples_per_peak] = np.frombuffer(blob, dtype=np.int8, count=count * 2, offset=offset).reshape(-1, 2)
+        offset += count * 2
+    return {"sample_rate": sample_rate, "levels": levels}
+
+
+class WaveformService(BaseSupabaseClient):
+    """
+    Service for generating and serving precomputed waveform peaks.
+
+    Peaks are computed with NumPy from mono PCM decoded once per track, and
+    stored in the songs bucket under ``waveforms/``.
+    """
+
+    def build_waveform(self, audio_bytes: bytes) -> bytes:
+        """
+        Decode an audio file and build its waveform blob.
+
+        Args:
+            audio_bytes (bytes): Raw audio file content (MP3, FLAC, WAV or Vorbis)
+
+        Returns:
+            bytes: Encoded waveform blob
+
+        Raises:
+            RuntimeError: If no audio decoder is installed
+            ValueError: If the audio cannot be decoded
+        """
+        if miniaudio is None:
+            raise RuntimeError("miniaudio is required to decode audio for waveforms")
+
+        try:
+            decoded = miniaudio.decode(
+                audio_bytes,
+                output_format=miniaudio.SampleFormat.SIGNED16,
+                nchannels=1,
+                sample_rate=DECODE_SAMPLE_RATE,
+            )
+        except miniaudio.DecodeError as e:
+            raise ValueError(f"Could not decode audio: {str(e)}")
+
+        samples = np.frombuffer(decoded.samples, dtype=np.int16)
+        return encode_peaks(compute_peaks(samples))
+
+    def generate_for_track(self, audio_bytes: bytes, file_path: str) -> Dict[str, any]:
+        """
+        Compute a track's waveform and store it next to the audio file.
+
+        Runs as an ingest stage after uploads, so failures are logged and
+        reported rather than raised.
+
+        Args:
+            audio_bytes (bytes): Raw audio file content
+            file_path (str): Storage path of the audio file in the songs bucket
+
+        Returns:
+            Dict containing:
+            - success (bool): True if the waveform was stored
+            - path (str): Storage path of the waveform blob
+            - size (int): Blob size in bytes
+            - error (str, optional): Error message if operation failed
+        """
+        if not file_path:
+            return {"success": False, "error": "file_path is required"}
+
+        try:
+            blob = self.build_waveform(audio_bytes)
+            path = waveform_path(file_path)
+            self.supabase.storage.from_(self.bucket_name).upload(
+                path=path,
+                file=blob,
+                file_options={"content-type": "application/octet-stream", "upsert": "true"}
+            )
+            logger.info(f"Stored waveform for {file_path} ({len(blob)} bytes)")
+            return {"success": True, "path": path, "size": len(blob)}
+        except Exception as e:
+            error_msg = f"Failed to generate waveform: {str(e)}"
+            logger.warning(f"Error generating waveform for {file_path}: {error_msg}")
+            return {"success": False, "error": error_msg}
+
+    def get_waveform(self, song_id: str) -> Dict[str, any]:
+        """
+        Fetch the stored waveform blob for a song.
+
+        GET /songs/{song_id}/waveform
+
+        Args:
+            song_id (str): ID of the song
+
+        Returns:
+            Dict containing:
+            - data (bytes): Waveform blob
+            - error (str, optional): Error message if the song or waveform is missing
+
+        Raises:
+            ValueError: If song_id is empty
+        """
+        if not song_id or not song_id.strip():
+            raise ValueError("Song ID cannot be empty")
+
+        try:
+            song_response = (
+                self.supabase.table("songs")
+                .select("file_path")
+                .eq("id", song_id.strip())
+                .execute()
+            )
+            if not song_response.data or not song_response.data[0].get("file_path"):
+                return {"error": "Song not found"}
+
+            file_path = song_response.data[0]["file_path"]
+            data = self.supabase.storage.from_(self.bucket_name).download(waveform_path(file_path))
+            return {"data": data}
+        except Exception as e:
+            logger.warning(f"Waveform not available for song {song_id.strip()}: {str(e)}")
+            return {"error": "Waveform not available"}
+
+    def _existing_waveforms(self) -> set:
+        """List the audio paths that already have a stored waveform"""
+        existing = set()
+        offset = 0
+        page_size = 1000
+        while True:
+            objects = self.supabase.storage.from_(self.bucket_name).list(
+                WAVEFORM_FOLDER, {"limit": page_size, "offset": offset}
+            )
+            for obj in objects:
+                name = obj.get("name", "")
+                if name.endswith(".peaks"):
+                    existing.add(name[: -len(".peaks")])
+            if len(objects) < page_size:
+                return existing
+            offset += page_size
+
+    def backfill_waveforms(self, overwrite: bool = False, progress: Optional[Callable] = None) -> Dict[str, any]:
+        """
+        Generate waveforms for every song in the catalog that lacks one.
+
+        POST /admin/maintenance/waveforms/backfill
+
+        Songs are scanned with keyset pagination, and each missing track is
+        downloaded and decoded once.
+
+        Args:
+            overwrite (bool): Regenerate waveforms that already exist
+            progress (Callable, optional): Called with running counters
+
+        Returns:
+            Dict containing:
+            - scanned (int): Songs examined
+            - generated (int): Waveforms written
+            - skipped (int): Songs that already had a waveform
+            - failed (int): Songs whose audio could not be processed
+        """
+        report = {"scanned": 0, "generated": 0, "skipped": 0, "failed": 0}
+        existing = set() if overwrite else self._existing_waveforms()
+        logger.info(f"Starting waveform backfill ({len(existing)} waveforms already stored)")
+
+        for page in self._iter_table_pages("songs", "id, file_path"):
+            for song in page:
+                report["scanned"] += 1
+                file_path = song.get("file_path")
+                if not file_path or file_path in existing:
+                    report["skipped"] += 1
+                    continue
+
+                try:
+                    audio_bytes = self.supabase.storage.from_(self.bucket_name).download(file_path)
+                except Exception as e:
+                    logger.warning(f"Could not download {file_path} for waveform backfill: {str(e)}")
+                    report["failed"] += 1
+                    continue
+
+                result = self.generate_for_track(audio_bytes, file_path)
+                report["generated" if result.get("success") else "failed"] += 1
+
+            if progress:
+                progress(**report)
+
+        logger.info(f"Waveform backfill finished: {report}")
+        return report
@@ -9,6 +9,10 @@ from .artist_service import ArtistService
 from .playlist_service import PlaylistService
 from .like_service import LikeService
 from .trending_service import TrendingService
+from .queue_service import QueueService
+from .similar_songs import SimilarSongsService
+from .artist_embeddings import ArtistEmbeddingService
+from .home_feed_service import HomeFeedService
 
 __all__ = [
     "SongService",
@@ -16,4 +20,8 @@ __all__ = [
     "PlaylistService",
     "LikeService",
     "TrendingService",
+    "QueueService",
+    "SimilarSongsService",
+    "ArtistEmbeddingService",
+    "HomeFeedService",
 ]
\ No newline at end of file
@@ -0,0 +1,401 @@
+"""
+Artist Embeddings Module
+
+"Fans also like" for artist pages: artists are related when the same users
+listen to them, measured by cosine similarity of dense artist vectors.
+
+Building
+    Each like and each song in a user's playlists counts one interaction
+    between the user and the song's artist. The user x artist count matrix
+    is weighted with log(1 + count), each user row is scaled to unit length
+    so heavy users do not dominate, and a truncated SVD (SciPy ``svds``)
+    with ARTIST_EMBEDDINGS_DIMENSIONS factors gives every artist a dense
+    vector (right singular vectors scaled by the singular values). Vectors
+    are normalized, so cosine similarity is a dot product.
+
+    A build writes ``ids.npy`` (artist ids, sorted) and ``vectors.npy``
+    (float32, one row per artist) into a new directory and then points
+    ``CURRENT`` at it. Builds are scheduled every
+    ARTIST_EMBEDDINGS_BUILD_SECONDS and can be started from the admin API.
+
+    Builds are serialized with a file lock inside ARTIST_EMBEDDINGS_DIR, which
+    only coordinates processes that see the same directory. On one host that
+    is every worker; across hosts or pods the directory must be a shared
+    volume (declared with ARTIST_EMBEDDINGS_DIR_SHARED), otherwise each host
+    builds and serves its own copy.
+
+Serving
+    Readers memory-map the current arrays and reopen them when ``CURRENT``
+    changes, so a rebuild is picked up without a restart. Related artists are
+    found by brute force: the query vectors are multiplied against the
+    matrix in blocks of SEARCH_BLOCK_ROWS artists and a running top-k is
+    kept with ``np.argpartition``, which answers a query over 100k artists in
+    a few milliseconds (see tests/benchmarks/bench_artist_related.py).
+
+API Endpoints that use this module:
+- GET /artists/{artist_id}/related -> ArtistEmbeddingService.get_related_artists()
+- POST /admin/maintenance/artist-embeddings/rebuild -> ArtistEmbeddingService.rebuild()
+"""
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core import scheduler
+from app.core.config import settings
+from app.services.base.base_client import BaseSupabaseClient
+
+logger = logging.getLogger(__name__)
+
+READ_PAGE_SIZE = 1000
+# Artists scored per matrix product; bounds the temporary score block
+SEARCH_BLOCK_ROWS = 16384
+# Previous embedding directories kept for readers that still have them open
+KEEP_BUILDS = 2
+
+
+def top_k_cosine(vectors: np.ndarray, queries: np.ndarray, k: int,
+                 exclude: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Brute-force top-k by dot product of unit vectors, for a batch of queries.
+
+    Args:
+        vectors (np.ndarray): (artists, dimensions) float32 unit vectors, may be memory-mapped
+        queries (np.ndarray): (queries, dimensions) float32 unit vectors
+        k (int): Results per query
+        exclude (Sequence[int], optional): Row to leave out for each query
+            (the query artist itself), or -1
+
+    Returns:
+        (rows, scores): (queries, k) int64 and float32 arrays, best first;
+        fewer than k columns if there are fewer artists
+    """
+    count = vectors.shape[0]
+    k = min(k, count - (1 if exclude is not None else 0))
+    if k <= 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, count, SEARCH_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS])
+        scores = queries @ block.T
+        if exclude is not None:
+            for query, row in enumerate(exclude):
+                if start <= row < start + len(block):
+                    scores[query, row - start] = -np.inf
+
+        # Keep at most k candidates per block, then merge with the running best
+        if scores.shape[1] > k:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        rows = np.concatenate([best_rows, candidates + start], axis=1)
+        merged = np.concatenate([best_scores, np.take_along_axis(scores, candidates, axis=1)], axis=1)
+        if merged.shape[1] > k:
+            keep = np.argpartition(-merged, k - 1, axis=1)[:, :k]
+            rows = np.take_along_axis(rows, keep, axis=1)
+            merged = np.take_along_axis(merged, keep, axis=1)
+        best_rows, best_scores = rows, merged
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+def write_embeddings(root: str, artist_ids: List[str], vectors: np.ndarray, meta: Dict) -> str:
+    """Write an embedding build into a new directory under ``root`` and make it current"""
+    ids = np.array(artist_ids, dtype="S36")
+    order = np.argsort(ids, kind="stable")
+
+    name = f"embeddings-{int(time.time() * 1000)}"
+    directory = os.path.join(root, name)
+    os.makedirs(directory)
+    np.save(os.path.join(directory, "ids.npy"), ids[order])
+    np.save(os.path.join(directory, "vectors.npy"), np.ascontiguousarray(vectors[order], dtype=np.float32))
+    with open(os.path.join(directory, "meta.json"), "w") as meta_file:
+        json.dump(meta, meta_file)
+
+    pointer = os.path.join(root, "CURRENT")
+    with open(f"{pointer}.tmp", "w") as pointer_file:
+        pointer_file.write(name)
+    os.replace(f"{pointer}.tmp", pointer)
+
+    builds = sorted(entry for entry in os.listdir(root) if entry.startswith("embeddings-"))
+    for entry in builds[:-KEEP_BUILDS]:
+        shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return name
+
+
+class ArtistEmbeddingIndex:
+    """
+    Read-only view of the current artist vectors, memory-mapped and hot-swapped.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._pointer = os.path.join(root, "CURRENT")
+        self._pointer_mtime = None
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self.meta: Dict = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Reopen the arrays if a new build was published; returns (ids, vectors) or None"""
+        try:
+            mtime = os.stat(self._pointer).st_mtime_ns
+        except FileNotFoundError:
+            return self._arrays
+        if mtime != self._pointer_mtime:
+            with self._lock:
+                if mtime != self._pointer_mtime:
+                    with open(self._pointer) as pointer:
+                        directory = os.path.join(self.root, pointer.read().strip())
+                    ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode="r")
+                    vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+                    with open(os.path.join(directory, "meta.json")) as meta:
+                        self.meta = json.load(meta)
+                    self._arrays = (ids, vectors)
+                    self._pointer_mtime = mtime
+        return self._arrays
+
+    def related(self, artist_ids: List[str], limit: int) -> Optional[Dict[str, List[Tuple[str, float]]]]:
+        """
+        Most related artists for each of ``artist_ids``, best first.
+
+        Returns:
+            Artist id to list of (artist_id, score); artists without a vector
+            map to an empty list. None if no embeddings have been built yet.
+        """
+        arrays = self.refresh()
+        if arrays is None:
+            return None
+        ids, vectors = arrays
+        result = {artist_id: [] for artist_id in artist_ids}
+        if not len(ids):
+            return result
+
+        keys = np.array([artist_id.encode("ascii", "ignore") for artist_id in artist_ids], dtype="S36")
+        positions = np.minimum(np.searchsorted(ids, keys), len(ids) - 1)
+        known = ids[positions] == keys
+        if not known.any():
+            return result
+
+        rows = positions[known]
+        found, scores = top_k_cosine(vectors, np.asarray(vectors[rows]), limit, exclude=rows)
+        for artist_id, neighbours, neighbour_scores in zip(np.array(artist_ids)[known], found, scores):
+            result[str(artist_id)] = [
+                (ids[row].decode("ascii"), float(score))
+                for row, score in zip(neighbours, neighbour_scores)
+                if score > 0
+            ]
+        return result
+
+
+class ArtistEmbeddingService(BaseSupabaseClient):
+    """
+    Service for building artist embeddings and finding related artists.
+    """
+
+    def __init__(self, use_service_role: bool = False, root: Optional[str] = None):
+        super().__init__(use_service_role=use_service_role)
+        self.root = root or settings.ARTIST_EMBEDDINGS_DIR
+        os.makedirs(self.root, exist_ok=True)
+
+    def get_related_artists(self, artist_id: str, limit: int = 10) -> Dict[str, any]:
+        """
+        Get the artists whose listeners overlap most with an artist's.
+
+        GET /artists/{artist_id}/related
+
+        Args:
+            artist_id (str): Artist to find related artists for
+            limit (int): Maximum artists to return (1 to 50)
+
+        Returns:
+            Dict containing:
+            - artist_id (str): The requested artist
+            - artists (List[Dict]): id, name, image_url and score, best first
+            - built_at (float): Unix time of the embeddings served, None if never built
+            - error (str, optional): Error message if operation failed
+
+        Raises:
+            ValueError: If limit is out of range
+        """
+        if limit < 1 or limit > 50:
+            raise ValueError("Limit must be between 1 and 50")
+
+        try:
+            index = get_artist_embedding_index()
+            related = (index.related([artist_id], limit) or {}).get(artist_id)
+            if not related:
+                return {"artist_id": artist_id, "artists": [], "built_at": index.meta.get("built_at")}
+
+            scores = dict(related)
+            rows = self.supabase.table("artists").select("id, name, image_url").in_("id", list(scores)).execute().data
+            rows.sort(key=lambda artist: -scores[artist["id"]])
+            return {
+                "artist_id": artist_id,
+                "artists": [{**artist, "score": round(scores[artist["id"]], 4)} for artist in rows],
+                "built_at": index.meta.get("built_at")
+            }
+
+        except Exception as e:
+            error_msg = f"Failed to get related artists: {str(e)}"
+            logger.error(f"Error in get_related_artists: {error_msg}")
+            return {"error": error_msg}
+
+    @contextmanager
+    def _build_lock(self) -> Iterator[None]:
+        """Exclusive lock across processes sharing the embeddings directory"""
+        with open(os.path.join(self.root, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_column_map(self, table: str, column: str) -> Dict[str, str]:
+        """id -> ``column`` for every row of a table"""
+        return {
+            row["id"]: row[column]
+            for page in self._iter_table_pages(table, f"id, {column}", page_size=READ_PAGE_SIZE)
+            for row in page
+            if row.get(column)
+        }
+
+    def _read_interactions(self, progress: Optional[Callable]) -> Tuple[List[str], List[str]]:
+        """(user_id, artist_id) of every like and every song in a playlist"""
+        song_artists = self._read_column_map("songs", "artist_id")
+        playlist_owners = self._read_column_map("playlists", "user_id")
+        users, artists = [], []
+
+        sources = (
+            ("liked_songs", "user_id", lambda row: row["user_id"]),
+            ("playlist_songs", "playlist_id", lambda row: playlist_owners.get(row["playlist_id"])),
+        )
+        for table, column, owner in sources:
+            for page in self._iter_table_pages(table, f"id, {column}, song_id", page_size=READ_PAGE_SIZE):
+                for row in page:
+                    user_id = owner(row)
+                    artist_id = song_artists.get(row["song_id"])
+                    if user_id and artist_id:
+                        users.append(user_id)
+                        artists.append(artist_id)
+                if progress:
+                    progress(stage="reading", interactions=len(users))
+        return users, artists
+
+    def rebuild(self, max_age_seconds: Optional[float] = None, progress: Optional[Callable] = None) -> Dict[str, any]:
+        """
+        Recompute artist embeddings from likes and playlists and publish them.
+
+        POST /admin/maintenance/artist-embeddings/rebuild
+
+        Args:
+            max_age_seconds (float, optional): Skip the build if the current one
+                is newer than this (another worker just built it)
+            progress (Callable, optional): Called with running counters
+
+        Returns:
+            Dict containing:
+            - users (int): Users with at least one interaction
+            - artists (int): Artists given a vector
+            - interactions (int): Likes and playlist entries read
+            - dimensions (int): Vector length
+            - build (str, optional): Directory now served
+            - skipped (str, optional): Why nothing was published (then only
+              built_at is returned if the current build is recent)
+            - elapsed_seconds (float): Duration of the build
+
+        Raises:
+            RuntimeError: If SciPy is not installed
+        """
+        try:
+            from scipy import sparse
+            from scipy.sparse.linalg import svds
+        except ImportError:
+            raise RuntimeError("Building artist embeddings requires the scipy package")
+
+        started = time.time()
+        with self._build_lock():
+            index = get_artist_embedding_index()
+            index.refresh()
+            built_at = index.meta.get("built_at")
+            if max_age_seconds and built_at and started - built_at < max_age_seconds:
+                return {"skipped": "Current embeddings are recent", "built_at": built_at}
+
+            users, artists = self._read_interactions(progress)
+            user_ids, user_rows = np.unique(np.array(users, dtype="S36"), return_inverse=True)
+            artist_ids, artist_columns = np.unique(np.array(artists, dtype="S36"), return_inverse=True)
+            result = {"users": len(user_ids), "artists": len(artist_ids), "interactions": len(users)}
+
+            dimensions = min(settings.ARTIST_EMBEDDINGS_DIMENSIONS, len(user_ids) - 1, len(artist_ids) - 1)
+            if dimensions < 1:
+                result.update(dimensions=0, skipped="Not enough users and artists to factorize",
+                              elapsed_seconds=round(time.time() - started, 2))
+                return result
+
+            # Duplicate (user, artist) entries are summed into counts
+            matrix = sparse.csr_matrix(
+                (np.ones(len(users), dtype=np.float32), (user_rows, artist_columns)),
+                shape=(len(user_ids), len(artist_ids))
+            )
+            matrix.data = np.log1p(matrix.data)
+            row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            matrix = sparse.diags(1 / np.maximum(row_norms, 1e-12)) @ matrix
+
+            if progress:
+                progress(stage="factorizing", users=len(user_ids), artists=len(artist_ids))
+            _, singular_values, right = svds(matrix.astype(np.float64), k=dimensions)
+            vectors = (right.T * singular_values).astype(np.float32)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+            build = write_embeddings(
+                self.root, [artist_id.decode("ascii") for artist_id in artist_ids], vectors,
+                {"built_at": time.time(), "artists": len(artist_ids), "dimensions": dimensions}
+            )
+
+        result.update(dimensions=dimensions, build=build, elapsed_seconds=round(time.time() - started, 2))
+        logger.info(
+            f"Built {dimensions}-dimensional embeddings for {result['artists']} artists from "
+            f"{result['interactions']} interactions in {result['elapsed_seconds']}s"
+        )
+        return result
+
+
+_index: Optional[ArtistEmbeddingIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_artist_embedding_index() -> ArtistEmbeddingIndex:
+    """Get the process-wide reader of the artist embeddings directory"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ArtistEmbeddingIndex(settings.ARTIST_EMBEDDINGS_DIR)
+    return _index
+
+
+def start_artist_embedding_builds() -> None:
+    """Schedule periodic artist embedding rebuilds"""
+    if not settings.ARTIST_EMBEDDINGS_BUILD_SECONDS:
+        return
+    if not settings.ARTIST_EMBEDDINGS_DIR_SHARED:
+        logger.warning(
+            f"ARTIST_EMBEDDINGS_DIR ({settings.ARTIST_EMBEDDINGS_DIR}) is not declared shared: builds are "
+            "only coordinated between workers on this host, and every other host or pod will run its own "
+            "build. Mount a shared volume and set ARTIST_EMBEDDINGS_DIR_SHARED=true when running more than one."
+        )
+    service = ArtistEmbeddingService(use_service_role=True)
+    interval = settings.ARTIST_EMBEDDINGS_BUILD_SECONDS
+    # Every worker sharing the directory schedules the build; whichever gets the lock first builds, the others skip
+    scheduler.schedule("artist-embeddings-build", interval, lambda: service.rebuild(max_age_seconds=interval / 2))
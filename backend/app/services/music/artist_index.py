@@ -0,0 +1,194 @@
+"""
+Artist Index Module
+
+In-memory index of the artists in the catalog with their song counts, for
+artist lists, paging and autocomplete without scanning the songs table on
+every request.
+
+Artists are kept in a list sorted case-insensitively, so a page after a
+cursor and the artists starting with a prefix are both a contiguous slice
+found with bisect. Song counts come from the ``artist`` column of songs;
+the ``artists`` table adds the artist id and image where a row exists.
+
+The index is built once with a keyset scan of songs, then kept current from
+catalog change events: inserted and deleted songs adjust the counts in
+place (an artist is added or removed when its count leaves zero), while an
+update, whose previous artist is unknown, triggers one background rebuild.
+Songs written by other worker processes are picked up when the index is
+rebuilt after ARTIST_INDEX_TTL_SECONDS.
+
+API Endpoints that use this index:
+- GET /admin/maintenance/artists -> ArtistService.iter_unique_artists()
+- GET /admin/maintenance/artists/search -> ArtistService.search_artists()
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from app.core import events
+from app.core.config import settings
+from app.services.base.base_client import get_supabase_client, iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+# Sorts after any real character, closing the range of a prefix
+_PREFIX_END = "\U0010ffff"
+
+
+def _sort_key(name: str) -> Tuple[str, str]:
+    return (name.lower(), name)
+
+
+class ArtistIndex:
+    """
+    Sorted artist names with song counts, updated in place.
+    """
+
+    def __init__(self, counts: Dict[str, int], profiles: Dict[str, Dict]):
+        self.counts = {name: count for name, count in counts.items() if count > 0}
+        self.profiles = profiles
+        self.keys: List[Tuple[str, str]] = sorted(_sort_key(name) for name in self.counts)
+        self.built_at = time.time()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _entry(self, name: str) -> Dict[str, any]:
+        profile = self.profiles.get(name) or {}
+        return {
+            "name": name,
+            "song_count": self.counts[name],
+            "artist_id": profile.get("id"),
+            "image_url": profile.get("image_url"),
+        }
+
+    def add(self, name: str, songs: int = 1) -> None:
+        """Count ``songs`` more songs by an artist (negative to remove), adding or dropping the artist"""
+        with self._lock:
+            count = self.counts.get(name, 0) + songs
+            if count > 0:
+                if name not in self.counts:
+                    key = _sort_key(name)
+                    self.keys.insert(bisect_left(self.keys, key), key)
+                self.counts[name] = count
+            elif name in self.counts:
+                del self.counts[name]
+                key = _sort_key(name)
+                position = bisect_left(self.keys, key)
+                if position < len(self.keys) and self.keys[position] == key:
+                    del self.keys[position]
+
+    def names(self) -> List[str]:
+        """Every artist name in sorted order"""
+        with self._lock:
+            return [name for _, name in self.keys]
+
+    def search(self, prefix: str = "", cursor: Optional[str] = None, limit: int = 50) -> Dict[str, any]:
+        """
+        Page through artists, optionally only those whose name starts with ``prefix``.
+
+        Args:
+            prefix (str): Case-insensitive name prefix ("" for all artists)
+            cursor (str, optional): Name of the last artist of the previous page
+            limit (int): Maximum artists to return
+
+        Returns:
+            Dict containing:
+            - artists (List[Dict]): name, song_count, artist_id and image_url
+            - count (int): Artists matching the prefix
+            - next_cursor (str | None): Cursor for the next page, if any
+        """
+        prefix = prefix.lower()
+        with self._lock:
+            low = bisect_left(self.keys, (prefix,))
+            high = bisect_left(self.keys, (prefix + _PREFIX_END,)) if prefix else len(self.keys)
+            start = max(low, bisect_right(self.keys, _sort_key(cursor))) if cursor else low
+            page = self.keys[start:min(start + limit, high)]
+            return {
+                "artists": [self._entry(name) for _, name in page],
+                "count": high - low,
+                "next_cursor": page[-1][1] if page and start + limit < high else None,
+            }
+
+
+def build_artist_index(page_size: int = 1000) -> ArtistIndex:
+    """Count songs per artist with a keyset scan of songs and attach artist profiles"""
+    started = time.time()
+    client = get_supabase_client()
+    counts: Dict[str, int] = {}
+    for page in iter_table_pages(client, "songs", "id, artist", page_size=page_size):
+        for row in page:
+            if row.get("artist"):
+                counts[row["artist"]] = counts.get(row["artist"], 0) + 1
+
+    profiles = {}
+    for page in iter_table_pages(client, "artists", "id, name, image_url", page_size=page_size):
+        profiles.update((row["name"], row) for row in page)
+
+    index = ArtistIndex(counts, profiles)
+    logger.info(f"Built artist index of {len(index)} artists in {time.time() - started:.2f}s")
+    return index
+
+
+_index: Optional[ArtistIndex] = None
+_stale = False
+_rebuilding = False
+_index_lock = threading.Lock()
+
+
+def _on_catalog_changed(action: str, songs: List[Dict[str, any]], **_) -> None:
+    global _stale
+    index = _index
+    if index is None:
+        return
+    if action in ("insert", "delete"):
+        for song in songs:
+            if song.get("artist"):
+                index.add(song["artist"], 1 if action == "insert" else -1)
+    else:
+        _stale = True
+
+
+def _rebuild() -> None:
+    global _index, _rebuilding
+    try:
+        index = build_artist_index()
+        with _index_lock:
+            _index = index
+    except Exception as e:
+        logger.error(f"Artist index rebuild failed: {str(e)}")
+    finally:
+        _rebuilding = False
+
+
+def get_artist_index() -> ArtistIndex:
+    """
+    Get the current artist index.
+
+    The first call builds it synchronously. Afterwards, a stale or expired
+    index triggers one background rebuild while the current index keeps
+    serving requests.
+    """
+    global _index, _stale, _rebuilding
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _stale = False
+                _index = build_artist_index()
+        return _index
+
+    expired = time.time() - _index.built_at > settings.ARTIST_INDEX_TTL_SECONDS
+    if (_stale or expired) and not _rebuilding:
+        with _index_lock:
+            if not _rebuilding:
+                _rebuilding = True
+                _stale = False
+                threading.Thread(target=_rebuild, name="artist-index-rebuild", daemon=True).start()
+    return _index
+
+
+events.subscribe(events.CATALOG_CHANGED, _on_catalog_changed)
@@ -2,10 +2,14 @@
 Artist Service Module
 
 Handles artist-related queries.
+
+Artist lists are served from the in-memory artist index (see
+artist_index.py) rather than by scanning the songs table per request.
 """
 
-from typing import List
+from typing import Dict, Iterator, List, Optional
 from app.services.base.base_client import BaseSupabaseClient
+from app.services.music.artist_index import get_artist_index
 
 
 class ArtistService(BaseSupabaseClient):
@@ -14,9 +18,42 @@ class ArtistService(BaseSupabaseClient):
     def get_unique_artists(self) -> List[str]:
         """Get list of unique artist names from songs table"""
         try:
-            response = self.supabase.table("songs").select("artist").execute()
-            artists = list(set([song['artist'] for song in response.data if song.get('artist')]))
-            return sorted(artists)
+            return get_artist_index().names()
         except Exception as e:
             print(f"Error fetching artists: {str(e)}")
             return []
+
+    def iter_unique_artists(self, page_size: int = 1000) -> Iterator[List[str]]:
+        """
+        Yield unique artist names in sorted order, a page at a time.
+
+        Names come from the artist index, sorted case-insensitively.
+        """
+        names = get_artist_index().names()
+        for start in range(0, len(names), page_size):
+            yield names[start:start + page_size]
+
+    def search_artists(self, prefix: str = "", cursor: Optional[str] = None, limit: int = 50) -> Dict:
+        """
+        Page through artists by name, optionally only those starting with a prefix.
+
+        Args:
+            prefix (str): Case-insensitive name prefix for autocomplete ("" for all)
+            cursor (str, optional): next_cursor of the previous page
+            limit (int): Artists per page (1 to 200)
+
+        Returns:
+            Dict containing:
+            - artists (List[Dict]): name, song_count, artist_id and image_url
+            - count (int): Artists matching the prefix
+            - next_cursor (str | None): Cursor for the next page, if any
+
+        Raises:
+            ValueError: If limit is out of range
+        """
+        if limit < 1 or limit > 200:
+            raise ValueError("Limit must be between 1 and 200")
+        try:
+            return get_artist_index().search(prefix.strip(), cursor, limit)
+        except Exception as e:
+            return {"error": str(e), "artists": [], "count": 0, "next_cursor": None}
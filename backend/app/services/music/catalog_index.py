@@ -0,0 +1,193 @@
+"""
+Catalog Index Module
+
+In-memory columnar index of the song catalog for filtering and faceting
+without scanning the songs table on every request.
+
+Each filterable field is dictionary-encoded: the distinct values are sorted
+case-insensitively into a vocabulary, and every song stores the int32 code of
+its value in a NumPy array. Because the vocabulary is sorted, an exact or
+prefix match is a contiguous code range found with bisect, and the song mask
+is a single vectorized comparison. Substring matches test the (much smaller)
+vocabulary first and then select codes with ``np.isin``. Facet counts for the
+current filter are one ``np.bincount`` per field.
+
+Songs are kept in id order, so a page cursor is simply the last song id.
+
+The index is rebuilt in the background when a catalog change event is
+published and after CATALOG_INDEX_TTL_SECONDS, serving the previous index
+until the new one is ready.
+
+API Endpoints that use this index:
+- GET /songs/filter -> SpotifyService.filter_tracks()
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core import events
+from app.core.config import settings
+from app.services.base.base_client import get_supabase_client, iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+FILTER_FIELDS = ("title", "artist", "album", "genre")
+FACET_FIELDS = ("artist", "album", "genre")
+MATCH_MODES = ("contains", "prefix", "exact")
+
+# Sorts after any real character, closing the code range of a prefix
+_PREFIX_END = "\U0010ffff"
+
+
+class DictionaryColumn:
+    """A string column stored as int32 codes into a sorted vocabulary"""
+
+    def __init__(self, values: List[Optional[str]]):
+        self.vocabulary = sorted({value for value in values if value}, key=lambda value: (value.lower(), value))
+        self.keys = [value.lower() for value in self.vocabulary]
+        lookup = {value: code for code, value in enumerate(self.vocabulary)}
+        # -1 marks songs without a value
+        self.codes = np.fromiter((lookup.get(value, -1) for value in values), dtype=np.int32, count=len(values))
+
+    def match(self, query: str, mode: str) -> np.ndarray:
+        """Boolean mask of the songs whose value matches ``query`` (case-insensitive)"""
+        query = query.lower()
+        if mode == "exact":
+            low, high = bisect_left(self.keys, query), bisect_right(self.keys, query)
+        elif mode == "prefix":
+            low, high = bisect_left(self.keys, query), bisect_left(self.keys, query + _PREFIX_END)
+        else:
+            matching = [code for code, key in enumerate(self.keys) if query in key]
+            return np.isin(self.codes, np.asarray(matching, dtype=np.int32))
+        return (self.codes >= low) & (self.codes < high)
+
+    def facet(self, mask: np.ndarray, top: int) -> List[Dict[str, any]]:
+        """Most frequent values among the masked songs, with their counts"""
+        codes = self.codes[mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.vocabulary))
+        present = np.flatnonzero(counts)
+        ranked = present[np.argsort(-counts[present], kind="stable")][:top]
+        return [{"value": self.vocabulary[code], "count": int(counts[code])} for code in ranked]
+
+
+class CatalogIndex:
+    """
+    Immutable columnar snapshot of the catalog.
+    """
+
+    def __init__(self, rows: List[Dict[str, any]]):
+        rows = sorted(rows, key=lambda row: row["id"])
+        self.ids = [row["id"] for row in rows]
+        self.columns = {field: DictionaryColumn([row.get(field) for row in rows]) for field in FILTER_FIELDS}
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(self, filters: Dict[str, str], mode: str = "contains", limit: int = 50,
+              cursor: Optional[str] = None, facet_limit: int = 0) -> Dict[str, any]:
+        """
+        Filter the catalog and page through the matching song ids.
+
+        Args:
+            filters (Dict[str, str]): Field name to query value; empty values are ignored
+            mode (str): "contains", "prefix" or "exact", applied to every filter
+            limit (int): Maximum ids to return
+            cursor (str, optional): Song id of the last result of the previous page
+            facet_limit (int): Values per facet to return (0 disables facets)
+
+        Returns:
+            Dict containing:
+            - ids (List[str]): Matching song ids for this page, in id order
+            - count (int): Total number of matching songs
+            - next_cursor (str | None): Cursor for the next page, if any
+            - facets (dict, optional): Field to [{"value", "count"}] for the whole match set
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        for field, value in filters.items():
+            if value:
+                mask &= self.columns[field].match(value, mode)
+
+        matches = np.flatnonzero(mask)
+        start = 0
+        if cursor:
+            start = int(np.searchsorted(matches, bisect_right(self.ids, cursor)))
+        page = matches[start:start + limit]
+
+        result = {
+            "ids": [self.ids[position] for position in page],
+            "count": int(len(matches)),
+            "next_cursor": self.ids[page[-1]] if len(page) and start + limit < len(matches) else None,
+        }
+        if facet_limit:
+            result["facets"] = {field: self.columns[field].facet(mask, facet_limit) for field in FACET_FIELDS}
+        return result
+
+
+def build_catalog_index(page_size: int = 1000) -> CatalogIndex:
+    """Scan the songs table with keyset pagination and build a new index"""
+    started = time.time()
+    rows = []
+    for page in iter_table_pages(get_supabase_client(), "songs", "*", page_size=page_size):
+        # Keep only the indexed fields; the rest of each page is dropped right away
+        rows.extend({"id": row["id"], **{field: row.get(field) for field in FILTER_FIELDS}} for row in page)
+    index = CatalogIndex(rows)
+    logger.info(f"Built catalog index of {len(index)} songs in {time.time() - started:.2f}s")
+    return index
+
+
+_index: Optional[CatalogIndex] = None
+_stale = False
+_rebuilding = False
+_index_lock = threading.Lock()
+
+
+def _mark_stale(**_) -> None:
+    global _stale
+    _stale = True
+
+
+def _rebuild() -> None:
+    global _index, _rebuilding
+    try:
+        index = build_catalog_index()
+        with _index_lock:
+            _index = index
+    except Exception as e:
+        logger.error(f"Catalog index rebuild failed: {str(e)}")
+    finally:
+        _rebuilding = False
+
+
+def get_catalog_index() -> CatalogIndex:
+    """
+    Get the current catalog index.
+
+    The first call builds it synchronously. Afterwards, a stale or expired
+    index triggers one background rebuild while the current index keeps
+    serving requests.
+    """
+    global _index, _stale, _rebuilding
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _stale = False
+                _index = build_catalog_index()
+        return _index
+
+    expired = time.time() - _index.built_at > settings.CATALOG_INDEX_TTL_SECONDS
+    if (_stale or expired) and not _rebuilding:
+        with _index_lock:
+            if not _rebuilding:
+                _rebuilding = True
+                _stale = False
+                threading.Thread(target=_rebuild, name="catalog-index-rebuild", daemon=True).start()
+    return _index
+
+
+events.subscribe(events.CATALOG_CHANGED, _mark_stale)
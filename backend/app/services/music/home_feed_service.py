@@ -0,0 +1,227 @@
+"""
+Home Feed Service Module
+
+Builds the whole home page in one response: trending songs and albums, the
+user's liked songs and playlists, and the newest songs.
+
+Sections are fetched concurrently, each in a worker thread with its own
+HOME_SECTION_TIMEOUT_SECONDS deadline; a slow or failing section is reported
+in ``errors`` and left empty instead of failing the page. Songs are returned
+once in a shared ``songs`` map keyed by id, and sections refer to them by id
+with only their own context (rank, liked_at, ...), so a song that is
+trending, liked and new is sent once.
+
+Complete feeds are cached per user for HOME_CACHE_TTL_SECONDS, and
+concurrent requests for the same user share one build. A user's entry is
+dropped when they like a song.
+
+API Endpoints that use this service:
+- GET /me/home -> get_home()
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core import events
+from app.core.config import settings
+from app.services.base.base_client import get_storage_urls
+from app.services.music.like_service import LikeService
+from app.services.music.playlist_service import PlaylistService
+from app.services.music.song_projection import SONG_FIELDS, project_song
+from app.services.music.song_service import SongService
+from app.services.music.trending_service import TrendingService
+
+logger = logging.getLogger(__name__)
+
+# Each name is fetched by the method of the same name with a leading underscore
+HOME_SECTIONS = ("trending_songs", "trending_albums", "liked_songs", "playlists", "new_songs")
+
+
+class HomeFeedService:
+    """
+    Service for assembling the personalized home feed.
+    """
+
+    def __init__(self):
+        self.trending_service = TrendingService()
+        self.song_service = SongService()
+        self.like_service = LikeService(use_service_role=True)
+        self.playlist_service = PlaylistService(use_service_role=True)
+        # user_id -> (built at, limit, feed)
+        self._cache: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        events.subscribe(events.SONG_LIKED, self._on_song_liked)
+
+    # Sections; each returns (songs, items, extra) and runs in a worker thread
+
+    def _trending_songs(self, user_id: str, limit: int):
+        result = self.trending_service.get_trending_songs(limit=limit, full_songs=True)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        rows = [row for row in result["trending_songs"] if row.get("songs")]
+        audio_urls = get_storage_urls(
+            self.trending_service.bucket_name, (row["songs"].get("file_path") for row in rows)
+        )
+        songs = [project_song(row["songs"], audio_urls.get(row["songs"].get("file_path")),
+                              rank_position=row.get("rank_position"), trend_score=row.get("trend_score"))
+                 for row in rows]
+        return songs, None, {"version": result.get("version")}
+
+    def _trending_albums(self, user_id: str, limit: int):
+        result = self.trending_service.get_trending_albums(limit=limit)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        return None, result["trending_albums"], {"version": result.get("version")}
+
+    def _liked_songs(self, user_id: str, limit: int):
+        result = self.like_service.get_liked_songs(user_id, limit=limit)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        return result["songs"], None, {}
+
+    def _playlists(self, user_id: str, limit: int):
+        result = self.playlist_service.get_playlists(user_id=user_id, limit=limit)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        return None, result["playlists"], {}
+
+    def _new_songs(self, user_id: str, limit: int):
+        result = self.song_service.list_songs(page=1, limit=limit, newest_first=True)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        return result["songs"], None, {}
+
+    async def _run_section(self, name: str, fetch: Callable, user_id: str, limit: int):
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(fetch, user_id, limit), timeout=settings.HOME_SECTION_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Home section {name} timed out for user {user_id}")
+            return TimeoutError(f"Timed out after {settings.HOME_SECTION_TIMEOUT_SECONDS}s")
+        except Exception as e:
+            logger.error(f"Home section {name} failed for user {user_id}: {str(e)}")
+            return e
+
+    async def _build(self, user_id: str, limit: int) -> Dict[str, Any]:
+        fetchers = {name: getattr(self, f"_{name}") for name in HOME_SECTIONS}
+        results = await asyncio.gather(*(
+            self._run_section(name, fetch, user_id, limit) for name, fetch in fetchers.items()
+        ))
+
+        songs: Dict[str, Dict] = {}
+        sections: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        for name, result in zip(fetchers, results):
+            if isinstance(result, Exception):
+                errors[name] = str(result)
+                sections[name] = {"items": []}
+                continue
+            section_songs, items, extra = result
+            if section_songs is not None:
+                items = []
+                for song in section_songs:
+                    songs.setdefault(song["id"], {field: song[field] for field in SONG_FIELDS})
+                    # Only the context fields stay in the section
+                    items.append({"song_id": song["id"],
+                                  **{key: value for key, value in song.items() if key not in SONG_FIELDS}})
+            sections[name] = {"items": items, **extra}
+
+        return {
+            "user_id": user_id,
+            "generated_at": time.time(),
+            "songs": songs,
+            "sections": sections,
+            "errors": errors
+        }
+
+    async def get_home(self, user_id: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Get the home feed of a user.
+
+        GET /me/home
+
+        Args:
+            user_id (str): The user to build the feed for
+            limit (int): Entries per section (1 to 50)
+
+        Returns:
+            Dict containing:
+            - user_id (str): The user
+            - generated_at (float): Unix time the feed was built
+            - songs (Dict[str, Dict]): Every song referenced by a section, by id
+            - sections (Dict[str, Dict]): trending_songs, trending_albums,
+              liked_songs, playlists and new_songs, each with ``items``
+              (song sections list ``song_id`` plus context fields) and the
+              trending sections with their snapshot ``version``
+            - errors (Dict[str, str]): Sections that failed or timed out
+            - cached (bool): Whether the feed came from the per-user cache
+
+        Raises:
+            ValueError: If user_id is empty or limit is out of range
+        """
+        if not user_id or not user_id.strip():
+            raise ValueError("user_id cannot be empty")
+        if limit < 1 or limit > 50:
+            raise ValueError("Limit must be between 1 and 50")
+
+        user_id = user_id.strip()
+        key = (user_id, limit)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[1] == limit and now - cached[0] < settings.HOME_CACHE_TTL_SECONDS:
+                self._cache.move_to_end(user_id)
+                return {**cached[2], "cached": True}
+
+        # Requests arriving while this user's feed is being built wait for the same build
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return {**await asyncio.shield(inflight), "cached": True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            feed = await self._build(user_id, limit)
+            future.set_result(feed)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        # Partial feeds are not cached so the next request retries the failed sections
+        if not feed["errors"]:
+            with self._lock:
+                self._cache[user_id] = (now, limit, feed)
+                self._cache.move_to_end(user_id)
+                while len(self._cache) > settings.HOME_CACHE_MAX_USERS:
+                    self._cache.popitem(last=False)
+        return {**feed, "cached": False}
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached feed of a user"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def _on_song_liked(self, user_id: str, song_id: str, **_) -> None:
+        self.invalidate(user_id)
+
+
+_service: Optional[HomeFeedService] = None
+_service_lock = threading.Lock()
+
+
+def get_home_feed_service() -> HomeFeedService:
+    """Get the process-wide home feed service and its cache"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = HomeFeedService()
+    return _service
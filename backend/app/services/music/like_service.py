@@ -13,7 +13,9 @@ API Endpoints that use this service:
 
 import logging
 from typing import Dict, List, Optional
+from app.core import events
 from app.services.base.base_client import BaseSupabaseClient
+from app.services.music.song_projection import SONG_COLUMNS, project_song
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +86,7 @@ class LikeService(BaseSupabaseClient):
             )
 
             logger.info(f"User {user_id} successfully liked song {song_id}")
+            events.publish(events.SONG_LIKED, user_id=user_id.strip(), song_id=song_id.strip())
             return {
                 "success": True,
                 "message": "Song liked successfully"
@@ -154,7 +157,7 @@ class LikeService(BaseSupabaseClient):
                 "error": error_msg
             }
 
-    def get_liked_songs(self, user_id: str) -> Dict[str, any]:
+    def get_liked_songs(self, user_id: str, limit: Optional[int] = None) -> Dict[str, any]:
         """
         Retrieve all songs liked by a specific user.
 
@@ -162,6 +165,7 @@ class LikeService(BaseSupabaseClient):
 
         Args:
             user_id (str): The ID of the user whose liked songs to retrieve
+            limit (int, optional): Only the most recently liked songs (default: all)
 
         Returns:
             Dict containing:
@@ -179,16 +183,23 @@ class LikeService(BaseSupabaseClient):
             logger.info(f"Retrieving liked songs for user {user_id}")
 
             # Query liked songs with joined song data, ordered by creation date (newest first)
-            query_result = (
+            query = (
                 self.supabase.table("liked_songs")
-                .select("*, songs(*)")
+                .select(f"created_at, songs({SONG_COLUMNS})")
                 .eq("user_id", user_id.strip())
                 .order("created_at", desc=True)
-                .execute()
             )
+            if limit:
+                query = query.limit(limit)
+            query_result = query.execute()
 
             liked_songs = []
 
+            # Sign every audio URL in one storage call
+            audio_urls = self._get_audio_urls(
+                (entry.get('songs') or {}).get('file_path') for entry in query_result.data
+            )
+
             # Process each liked song entry
             for liked_entry in query_result.data:
                 song_data = liked_entry.get('songs')
@@ -198,22 +209,11 @@ class LikeService(BaseSupabaseClient):
                     logger.warning(f"Orphaned like entry found for user {user_id}: {liked_entry}")
                     continue
 
-                # Generate audio URL for the song
-                audio_url = self._get_audio_url(song_data.get('file_path'))
-
-                # Format song data for API response
-                formatted_song = {
-                    "id": song_data['id'],
-                    "title": song_data['title'],
-                    "artist": song_data['artist'],
-                    "album": song_data.get('album'),
-                    "duration_seconds": song_data.get('duration_seconds'),
-                    "cover_image_url": song_data.get('cover_image_url'),
-                    "audio_url": audio_url,
-                    "liked_at": liked_entry.get('created_at')  # When the song was liked
-                }
-
-                liked_songs.append(formatted_song)
+                liked_songs.append(project_song(
+                    song_data,
+                    audio_urls.get(song_data.get('file_path')),
+                    liked_at=liked_entry.get('created_at')  # When the song was liked
+                ))
 
             logger.info(f"Retrieved {len(liked_songs)} liked songs for user {user_id}")
             return {"songs": liked_songs}
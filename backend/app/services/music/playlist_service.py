@@ -6,7 +6,7 @@ This service manages playlist creation, retrieval, updates, and song management
 
 API Endpoints that use this service:
 - POST /playlists -> create_playlist()
-- GET /playlists -> get_playlists()
+- GET /playlists -> get_playlists(), iter_playlists()
 - GET /playlists/{playlist_id} -> get_playlist_by_id()
 - PUT /playlists/{playlist_id} -> update_playlist()
 - POST /playlists/{playlist_id}/songs/{song_id} -> add_song_to_playlist()
@@ -14,9 +14,11 @@ API Endpoints that use this service:
 """
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from app.core import events
 from app.services.base.base_client import BaseSupabaseClient
 from app.services.base.base_client import get_supabase_admin_client
+from app.services.music.song_projection import SONG_COLUMNS, project_song
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +93,11 @@ class PlaylistService(BaseSupabaseClient):
                                 })
                                 .execute()
                             )
+                    events.publish(
+                        events.PLAYLIST_SONGS_ADDED,
+                        playlist_id=playlist_id,
+                        song_ids=[song_id.strip() for song_id in song_ids if song_id and song_id.strip()]
+                    )
 
                 logger.info(f"Successfully created playlist '{name.strip()}' with ID {playlist_id}")
                 return {
@@ -109,7 +116,8 @@ class PlaylistService(BaseSupabaseClient):
             logger.error(f"Error creating playlist '{name.strip()}': {error_msg}")
             return {"error": error_msg}
 
-    def get_playlists(self, user_id: Optional[str] = None, public_only: bool = False) -> Dict[str, any]:
+    def get_playlists(self, user_id: Optional[str] = None, public_only: bool = False,
+                      limit: Optional[int] = None) -> Dict[str, any]:
         """
         Retrieve playlists based on user and visibility criteria.
 
@@ -118,6 +126,7 @@ class PlaylistService(BaseSupabaseClient):
         Args:
             user_id (str, optional): Filter playlists by specific user
             public_only (bool): If True, return only public playlists
+            limit (int, optional): Only the newest playlists (default: all)
 
         Returns:
             Dict containing:
@@ -147,7 +156,6 @@ class PlaylistService(BaseSupabaseClient):
                     .select("*")
                     .eq("user_id", user_id.strip())
                     .order("created_at", desc=True)
-                    .execute()
                 )
                 
                 public_playlists = (
@@ -156,8 +164,12 @@ class PlaylistService(BaseSupabaseClient):
                     .eq("is_public", True)
                     .neq("user_id", user_id.strip())  # Exclude user's own playlists to avoid duplicates
                     .order("created_at", desc=True)
-                    .execute()
                 )
+                if limit:
+                    user_playlists = user_playlists.limit(limit)
+                    public_playlists = public_playlists.limit(limit)
+                user_playlists = user_playlists.execute()
+                public_playlists = public_playlists.execute()
                 
                 # Combine user's playlists with public playlists
                 all_playlists = user_playlists.data + public_playlists.data
@@ -169,12 +181,16 @@ class PlaylistService(BaseSupabaseClient):
                         
                 # Sort by creation date (newest first)
                 all_playlists.sort(key=lambda x: x['created_at'], reverse=True)
+                if limit:
+                    all_playlists = all_playlists[:limit]
                 
                 logger.info(f"Retrieved {len(all_playlists)} playlists for user {user_id}")
                 return {"playlists": all_playlists}
 
             # Order by creation date (newest first)
             query = query.order("created_at", desc=True)
+            if limit:
+                query = query.limit(limit)
             response = query.execute()
 
             logger.info(f"Retrieved {len(response.data)} playlists")
@@ -191,6 +207,32 @@ class PlaylistService(BaseSupabaseClient):
                 "playlists": []
             }
 
+    def iter_playlists(self, public_only: bool = False, page_size: int = 500) -> Iterator[List[Dict]]:
+        """
+        Yield playlists newest first, a page at a time.
+
+        GET /playlists (without user_id, or with public_only)
+
+        Pages are fetched with keyset pagination on (created_at, id), so
+        streaming every playlist keeps a constant cost per page.
+
+        Args:
+            public_only (bool): If True, yield only public playlists
+            page_size (int): Playlists per page
+
+        Yields:
+            List[Dict]: Page of playlist objects
+        """
+        logger.info(f"Streaming playlists - public_only: {public_only}")
+        return self._iter_table_pages(
+            "playlists",
+            "*",
+            page_size=page_size,
+            sort="created_at",
+            desc=True,
+            filters=(lambda query: query.eq("is_public", True)) if public_only else None
+        )
+
     def get_playlist_by_id(self, playlist_id: str) -> Dict[str, any]:
         """
         Retrieve a specific playlist with its songs and owner information.
@@ -261,12 +303,17 @@ class PlaylistService(BaseSupabaseClient):
             # Get songs in the playlist with their details
             songs_query = (
                 self.supabase.table("playlist_songs")
-                .select("*, songs(*)")
+                .select(f"position, songs({SONG_COLUMNS})")
                 .eq("playlist_id", playlist_id.strip())
                 .order("position")
             )
             songs_response = songs_query.execute()
 
+            # Sign every audio URL in one storage call
+            audio_urls = self._get_audio_urls(
+                (entry.get('songs') or {}).get('file_path') for entry in songs_response.data
+            )
+
             songs = []
             for playlist_song in songs_response.data:
                 song_data = playlist_song.get('songs')
@@ -274,21 +321,11 @@ class PlaylistService(BaseSupabaseClient):
                     logger.warning(f"Orphaned playlist song entry found in playlist {playlist_id.strip()}")
                     continue
 
-                # Generate audio URL for the song
-                audio_url = self._get_audio_url(song_data.get('file_path'))
-
-                # Format song data for response
-                formatted_song = {
-                    "id": song_data['id'],
-                    "title": song_data['title'],
-                    "artist": song_data['artist'],
-                    "album": song_data.get('album'),
-                    "duration_seconds": song_data.get('duration_seconds'),
-                    "cover_image_url": song_data.get('cover_image_url'),
-                    "audio_url": audio_url,
-                    "position": playlist_song.get('position')  # Song position in playlist
-                }
-                songs.append(formatted_song)
+                songs.append(project_song(
+                    song_data,
+                    audio_urls.get(song_data.get('file_path')),
+                    position=playlist_song.get('position')  # Song position in playlist
+                ))
 
             logger.info(f"Retrieved playlist '{playlist.get('name', 'Unknown')}' with {len(songs)} songs")
             return {
@@ -431,6 +468,7 @@ class PlaylistService(BaseSupabaseClient):
             )
 
             logger.info(f"Successfully added song {song_id.strip()} to playlist {playlist_id.strip()} at position {next_position}")
+            events.publish(events.PLAYLIST_SONGS_ADDED, playlist_id=playlist_id.strip(), song_ids=[song_id.strip()])
             return {
                 "success": True,
                 "message": "Song added to playlist successfully"
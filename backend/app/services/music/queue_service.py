@@ -0,0 +1,318 @@
+"""
+Queue Service Module
+
+Server-side playback queue, so the client gets the current track and the
+next few tracks with everything needed to prefetch them in one response.
+
+Queue state per user is stored compactly: the song ids are packed as 16-byte
+UUIDs behind a small header holding the current position, so a 1000-track
+queue is about 16 KB. State expires after QUEUE_TTL_SECONDS of inactivity.
+It is kept in process memory by default, or in Redis when QUEUE_REDIS_URL
+is set so every API worker sees the same queue.
+
+API Endpoints that use this service:
+- GET /me/queue -> get_queue()
+- PUT /me/queue -> set_queue()
+"""
+
+import logging
+import posixpath
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.base.base_client import BaseSupabaseClient
+from app.services.music.song_projection import SONG_COLUMNS, project_song
+
+logger = logging.getLogger(__name__)
+
+_QUEUE_HEADER = struct.Struct("<BI")  # version, position
+_QUEUE_VERSION = 1
+
+# Sizes of audio files found through the storage API, by path. Paths are never
+# rewritten with different bytes (see StorageService), so entries stay valid.
+FILE_SIZE_CACHE_SIZE = 50000
+_file_sizes: "OrderedDict[str, int]" = OrderedDict()
+_file_sizes_lock = threading.Lock()
+
+
+def pack_queue(song_ids: List[str], position: int) -> bytes:
+    """Pack a queue into its compact binary form"""
+    return _QUEUE_HEADER.pack(_QUEUE_VERSION, position) + b"".join(uuid.UUID(song_id).bytes for song_id in song_ids)
+
+
+def unpack_queue(blob: bytes) -> Tuple[List[str], int]:
+    """Unpack a queue blob into (song ids, position)"""
+    version, position = _QUEUE_HEADER.unpack_from(blob, 0)
+    if version != _QUEUE_VERSION:
+        raise ValueError("Unsupported queue blob")
+    body = blob[_QUEUE_HEADER.size:]
+    song_ids = [str(uuid.UUID(bytes=body[offset:offset + 16])) for offset in range(0, len(body), 16)]
+    return song_ids, position
+
+
+class MemoryQueueStore:
+    """In-process queue store with TTL, bounded to the most recently used users"""
+
+    def __init__(self, ttl_seconds: int, max_users: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._queues: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._queues.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._queues[user_id]
+                return None
+            # Reading the queue counts as activity
+            self._queues[user_id] = (time.time() + self.ttl_seconds, entry[1])
+            self._queues.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id: str, blob: bytes) -> None:
+        with self._lock:
+            self._queues[user_id] = (time.time() + self.ttl_seconds, blob)
+            self._queues.move_to_end(user_id)
+            while len(self._queues) > self.max_users:
+                self._queues.popitem(last=False)
+
+    def ttl(self, user_id: str) -> Optional[int]:
+        with self._lock:
+            entry = self._queues.get(user_id)
+            return max(int(entry[0] - time.time()), 0) if entry else None
+
+
+class RedisQueueStore:
+    """Queue store shared by all workers, using Redis key expiry for the TTL"""
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        import redis
+
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis.from_url(redis_url, socket_connect_timeout=5)
+        self.redis.ping()
+
+    def _key(self, user_id: str) -> str:
+        return f"queue:{user_id}"
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        # GETEX refreshes the expiry in the same round trip
+        return self.redis.getex(self._key(user_id), ex=self.ttl_seconds)
+
+    def set(self, user_id: str, blob: bytes) -> None:
+        self.redis.set(self._key(user_id), blob, ex=self.ttl_seconds)
+
+    def ttl(self, user_id: str) -> Optional[int]:
+        remaining = self.redis.ttl(self._key(user_id))
+        return remaining if remaining >= 0 else None
+
+
+_queue_store = None
+_queue_store_lock = threading.Lock()
+
+
+def get_queue_store():
+    """Get or create the process-wide queue store"""
+    global _queue_store
+    if _queue_store is None:
+        with _queue_store_lock:
+            if _queue_store is None:
+                if settings.QUEUE_REDIS_URL:
+                    try:
+                        _queue_store = RedisQueueStore(settings.QUEUE_REDIS_URL, settings.QUEUE_TTL_SECONDS)
+                        logger.info("Using Redis for playback queues")
+                    except Exception as e:
+                        logger.warning(f"Redis connection failed: {e}. Using memory storage for playback queues")
+                if _queue_store is None:
+                    _queue_store = MemoryQueueStore(settings.QUEUE_TTL_SECONDS, settings.QUEUE_MAX_USERS)
+    return _queue_store
+
+
+class QueueService(BaseSupabaseClient):
+    """
+    Service for storing playback queues and resolving their upcoming tracks.
+    """
+
+    def _get_file_sizes(self, file_paths: List[str]) -> Dict[str, int]:
+        """
+        Look up byte sizes of audio files.
+
+        Sizes come from the storage object index, which only covers uploads
+        made since it was introduced; older files fall back to the metadata
+        of the storage listing, cached per path.
+        """
+        if not file_paths:
+            return {}
+        sizes = {}
+        try:
+            response = (
+                self.supabase.table("storage_objects")
+                .select("path, size_bytes")
+                .eq("bucket", self.bucket_name)
+                .in_("path", file_paths)
+                .execute()
+            )
+            sizes.update((row["path"], row["size_bytes"]) for row in response.data)
+        except Exception as e:
+            logger.warning(f"Could not look up file sizes: {str(e)}")
+
+        with _file_sizes_lock:
+            for path in file_paths:
+                if path not in sizes and path in _file_sizes:
+                    _file_sizes.move_to_end(path)
+                    sizes[path] = _file_sizes[path]
+
+        for path in dict.fromkeys(path for path in file_paths if path not in sizes):
+            size = self._get_listed_size(path)
+            if size is not None:
+                sizes[path] = size
+                with _file_sizes_lock:
+                    _file_sizes[path] = size
+                    while len(_file_sizes) > FILE_SIZE_CACHE_SIZE:
+                        _file_sizes.popitem(last=False)
+        return sizes
+
+    def _get_listed_size(self, file_path: str) -> Optional[int]:
+        """Byte size of one audio file from the storage listing of its folder"""
+        folder, name = posixpath.split(file_path)
+        try:
+            entries = self.supabase.storage.from_(self.bucket_name).list(folder, {"search": name, "limit": 100})
+        except Exception as e:
+            logger.warning(f"Could not list storage object {file_path}: {str(e)}")
+            return None
+        for entry in entries or []:
+            if entry.get("name") == name:
+                return (entry.get("metadata") or {}).get("size")
+        return None
+
+    def _resolve_tracks(self, song_ids: List[str]) -> List[Optional[Dict[str, any]]]:
+        """Fetch metadata, audio URLs and byte sizes for songs, preserving order"""
+        unique_ids = list(dict.fromkeys(song_ids))
+        if not unique_ids:
+            return []
+
+        rows = self.supabase.table("songs").select(SONG_COLUMNS).in_("id", unique_ids).execute().data or []
+        by_id = {row["id"]: row for row in rows}
+        file_paths = [row["file_path"] for row in rows if row.get("file_path")]
+        audio_urls = self._get_audio_urls(file_paths)
+        sizes = self._get_file_sizes(file_paths)
+
+        tracks = []
+        for song_id in song_ids:
+            row = by_id.get(song_id)
+            if row is None:
+                tracks.append(None)  # Deleted since it was queued
+                continue
+            tracks.append(project_song(
+                row,
+                audio_urls.get(row.get("file_path")),
+                size_bytes=sizes.get(row.get("file_path"))
+            ))
+        return tracks
+
+    def get_queue(self, user_id: str, ahead: int = 5) -> Dict[str, any]:
+        """
+        Get the current track and the next tracks of a user's queue.
+
+        GET /me/queue
+
+        Args:
+            user_id (str): ID of the user
+            ahead (int): Number of upcoming tracks to resolve (default: 5)
+
+        Returns:
+            Dict containing:
+            - position (int): Index of the current track in the queue
+            - length (int): Number of tracks in the queue
+            - current (dict | None): Current track with audio_url and size_bytes
+            - next (List[Dict]): Upcoming tracks with audio_url and size_bytes
+            - expires_in (int | None): Seconds until the queue expires
+            - error (str, optional): Error message if operation failed
+
+        Raises:
+            ValueError: If user_id is empty or ahead is out of range
+        """
+        if not user_id or not user_id.strip():
+            raise ValueError("user_id cannot be empty")
+        if ahead < 0 or ahead > settings.QUEUE_MAX_AHEAD:
+            raise ValueError(f"ahead must be between 0 and {settings.QUEUE_MAX_AHEAD}")
+
+        try:
+            store = get_queue_store()
+            blob = store.get(user_id.strip())
+            if not blob:
+                return {"position": 0, "length": 0, "current": None, "next": [], "expires_in": None}
+
+            song_ids, position = unpack_queue(blob)
+            window = song_ids[position:position + ahead + 1]
+            tracks = self._resolve_tracks(window)
+            # Upcoming tracks that were deleted are skipped rather than returned as gaps
+            upcoming = [track for track in tracks[1:] if track]
+
+            return {
+                "position": position,
+                "length": len(song_ids),
+                "current": tracks[0] if tracks else None,
+                "next": upcoming,
+                "expires_in": store.ttl(user_id.strip())
+            }
+        except Exception as e:
+            error_msg = f"Failed to retrieve queue: {str(e)}"
+            logger.error(f"Error retrieving queue for user {user_id}: {error_msg}")
+            return {"error": error_msg}
+
+    def set_queue(self, user_id: str, song_ids: Optional[List[str]] = None, position: int = 0,
+                  ahead: int = 5) -> Dict[str, any]:
+        """
+        Replace a user's queue, or move within the existing one.
+
+        PUT /me/queue
+
+        Args:
+            user_id (str): ID of the user
+            song_ids (List[str], optional): New queue contents; None keeps the current queue
+            position (int): Index of the current track
+            ahead (int): Number of upcoming tracks to return
+
+        Returns:
+            Dict: The updated queue, as returned by get_queue()
+
+        Raises:
+            ValueError: If inputs are invalid
+        """
+        if not user_id or not user_id.strip():
+            raise ValueError("user_id cannot be empty")
+        # Validated before storing so a rejected request never changes the queue
+        if ahead < 0 or ahead > settings.QUEUE_MAX_AHEAD:
+            raise ValueError(f"ahead must be between 0 and {settings.QUEUE_MAX_AHEAD}")
+
+        store = get_queue_store()
+        if song_ids is None:
+            blob = store.get(user_id.strip())
+            song_ids = unpack_queue(blob)[0] if blob else []
+        if len(song_ids) > settings.QUEUE_MAX_TRACKS:
+            raise ValueError(f"A queue can hold at most {settings.QUEUE_MAX_TRACKS} tracks")
+        if song_ids and not 0 <= position < len(song_ids):
+            raise ValueError("position must point at a track in the queue")
+        try:
+            blob = pack_queue(song_ids, position if song_ids else 0)
+        except ValueError:
+            raise ValueError("song_ids must be valid song IDs")
+
+        try:
+            store.set(user_id.strip(), blob)
+        except Exception as e:
+            error_msg = f"Failed to store queue: {str(e)}"
+            logger.error(f"Error storing queue for user {user_id}: {error_msg}")
+            return {"error": error_msg}
+
+        logger.info(f"Stored queue of {len(song_ids)} tracks for user {user_id} at position {position}")
+        return self.get_queue(user_id, ahead=ahead)
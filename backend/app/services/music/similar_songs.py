@@ -0,0 +1,510 @@
+"""
+Similar Songs Module
+
+Item-to-item recommendations from co-occurrence: two songs are similar when
+the same playlists and the same users' liked songs contain both.
+
+Each playlist and each user's liked songs is a "basket". With A the binary
+basket x song incidence matrix, C = AᵀA counts in how many baskets every
+pair of songs appears together (its diagonal is each song's basket count),
+and the similarity of two songs is the cosine
+
+    sim(i, j) = C[i, j] / sqrt(C[i, i] * C[j, j])
+
+which discounts pairs that co-occur only because both songs are popular.
+Baskets with more than SIMILAR_SONGS_MAX_BASKET songs are left out; they add
+a quadratic number of weak pairs.
+
+Building
+    A full build reads both tables with keyset pagination and computes C
+    with SciPy sparse products. C, the song order and a (timestamp, id)
+    watermark per table are kept under SIMILAR_SONGS_DIR. An incremental
+    build reads only rows past the watermarks, re-reads the baskets they
+    belong to, and adds FᵀF - OᵀO to C, where F and O are the new and old
+    contents of those baskets. Removals are not seen incrementally, so a
+    full build runs every SIMILAR_SONGS_FULL_REBUILD_HOURS.
+
+    Builds take a file lock in SIMILAR_SONGS_DIR, so they are serialized only
+    between processes that see that directory. A deployment with more than
+    one host needs it on a shared volume (SIMILAR_SONGS_DIR_SHARED); on local
+    disks every host keeps, builds and serves its own matrix and index.
+
+Serving
+    Every build writes the top SIMILAR_SONGS_TOP_N neighbours of each song as
+    ``.npy`` arrays (sorted song ids, neighbour rows, scores) into a new
+    directory and then points ``CURRENT`` at it. Readers memory-map the
+    arrays, find a song with ``np.searchsorted`` and slice its row, so a
+    lookup takes microseconds and switches to a new build without a restart.
+
+API Endpoints that use this module:
+- GET /songs/{song_id}/similar -> SimilarSongsService.get_similar_songs()
+- POST /admin/maintenance/similar-songs/rebuild -> SimilarSongsService.rebuild()
+"""
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core import scheduler
+from app.core.config import settings
+from app.services.base.base_client import BaseSupabaseClient
+from app.services.music.song_projection import SONG_COLUMNS, project_song
+
+logger = logging.getLogger(__name__)
+
+# Basket tables -> basket column and the timestamp column of the keyset
+BASKET_SOURCES = {
+    "playlist_songs": ("playlist_id", "added_at"),
+    "liked_songs": ("user_id", "created_at"),
+}
+READ_PAGE_SIZE = 1000
+# Baskets re-read per query during an incremental build
+BASKET_BATCH_SIZE = 100
+# Previous index directories kept for readers that still have them open
+KEEP_INDEXES = 2
+
+
+def _incidence(baskets: List[List[int]], songs: int):
+    """Binary basket x song CSR matrix of the baskets within the size limit"""
+    from scipy import sparse
+
+    kept = [basket for basket in baskets if len(basket) <= settings.SIMILAR_SONGS_MAX_BASKET]
+    columns = np.fromiter((song for basket in kept for song in basket), dtype=np.int32)
+    indptr = np.zeros(len(kept) + 1, dtype=np.int64)
+    np.cumsum([len(basket) for basket in kept], out=indptr[1:])
+    data = np.ones(len(columns), dtype=np.float32)
+    return sparse.csr_matrix((data, columns, indptr), shape=(len(kept), songs))
+
+
+def top_neighbours(cooccurrence, top_n: int, min_cooccurrence: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-N cosine neighbours of every song.
+
+    Args:
+        cooccurrence: Square sparse co-occurrence matrix (diagonal = basket counts)
+        top_n (int): Neighbours kept per song
+        min_cooccurrence (int): Pairs seen together fewer times are ignored
+
+    Returns:
+        (neighbours, scores): int32 and float32 arrays of shape (songs, top_n),
+        best first, padded with -1 and 0
+    """
+    from scipy import sparse
+
+    matrix = sparse.csr_matrix(cooccurrence, dtype=np.float32)
+    norms = np.sqrt(matrix.diagonal())
+    matrix.setdiag(0)
+    matrix.data[matrix.data < min_cooccurrence] = 0
+    matrix.eliminate_zeros()
+
+    # Scale every stored pair by 1 / (norm_i * norm_j) without densifying
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    matrix.data /= norms[rows] * norms[matrix.indices]
+
+    neighbours = np.full((matrix.shape[0], top_n), -1, dtype=np.int32)
+    scores = np.zeros((matrix.shape[0], top_n), dtype=np.float32)
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        if start == end:
+            continue
+        values = matrix.data[start:end]
+        columns = matrix.indices[start:end]
+        if len(values) > top_n:
+            best = np.argpartition(values, -top_n)[-top_n:]
+            values, columns = values[best], columns[best]
+        order = np.argsort(-values, kind="stable")
+        neighbours[row, :len(order)] = columns[order]
+        scores[row, :len(order)] = values[order]
+    return neighbours, scores
+
+
+class SimilarityIndex:
+    """
+    Read-only view of the latest built neighbour arrays, memory-mapped.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._pointer = os.path.join(root, "CURRENT")
+        self._pointer_mtime = None
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self.meta: Dict = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        try:
+            mtime = os.stat(self._pointer).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._pointer_mtime:
+            return
+        with self._lock:
+            if mtime == self._pointer_mtime:
+                return
+            with open(self._pointer) as pointer:
+                directory = os.path.join(self.root, pointer.read().strip())
+            arrays = tuple(
+                np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in ("ids", "neighbours", "scores")
+            )
+            with open(os.path.join(directory, "meta.json")) as meta:
+                self.meta = json.load(meta)
+            self._arrays = arrays
+            self._pointer_mtime = mtime
+
+    def neighbours(self, song_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        Most similar songs to ``song_id``, best first.
+
+        Returns:
+            List of (song_id, score); empty for songs without co-occurrences,
+            None if no index has been built yet
+        """
+        self._refresh()
+        if self._arrays is None:
+            return None
+        ids, neighbours, scores = self._arrays
+        key = song_id.encode("ascii", "ignore")
+        position = int(np.searchsorted(ids, key))
+        if position >= len(ids) or ids[position] != key:
+            return []
+        row = neighbours[position, :limit]
+        found = row >= 0
+        return [
+            (ids[neighbour].decode("ascii"), float(score))
+            for neighbour, score in zip(row[found], scores[position, :limit][found])
+        ]
+
+
+class SimilarSongsService(BaseSupabaseClient):
+    """
+    Service for building and serving song-to-song similarity.
+    """
+
+    def __init__(self, use_service_role: bool = False, root: Optional[str] = None):
+        super().__init__(use_service_role=use_service_role)
+        self.root = root or settings.SIMILAR_SONGS_DIR
+        os.makedirs(os.path.join(self.root, "state"), exist_ok=True)
+
+    # Serving
+
+    def get_similar_songs(self, song_id: str, limit: int = 20) -> Dict[str, any]:
+        """
+        Get the songs most similar to a song.
+
+        GET /songs/{song_id}/similar
+
+        Args:
+            song_id (str): Song to find neighbours for
+            limit (int): Maximum songs to return (1 to SIMILAR_SONGS_TOP_N)
+
+        Returns:
+            Dict containing:
+            - song_id (str): The requested song
+            - songs (List[Dict]): Similar songs, best first, each with a score
+            - built_at (float): Unix time of the build served, None if never built
+            - error (str, optional): Error message if operation failed
+
+        Raises:
+            ValueError: If limit is out of range
+        """
+        if limit < 1 or limit > settings.SIMILAR_SONGS_TOP_N:
+            raise ValueError(f"Limit must be between 1 and {settings.SIMILAR_SONGS_TOP_N}")
+
+        try:
+            index = get_similarity_index()
+            neighbours = index.neighbours(song_id, limit)
+            if not neighbours:
+                return {"song_id": song_id, "songs": [], "built_at": index.meta.get("built_at")}
+
+            scores = dict(neighbours)
+            rows = self.supabase.table("songs").select(SONG_COLUMNS).in_("id", list(scores)).execute().data
+            rows.sort(key=lambda song: -scores[song["id"]])
+            audio_urls = self._get_audio_urls(song.get("file_path") for song in rows)
+            return {
+                "song_id": song_id,
+                "songs": [
+                    project_song(song, audio_urls.get(song.get("file_path")), score=round(scores[song["id"]], 4))
+                    for song in rows
+                ],
+                "built_at": index.meta.get("built_at")
+            }
+
+        except Exception as e:
+            error_msg = f"Failed to get similar songs: {str(e)}"
+            logger.error(f"Error in get_similar_songs: {error_msg}")
+            return {"error": error_msg}
+
+    # Building
+
+    @contextmanager
+    def _build_lock(self) -> Iterator[None]:
+        """Exclusive lock across processes sharing the similarity directory"""
+        with open(os.path.join(self.root, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_rows(self, table: str, watermark: Optional[List[str]] = None) -> Iterator[List[Dict]]:
+        """Pages of (basket, song) rows in (timestamp, id) order, after ``watermark`` if given"""
+        basket_column, time_column = BASKET_SOURCES[table]
+        filters = None
+        if watermark:
+            filters = lambda query: query.gte(time_column, watermark[0])
+        pages = self._iter_table_pages(
+            table, f"id, {basket_column}, song_id, {time_column}", page_size=READ_PAGE_SIZE,
+            key="id", sort=time_column, filters=filters
+        )
+        for page in pages:
+            if watermark:
+                # Rows at the watermark timestamp were read last time up to its id
+                page = [row for row in page if row[time_column] != watermark[0] or row["id"] > watermark[1]]
+            if page:
+                yield page
+
+    def _load_state(self):
+        from scipy import sparse
+
+        state_dir = os.path.join(self.root, "state")
+        try:
+            with open(os.path.join(state_dir, "state.json")) as state_file:
+                state = json.load(state_file)
+            cooccurrence = sparse.load_npz(os.path.join(state_dir, "cooccurrence.npz")).tocsr()
+            songs = [song_id.decode("ascii") for song_id in np.load(os.path.join(state_dir, "songs.npy"))]
+        except FileNotFoundError:
+            return None
+        return state, cooccurrence, songs
+
+    def _save_state(self, state: Dict, cooccurrence, songs: List[str]) -> None:
+        from scipy import sparse
+
+        state_dir = os.path.join(self.root, "state")
+        sparse.save_npz(os.path.join(state_dir, "cooccurrence.tmp.npz"), cooccurrence)
+        np.save(os.path.join(state_dir, "songs.tmp.npy"), np.array(songs, dtype="S36"))
+        with open(os.path.join(state_dir, "state.tmp.json"), "w") as state_file:
+            json.dump(state, state_file)
+        # The state file is replaced last; it names the watermarks the other two match
+        os.replace(os.path.join(state_dir, "cooccurrence.tmp.npz"), os.path.join(state_dir, "cooccurrence.npz"))
+        os.replace(os.path.join(state_dir, "songs.tmp.npy"), os.path.join(state_dir, "songs.npy"))
+        os.replace(os.path.join(state_dir, "state.tmp.json"), os.path.join(state_dir, "state.json"))
+
+    def _full_build(self, progress: Optional[Callable]) -> Tuple[Dict, object, List[str], Dict]:
+        positions: Dict[str, int] = {}
+        songs: List[str] = []
+        baskets: Dict[Tuple[str, str], List[int]] = {}
+        watermarks = {}
+        rows_read = 0
+
+        for table, (basket_column, time_column) in BASKET_SOURCES.items():
+            for page in self._read_rows(table):
+                for row in page:
+                    position = positions.get(row["song_id"])
+                    if position is None:
+                        position = positions[row["song_id"]] = len(songs)
+                        songs.append(row["song_id"])
+                    baskets.setdefault((table, row[basket_column]), []).append(position)
+                last = page[-1]
+                watermarks[table] = [last[time_column], last["id"]]
+                rows_read += len(page)
+                if progress:
+                    progress(stage="reading", rows_read=rows_read)
+
+        incidence = _incidence(list(baskets.values()), len(songs))
+        cooccurrence = (incidence.T @ incidence).tocsr()
+        state = {"watermarks": watermarks, "full_built_at": time.time()}
+        return state, cooccurrence, songs, {"rows_read": rows_read, "baskets": len(baskets)}
+
+    def _incremental_build(self, state: Dict, cooccurrence, songs: List[str],
+                           progress: Optional[Callable]) -> Tuple[Dict, object, List[str], Dict]:
+        positions = {song_id: position for position, song_id in enumerate(songs)}
+        songs = list(songs)
+        watermarks = dict(state.get("watermarks", {}))
+        added: Dict[Tuple[str, str], set] = {}
+        rows_read = 0
+
+        for table, (basket_column, time_column) in BASKET_SOURCES.items():
+            for page in self._read_rows(table, watermarks.get(table)):
+                for row in page:
+                    added.setdefault((table, row[basket_column]), set()).add(row["song_id"])
+                last = page[-1]
+                watermarks[table] = [last[time_column], last["id"]]
+                rows_read += len(page)
+                if progress:
+                    progress(stage="reading", rows_read=rows_read)
+
+        # Current contents of every touched basket
+        contents: Dict[Tuple[str, str], set] = {basket: set() for basket in added}
+        for table, (basket_column, _) in BASKET_SOURCES.items():
+            touched = [basket_id for source, basket_id in added if source == table]
+            for start in range(0, len(touched), BASKET_BATCH_SIZE):
+                batch = touched[start:start + BASKET_BATCH_SIZE]
+                pages = self._iter_table_pages(
+                    table, f"id, {basket_column}, song_id", page_size=READ_PAGE_SIZE,
+                    filters=lambda query, column=basket_column, batch=batch: query.in_(column, batch)
+                )
+                for page in pages:
+                    for row in page:
+                        contents[(table, row[basket_column])].add(row["song_id"])
+
+        new_baskets, old_baskets = [], []
+        for basket, current in contents.items():
+            for song_id in current:
+                if song_id not in positions:
+                    positions[song_id] = len(songs)
+                    songs.append(song_id)
+            new_baskets.append([positions[song_id] for song_id in current])
+            # Songs added since the watermark and since removed again are not in current
+            old_baskets.append([positions[song_id] for song_id in current - added[basket]])
+
+        cooccurrence = cooccurrence.tocsr()
+        cooccurrence.resize((len(songs), len(songs)))
+        if new_baskets:
+            new = _incidence(new_baskets, len(songs))
+            old = _incidence(old_baskets, len(songs))
+            cooccurrence = (cooccurrence + new.T @ new - old.T @ old).tocsr()
+            cooccurrence.eliminate_zeros()
+
+        state = {**state, "watermarks": watermarks}
+        return state, cooccurrence, songs, {"rows_read": rows_read, "baskets": len(contents)}
+
+    def _write_index(self, cooccurrence, songs: List[str], meta: Dict) -> str:
+        """Write the neighbour arrays into a new directory and point CURRENT at it"""
+        neighbours, scores = top_neighbours(
+            cooccurrence, settings.SIMILAR_SONGS_TOP_N, settings.SIMILAR_SONGS_MIN_COOCCURRENCE
+        )
+        ids = np.array(songs, dtype="S36")
+        # Rows are stored in id order so readers can binary search; neighbours are remapped to match
+        order = np.argsort(ids, kind="stable")
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        neighbours = neighbours[order]
+        neighbours = np.where(neighbours >= 0, rank[np.maximum(neighbours, 0)], -1).astype(np.int32)
+
+        name = f"index-{int(time.time() * 1000)}"
+        directory = os.path.join(self.root, name)
+        os.makedirs(directory)
+        np.save(os.path.join(directory, "ids.npy"), ids[order])
+        np.save(os.path.join(directory, "neighbours.npy"), neighbours)
+        np.save(os.path.join(directory, "scores.npy"), scores[order])
+        with open(os.path.join(directory, "meta.json"), "w") as meta_file:
+            json.dump(meta, meta_file)
+
+        pointer = os.path.join(self.root, "CURRENT")
+        with open(f"{pointer}.tmp", "w") as pointer_file:
+            pointer_file.write(name)
+        os.replace(f"{pointer}.tmp", pointer)
+
+        previous = sorted(entry for entry in os.listdir(self.root) if entry.startswith("index-"))
+        for entry in previous[:-KEEP_INDEXES]:
+            shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+        return name
+
+    def rebuild(self, full: bool = False, progress: Optional[Callable] = None) -> Dict[str, any]:
+        """
+        Update the co-occurrence matrix and publish new neighbour lists.
+
+        POST /admin/maintenance/similar-songs/rebuild
+
+        Args:
+            full (bool): Recompute from all rows instead of only rows added
+                since the last build. Forced when there is no saved state or
+                the last full build is older than SIMILAR_SONGS_FULL_REBUILD_HOURS.
+            progress (Callable, optional): Called with running counters
+
+        Returns:
+            Dict containing:
+            - full (bool): Whether a full build ran
+            - rows_read (int): Basket rows read
+            - baskets (int): Baskets read (all, or those touched by new rows)
+            - songs (int): Songs in the index
+            - pairs (int): Stored co-occurring pairs
+            - index (str): Directory now served
+            - unchanged (bool, optional): True if no rows were added and the index was kept
+            - elapsed_seconds (float): Duration of the build
+
+        Raises:
+            RuntimeError: If SciPy is not installed
+        """
+        try:
+            import scipy  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Building similar songs requires the scipy package")
+
+        started = time.time()
+        with self._build_lock():
+            saved = None if full else self._load_state()
+            if saved and time.time() - saved[0].get("full_built_at", 0) > settings.SIMILAR_SONGS_FULL_REBUILD_HOURS * 3600:
+                saved = None
+
+            if saved:
+                state, cooccurrence, songs, stats = self._incremental_build(*saved, progress)
+            else:
+                state, cooccurrence, songs, stats = self._full_build(progress)
+
+            if saved and not stats["rows_read"] and os.path.exists(os.path.join(self.root, "CURRENT")):
+                # Nothing new; keep serving the current index
+                return {"full": False, **stats, "songs": len(songs), "unchanged": True,
+                        "elapsed_seconds": round(time.time() - started, 2)}
+            self._save_state(state, cooccurrence, songs)
+
+            if progress:
+                progress(stage="ranking", songs=len(songs))
+            meta = {
+                "built_at": time.time(),
+                "full_built_at": state["full_built_at"],
+                "songs": len(songs),
+                "top_n": settings.SIMILAR_SONGS_TOP_N,
+            }
+            name = self._write_index(cooccurrence, songs, meta)
+
+        result = {
+            "full": not saved,
+            **stats,
+            "songs": len(songs),
+            "pairs": int(cooccurrence.nnz - np.count_nonzero(cooccurrence.diagonal())) // 2,
+            "index": name,
+            "elapsed_seconds": round(time.time() - started, 2)
+        }
+        logger.info(
+            f"Built similar songs ({'full' if result['full'] else 'incremental'}): {result['songs']} songs, "
+            f"{result['pairs']} pairs from {result['rows_read']} new rows in {result['elapsed_seconds']}s"
+        )
+        return result
+
+
+_index: Optional[SimilarityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Get the process-wide reader of the similarity directory"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarityIndex(settings.SIMILAR_SONGS_DIR)
+    return _index
+
+
+def start_similar_songs_builds() -> None:
+    """Schedule periodic similar songs builds (incremental, with a periodic full build)"""
+    if not settings.SIMILAR_SONGS_BUILD_SECONDS:
+        return
+    if not settings.SIMILAR_SONGS_DIR_SHARED:
+        logger.warning(
+            f"SIMILAR_SONGS_DIR ({settings.SIMILAR_SONGS_DIR}) is not declared shared: builds are only "
+            "coordinated between workers on this host, and every other host or pod will run its own "
+            "build. Mount a shared volume and set SIMILAR_SONGS_DIR_SHARED=true when running more than one."
+        )
+    service = SimilarSongsService(use_service_role=True)
+    scheduler.schedule("similar-songs-build", settings.SIMILAR_SONGS_BUILD_SECONDS, service.rebuild)
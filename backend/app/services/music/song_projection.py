@@ -0,0 +1,56 @@
+"""
+Song Projection Module
+
+Single place that defines how a song row is selected from the database and
+shaped for API responses.
+
+Every song list endpoint selects the same narrow column set and builds the
+same response dict, in the same key order, so the rows can go straight to
+``FastJSONResponse`` without passing through ``jsonable_encoder``. Values are
+already JSON-native (strings, numbers, None and the cover_images dict), which
+keeps serialization a single orjson call per page.
+
+Used by:
+- SongService.list_songs(), SongService.search_songs()
+- LikeService.get_liked_songs()
+- PlaylistService.get_playlist_by_id()
+- HomeFeedService.get_home()
+"""
+
+from typing import Any, Dict, Optional
+
+# Columns needed to project a song, for selects and embedded selects
+SONG_COLUMNS = "id, title, artist, album, duration_seconds, cover_image_url, cover_images, file_path, created_at"
+
+# Keys of a projected song before any context fields
+SONG_FIELDS = ("id", "title", "artist", "album", "duration_seconds", "cover_image_url", "cover_images", "audio_url")
+
+
+def project_song(song: Dict[str, Any], audio_url: Optional[str], **extra: Any) -> Dict[str, Any]:
+    """
+    Build the API representation of a song row.
+
+    Args:
+        song (dict): Row selected with SONG_COLUMNS
+        audio_url (str, optional): Client-facing URL of the audio file
+        **extra: Context fields appended after the song fields
+            (e.g. ``created_at``, ``liked_at``, ``position``)
+
+    Returns:
+        Dict with id, title, artist, album, duration_seconds, cover_image_url,
+        cover_images, audio_url, followed by the extra fields
+    """
+    get = song.get
+    projected = {
+        "id": song["id"],
+        "title": song["title"],
+        "artist": song["artist"],
+        "album": get("album"),
+        "duration_seconds": get("duration_seconds"),
+        "cover_image_url": get("cover_image_url"),
+        "cover_images": get("cover_images"),
+        "audio_url": audio_url,
+    }
+    if extra:
+        projected.update(extra)
+    return projected
@@ -7,12 +7,17 @@ This service manages song listing, searching, creation, and deletion.
 API Endpoints that use this service:
 - GET /songs -> list_songs()
 - GET /search -> search_songs()
+- GET /suggest -> suggest()
 - DELETE /admin/songs/{song_id} -> delete_song()
 """
 
 import logging
 from typing import Dict, List, Optional
+from app.core import events
 from app.services.base.base_client import BaseSupabaseClient
+from app.services.base.url_signer import get_url_signer
+from app.services.music.song_projection import SONG_COLUMNS, project_song
+from app.services.music.suggest_index import MAX_SUGGESTIONS, get_suggest_index
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +30,7 @@ class SongService(BaseSupabaseClient):
     inserting new songs, and deleting songs with their associated files.
     """
 
-    def list_songs(self, page: int = 1, limit: int = 50) -> Dict[str, any]:
+    def list_songs(self, page: int = 1, limit: int = 50, newest_first: bool = False) -> Dict[str, any]:
         """
         Retrieve a paginated list of songs from the database.
 
@@ -34,10 +39,11 @@ class SongService(BaseSupabaseClient):
         Args:
             page (int): Page number to retrieve (1-based, default: 1)
             limit (int): Number of songs per page (default: 50, max: 100)
+            newest_first (bool): Order by created_at, most recent first
 
         Returns:
             Dict containing:
-            - songs (List[Dict]): List of song objects with metadata and audio URLs
+            - songs (List[Dict]): List of song objects with metadata, audio URLs and cover thumbnail URLs
             - page (int): Current page number
             - limit (int): Items per page
             - total (int): Total number of songs available
@@ -58,36 +64,24 @@ class SongService(BaseSupabaseClient):
             # Calculate offset for pagination
             offset = (page - 1) * limit
 
-            # Get total count of songs
-            count_query = self.supabase.table("songs").select("*", count="exact")
-            count_response = count_query.execute()
-            total_count = count_response.count if count_response.count is not None else 0
-
-            # Get paginated songs
+            # Get paginated songs together with the total count of songs
             songs_query = (
                 self.supabase.table("songs")
-                .select("*")
+                .select(SONG_COLUMNS, count="exact")
                 .range(offset, offset + limit - 1)
             )
+            if newest_first:
+                songs_query = songs_query.order("created_at", desc=True).order("id", desc=True)
             songs_response = songs_query.execute()
+            total_count = songs_response.count if songs_response.count is not None else 0
+
+            # Sign every audio URL on the page in one storage call
+            audio_urls = self._get_audio_urls(song.get('file_path') for song in songs_response.data)
 
-            songs = []
-            for song in songs_response.data:
-                # Generate audio URL for the song
-                audio_url = self._get_audio_url(song.get('file_path'))
-
-                # Format song data for API response
-                song_data = {
-                    "id": song['id'],
-                    "title": song['title'],
-                    "artist": song['artist'],
-                    "album": song.get('album'),
-                    "duration_seconds": song.get('duration_seconds'),
-                    "cover_image_url": song.get('cover_image_url'),
-                    "audio_url": audio_url,
-                    "created_at": song['created_at']
-                }
-                songs.append(song_data)
+            songs = [
+                project_song(song, audio_urls.get(song.get('file_path')), created_at=song['created_at'])
+                for song in songs_response.data
+            ]
 
             logger.info(f"Retrieved {len(songs)} songs (page {page} of {((total_count - 1) // limit) + 1})")
             return {
@@ -111,6 +105,41 @@ class SongService(BaseSupabaseClient):
                 "total": 0
             }
 
+    def suggest(self, query: str, limit: int = 10) -> Dict[str, any]:
+        """
+        Suggest titles, artists and albums completing a partially typed query.
+
+        GET /suggest
+
+        Served from the in-memory suggest index (see suggest_index.py) instead
+        of the database, so it can be called on every keystroke. Completions
+        are ranked by catalog size and all-time popularity.
+
+        Args:
+            query (str): Text typed so far; the last word may be incomplete
+            limit (int): Maximum number of suggestions (default: 10)
+
+        Returns:
+            Dict containing:
+            - query (str): The query as received
+            - suggestions (List[Dict]): text, field ("title", "artist" or
+              "album"), song_count and score, best first
+            - error (str, optional): Error message if operation failed
+
+        Raises:
+            ValueError: If query is empty or limit is invalid
+        """
+        if not query or not query.strip():
+            raise ValueError("Suggest query cannot be empty")
+        if limit < 1 or limit > MAX_SUGGESTIONS:
+            raise ValueError(f"Limit must be between 1 and {MAX_SUGGESTIONS}")
+
+        try:
+            return {"query": query, "suggestions": get_suggest_index().suggest(query, limit)}
+        except Exception as e:
+            logger.error(f"Error suggesting for '{query}': {str(e)}")
+            return {"error": str(e), "query": query, "suggestions": []}
+
     def search_songs(self, query: str, limit: int = 10) -> Dict[str, any]:
         """
         Search for songs and public playlists by title, artist, album, or playlist name.
@@ -146,27 +175,19 @@ class SongService(BaseSupabaseClient):
             # Search songs by title, artist, or album
             songs_query = (
                 self.supabase.table("songs")
-                .select("id, title, artist, album, duration_seconds, cover_image_url, file_path, created_at")
+                .select(SONG_COLUMNS)
                 .or_(f"title.ilike.%{query.strip()}%,artist.ilike.%{query.strip()}%,album.ilike.%{query.strip()}%")
                 .limit(limit)
             )
             songs_response = songs_query.execute()
 
-            songs = []
-            for song in songs_response.data:
-                # Generate audio URL for the song
-                audio_url = self._get_audio_url(song.get('file_path'))
-
-                songs.append({
-                    "id": song['id'],
-                    "title": song['title'],
-                    "artist": song['artist'],
-                    "album": song.get('album'),
-                    "duration_seconds": song.get('duration_seconds'),
-                    "cover_image_url": song.get('cover_image_url'),
-                    "audio_url": audio_url,
-                    "created_at": song['created_at']
-                })
+            # Sign every audio URL on the page in one storage call
+            audio_urls = self._get_audio_urls(song.get('file_path') for song in songs_response.data)
+
+            songs = [
+                project_song(song, audio_urls.get(song.get('file_path')), created_at=song['created_at'])
+                for song in songs_response.data
+            ]
 
             # Search public playlists by name or description
             playlists_query = (
@@ -239,6 +260,7 @@ class SongService(BaseSupabaseClient):
 
             if insert_response.data:
                 logger.info(f"Successfully inserted song: {song_data.get('title')}")
+                events.publish(events.CATALOG_CHANGED, action="insert", songs=insert_response.data)
                 return insert_response.data[0]
             else:
                 logger.warning(f"Insert returned no data for song: {song_data.get('title')}")
@@ -284,7 +306,7 @@ class SongService(BaseSupabaseClient):
             # First, get the song's file path for cleanup
             song_query = (
                 self.supabase.table("songs")
-                .select("file_path, title")
+                .select("id, file_path, title, artist, album")
                 .eq("id", song_id.strip())
             )
             song_response = song_query.execute()
@@ -304,13 +326,30 @@ class SongService(BaseSupabaseClient):
                 .eq("id", song_id.strip())
                 .execute()
             )
+            events.publish(events.CATALOG_CHANGED, action="delete", songs=[song_info])
 
             # Attempt to delete the associated file from storage
             if file_path:
                 try:
-                    logger.debug(f"Attempting to delete file from storage: {file_path}")
-                    self.supabase.storage.from_(self.bucket_name).remove([file_path])
-                    logger.info(f"Successfully deleted file from storage: {file_path}")
+                    # Deduplicated uploads point several songs at one object
+                    shared = (
+                        self.supabase.table("songs")
+                        .select("id")
+                        .eq("file_path", file_path)
+                        .limit(1)
+                        .execute()
+                    )
+                    if shared.data:
+                        logger.info(f"Keeping file still used by another song: {file_path}")
+                    else:
+                        logger.debug(f"Attempting to delete file from storage: {file_path}")
+                        self.supabase.storage.from_(self.bucket_name).remove([file_path])
+                        # Drop the content index row so later uploads are not deduplicated onto it
+                        self.supabase.table("storage_objects").delete().eq(
+                            "bucket", self.bucket_name
+                        ).eq("path", file_path).execute()
+                        get_url_signer().invalidate(self.bucket_name, file_path)
+                        logger.info(f"Successfully deleted file from storage: {file_path}")
                 except Exception as storage_error:
                     # Log warning but don't fail the operation if file deletion fails
                     logger.warning(f"Could not delete file from storage '{file_path}': {str(storage_error)}")
@@ -0,0 +1,413 @@
+"""
+Suggest Index Module
+
+In-memory prefix index for search-as-you-type suggestions, so instant search
+does not run an ``ilike`` query against the songs table on every keystroke.
+
+Each distinct title, artist and album in the catalog is one entry, scored by
+the number of songs carrying it plus their all-time popularity from
+``song_metric_counters`` (plays and likes, weighted like the trending
+engine). Entry text is normalized (accents stripped, case folded, split on
+non-word characters) and every token is stored as a fixed-width byte key in
+one sorted NumPy array with a parallel array of entry ids. The entries whose
+token starts with a typed prefix are therefore one contiguous slice found
+with two binary searches. For a query of several words, the entries of the
+most selective word are checked against the stored tokens of the others.
+Prefixes too common to rank per query (a single letter, "the") have their
+best entries ranked once at build time.
+
+Results are cached per normalized query in a small LRU. Catalog change
+events update the index in place: new tokens go to a sorted delta list that
+is merged into the arrays once it grows past SUGGEST_DELTA_MAX, song counts
+are adjusted, and only the cached queries the changed entries could match
+are dropped. Song updates, whose previous values are unknown, and indexes
+older than SUGGEST_INDEX_TTL_SECONDS trigger a background rebuild, which also
+refreshes popularity and picks up songs written by other worker processes.
+
+API Endpoints that use this index:
+- GET /suggest -> SongService.suggest()
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core import events
+from app.core.config import settings
+from app.services.base.base_client import get_supabase_admin_client, get_supabase_client, iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_FIELDS = ("title", "artist", "album")
+# Most suggestions returned (and cached) per query
+MAX_SUGGESTIONS = 20
+# Tokens are stored as this many UTF-8 bytes; longer query words are checked against the entry text
+TOKEN_BYTES = 16
+# Prefixes matching more tokens than this are ranked at build time, keeping this many entries
+HEAVY_PREFIX_POSTINGS = 2048
+HEAVY_PREFIX_DEPTH = 4 * MAX_SUGGESTIONS
+
+# Never occurs in UTF-8, closing the key range of a prefix
+_KEY_END = b"\xff"
+_WORD = re.compile(r"\w+")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Split text into lowercase words without accents, e.g. "Beyoncé - Halo" -> ["beyonce", "halo"]"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return _WORD.findall("".join(c for c in decomposed if not unicodedata.combining(c)).casefold())
+
+
+def _key(token: str) -> bytes:
+    return token.encode()[:TOKEN_BYTES]
+
+
+class SuggestIndex:
+    """
+    Sorted token keys over scored title, artist and album entries.
+    """
+
+    def __init__(self, texts: List[str], fields: Sequence[int], songs: Sequence[int], scores: Sequence[float]):
+        """
+        Args:
+            texts (List[str]): Entry text as displayed
+            fields (Sequence[int]): Position of each entry's field in SUGGEST_FIELDS
+            songs (Sequence[int]): Songs carrying each entry
+            scores (Sequence[float]): Ranking score of each entry
+        """
+        self.texts = texts
+        self.size = len(texts)
+        self.fields = np.asarray(fields, dtype=np.uint8)
+        self.songs = np.asarray(songs, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.lookup: List[Dict[str, int]] = [{} for _ in SUGGEST_FIELDS]
+        for entry, (field, text) in enumerate(zip(self.fields.tolist(), texts)):
+            self.lookup[field][text] = entry
+
+        keys, postings, offsets = [], [], [0]
+        for entry, text in enumerate(texts):
+            entry_keys = {_key(token) for token in normalize_tokens(text)}
+            keys.extend(entry_keys)
+            postings.extend([entry] * len(entry_keys))
+            offsets.append(len(keys))
+        keys = np.array(keys, dtype=f"S{TOKEN_BYTES}")
+        # Keys of each entry, entry_keys[entry_offsets[e]:entry_offsets[e + 1]], to check the other words of a query
+        self.entry_keys = keys
+        self.entry_offsets = np.asarray(offsets, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.postings = np.asarray(postings, dtype=np.int32)[order]
+        self._heavy = self._top_prefixes()
+
+        # Sorted (key, entry) pairs added since the arrays were built
+        self._delta: List[Tuple[bytes, int]] = []
+        self._cache: "OrderedDict[Tuple[str, ...], List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _top(self, candidates: np.ndarray, count: int) -> np.ndarray:
+        """The ``count`` highest scored entries still in the catalog, best first"""
+        candidates = candidates[self.songs[candidates] > 0]
+        scores = self.scores[candidates]
+        if len(candidates) > count:
+            top = np.argpartition(-scores, count)[:count]
+            candidates, scores = candidates[top], scores[top]
+        return candidates[np.argsort(-scores, kind="stable")]
+
+    def _top_prefixes(self) -> Dict[bytes, np.ndarray]:
+        """
+        Best entries of every prefix matching more than HEAVY_PREFIX_POSTINGS tokens.
+
+        Short prefixes of common words span a large part of the arrays, so
+        ranking them per query would be slow. There are few of them: prefixes
+        of one length are disjoint ranges, so at most
+        len(keys) / HEAVY_PREFIX_POSTINGS exist per length.
+        """
+        heavy: Dict[bytes, np.ndarray] = {}
+        for length in range(1, TOKEN_BYTES + 1):
+            prefixes = self.keys.astype(f"S{length}")
+            starts = np.flatnonzero(np.concatenate([[True], prefixes[1:] != prefixes[:-1]]))
+            ends = np.append(starts[1:], len(prefixes))
+            large = np.flatnonzero(ends - starts > HEAVY_PREFIX_POSTINGS)
+            if not len(large):
+                break
+            for run in large.tolist():
+                prefix = bytes(prefixes[starts[run]])
+                # Shorter keys in this run are whole tokens, not the prefix range
+                if len(prefix) == length:
+                    entries = np.unique(self.postings[starts[run]:ends[run]])
+                    heavy[prefix] = self._top(entries, HEAVY_PREFIX_DEPTH)
+        return heavy
+
+    def _span(self, key: bytes) -> Tuple[int, int, np.ndarray]:
+        """Array range of the tokens starting with ``key``, and matching entries from the delta"""
+        low = int(np.searchsorted(self.keys, key, side="left"))
+        high = int(np.searchsorted(self.keys, key + _KEY_END, side="left"))
+        delta_low, delta_high = bisect_left(self._delta, (key,)), bisect_left(self._delta, (key + _KEY_END,))
+        added = np.fromiter((entry for _, entry in self._delta[delta_low:delta_high]), dtype=np.int32)
+        return low, high, added
+
+    def _has_prefixes(self, candidates: np.ndarray, keys: List[bytes]) -> np.ndarray:
+        """Mask of the candidates that have, for every key, a token starting with it"""
+        mask = np.ones(len(candidates), dtype=bool)
+        built = candidates < len(self.entry_offsets) - 1
+        entries = candidates[built]
+        if len(entries):
+            starts = self.entry_offsets[entries]
+            counts = self.entry_offsets[entries + 1] - starts
+            segments = np.cumsum(counts) - counts
+            tokens = self.entry_keys[np.repeat(starts - segments, counts) + np.arange(counts.sum())]
+            for key in keys:
+                mask[built] &= np.logical_or.reduceat(tokens.astype(f"S{len(key)}") == key, segments)
+        # Entries added after the build have no stored keys
+        for position in np.flatnonzero(~built).tolist():
+            words = [_key(word) for word in normalize_tokens(self.texts[candidates[position]])]
+            mask[position] = all(any(word.startswith(key) for word in words) for key in keys)
+        return mask
+
+    def _rank(self, tokens: Tuple[str, ...]) -> List[int]:
+        keys = list({_key(token) for token in tokens})
+        spans = [self._span(key) for key in keys]
+        # Start from the word matching the fewest tokens and check the others per entry
+        driver = min(range(len(keys)), key=lambda i: spans[i][1] - spans[i][0])
+        low, high, added = spans[driver]
+        others = keys[:driver] + keys[driver + 1:]
+        truncated = [token for token in tokens if len(token.encode()) > TOKEN_BYTES]
+
+        if not others and not truncated:
+            heavy = self._heavy.get(keys[driver])
+            found = heavy if heavy is not None else self.postings[low:high]
+            return self._top(np.unique(np.concatenate([found, added])), MAX_SUGGESTIONS).tolist()
+
+        # Check the best scored entries first, widening until enough of them match
+        found = np.concatenate([self.postings[low:high], added])
+        scores = self.scores[found]
+        depth = 8 * MAX_SUGGESTIONS
+        while True:
+            candidates = np.unique(found if depth >= len(found) else found[np.argpartition(-scores, depth)[:depth]])
+            if others:
+                candidates = candidates[self._has_prefixes(candidates, others)]
+            if truncated:
+                candidates = candidates[[
+                    all(any(word.startswith(token) for word in normalize_tokens(self.texts[entry]))
+                        for token in truncated)
+                    for entry in candidates.tolist()
+                ]]
+            ranked = self._top(candidates, MAX_SUGGESTIONS)
+            if len(ranked) == MAX_SUGGESTIONS or depth >= len(found):
+                return ranked.tolist()
+            depth *= 8
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, any]]:
+        """
+        Complete a partially typed query.
+
+        Every word of the query must be the start of a word of the entry, so
+        "beat" and "the bea" both suggest "The Beatles".
+
+        Args:
+            query (str): Text typed so far
+            limit (int): Maximum suggestions (at most MAX_SUGGESTIONS)
+
+        Returns:
+            List of dicts with text, field, song_count and score, best first
+        """
+        tokens = tuple(normalize_tokens(query))
+        if not tokens:
+            return []
+        with self._lock:
+            ranked = self._cache.get(tokens)
+            if ranked is None:
+                ranked = self._rank(tokens)
+                self._cache[tokens] = ranked
+                while len(self._cache) > settings.SUGGEST_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(tokens)
+            return [
+                {
+                    "text": self.texts[entry],
+                    "field": SUGGEST_FIELDS[self.fields[entry]],
+                    "song_count": int(self.songs[entry]),
+                    "score": round(float(self.scores[entry]), 3),
+                }
+                for entry in ranked[:limit]
+            ]
+
+    def _add_entry(self, field: int, text: str) -> int:
+        if self.size == len(self.scores):
+            capacity = max(2 * self.size, 1024)
+            self.fields = np.resize(self.fields, capacity)
+            self.songs = np.resize(self.songs, capacity)
+            self.scores = np.resize(self.scores, capacity)
+        entry = self.size
+        self.size += 1
+        self.texts.append(text)
+        self.fields[entry], self.songs[entry], self.scores[entry] = field, 0, 0.0
+        self.lookup[field][text] = entry
+        for key in {_key(token) for token in normalize_tokens(text)}:
+            insort(self._delta, (key, entry))
+        return entry
+
+    def apply(self, songs: Iterable[Dict[str, any]], change: int) -> None:
+        """
+        Count songs in (``change`` 1) or out of (``change`` -1) the index.
+
+        Entries of inserted songs are created as needed and start with no
+        popularity; entries whose last song is deleted stop being suggested.
+        """
+        changed = set()
+        with self._lock:
+            for song in songs:
+                for field, name in enumerate(SUGGEST_FIELDS):
+                    text = song.get(name)
+                    if not text:
+                        continue
+                    entry = self.lookup[field].get(text)
+                    if entry is None:
+                        if change < 0:
+                            continue
+                        entry = self._add_entry(field, text)
+                    self.songs[entry] = max(int(self.songs[entry]) + change, 0)
+                    self.scores[entry] += change
+                    words = normalize_tokens(text)
+                    changed.update(words)
+                    # Changed entries compete again for the prefixes ranked at build time
+                    for prefix in {key[:length] for key in map(_key, words) for length in range(1, len(key) + 1)}:
+                        if prefix in self._heavy:
+                            self._heavy[prefix] = np.append(self._heavy[prefix], np.int32(entry))
+
+            if len(self._delta) > settings.SUGGEST_DELTA_MAX:
+                self._merge_delta()
+            # Drop cached queries whose every word starts a word of a changed entry
+            prefixes = {word[:length] for word in changed for length in range(1, len(word) + 1)}
+            for tokens in [tokens for tokens in self._cache if all(token in prefixes for token in tokens)]:
+                del self._cache[tokens]
+
+    def _merge_delta(self) -> None:
+        keys = np.array([key for key, _ in self._delta], dtype=f"S{TOKEN_BYTES}")
+        postings = np.array([entry for _, entry in self._delta], dtype=np.int32)
+        positions = np.searchsorted(self.keys, keys, side="right")
+        self.keys = np.insert(self.keys, positions, keys)
+        self.postings = np.insert(self.postings, positions, postings)
+        self._delta = []
+
+
+def _load_popularity(page_size: int) -> Dict[str, float]:
+    """All-time plays and likes per song, weighted like the trending engine"""
+    # song_metric_counters is readable by the service role only
+    client = get_supabase_admin_client()
+    rows = 0
+    weights = {"plays": settings.TRENDING_PLAY_WEIGHT, "likes": settings.TRENDING_LIKE_WEIGHT}
+    popularity: Dict[str, float] = {}
+    for metric, weight in weights.items():
+        pages = iter_table_pages(
+            client, "song_metric_counters", "song_id, count", page_size=page_size, key="song_id",
+            filters=lambda query, metric=metric: query.eq("metric", metric).eq("granularity", "all")
+        )
+        for page in pages:
+            for row in page:
+                popularity[row["song_id"]] = popularity.get(row["song_id"], 0.0) + weight * row["count"]
+            rows += len(page)
+    if not rows:
+        logger.warning("No song_metric_counters rows read; suggestions are ranked by song count only")
+    return popularity
+
+
+def build_suggest_index(page_size: int = 1000) -> SuggestIndex:
+    """Collect title, artist and album entries with a keyset scan of songs and score them"""
+    started = time.time()
+    client = get_supabase_client()
+    popularity = _load_popularity(page_size)
+
+    lookup: List[Dict[str, int]] = [{} for _ in SUGGEST_FIELDS]
+    texts, fields, songs, scores = [], [], [], []
+    for page in iter_table_pages(client, "songs", "id, title, artist, album", page_size=page_size):
+        for row in page:
+            score = 1.0 + popularity.get(row["id"], 0.0)
+            for field, name in enumerate(SUGGEST_FIELDS):
+                text = row.get(name)
+                if not text:
+                    continue
+                entry = lookup[field].get(text)
+                if entry is None:
+                    entry = lookup[field][text] = len(texts)
+                    texts.append(text)
+                    fields.append(field)
+                    songs.append(0)
+                    scores.append(0.0)
+                songs[entry] += 1
+                scores[entry] += score
+
+    index = SuggestIndex(texts, fields, songs, scores)
+    logger.info(f"Built suggest index of {len(index)} entries and {len(index.keys)} tokens "
+                f"in {time.time() - started:.2f}s")
+    return index
+
+
+_index: Optional[SuggestIndex] = None
+_stale = False
+_rebuilding = False
+_index_lock = threading.Lock()
+
+
+def _on_catalog_changed(action: str, songs: List[Dict[str, any]], **_) -> None:
+    global _stale
+    index = _index
+    if index is None:
+        return
+    if action in ("insert", "delete"):
+        index.apply(songs, 1 if action == "insert" else -1)
+    else:
+        _stale = True
+
+
+def _rebuild() -> None:
+    global _index, _rebuilding
+    try:
+        index = build_suggest_index()
+        with _index_lock:
+            _index = index
+    except Exception as e:
+        logger.error(f"Suggest index rebuild failed: {str(e)}")
+    finally:
+        _rebuilding = False
+
+
+def get_suggest_index() -> SuggestIndex:
+    """
+    Get the current suggest index.
+
+    The first call builds it synchronously. Afterwards, a stale or expired
+    index triggers one background rebuild while the current index keeps
+    serving requests.
+    """
+    global _index, _stale, _rebuilding
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _stale = False
+                _index = build_suggest_index()
+        return _index
+
+    expired = time.time() - _index.built_at > settings.SUGGEST_INDEX_TTL_SECONDS
+    if (_stale or expired) and not _rebuilding:
+        with _index_lock:
+            if not _rebuilding:
+                _rebuilding = True
+                _stale = False
+                threading.Thread(target=_rebuild, name="suggest-index-rebuild", daemon=True).start()
+    return _index
+
+
+events.subscribe(events.CATALOG_CHANGED, _on_catalog_changed)
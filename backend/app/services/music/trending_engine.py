@@ -0,0 +1,413 @@
+"""
+Trending Engine Module
+
+Keeps exponentially time-decayed popularity scores for songs and albums,
+updated incrementally from the plays and likes stored by every worker, and
+periodically publishes the top songs and albums into ``trending_songs`` and
+``trending_albums``.
+
+Scores use forward decay: an event with weight ``w`` at time ``t`` adds
+``w * exp(lambda * (t - landmark))`` to the item's stored value, where
+``lambda = ln 2 / half_life``. Stored values never need to be decayed in
+place; the current score is the stored value times
+``exp(-lambda * (now - landmark))``, a factor shared by every item, so the
+ranking is simply the order of the stored values. Late events (an old
+``played_at``) are weighted correctly for free. The landmark is moved forward
+before the exponent can overflow, and items whose score has decayed to
+nothing are dropped at that time.
+
+Events are read from the shared ``play_events`` and ``liked_songs`` tables
+rather than from this process's event bus, so the ranking covers the traffic
+of all replicas. The first sync seeds the scores from the last
+TRENDING_LOOKBACK_HOURS; later syncs read only rows stored since (new
+``play_events`` ids, newer like timestamps). Rows younger than
+SETTLE_SECONDS are left for the next sync so that transactions committing
+out of order are not skipped. Nothing is published before the seed has
+completed, so a restarted worker never replaces the lists with a handful of
+fresh events.
+
+Play events only carry a song id. Their weight is added to the song at once
+and to the song's album as soon as the album is known; weights for songs not
+seen before are held until the next publish resolves their albums with one
+query, which gives the same result because the stored values are additive.
+
+Scores live in process memory. Scheduled publishing runs on every worker
+with TRENDING_ENGINE_ENABLED, but only the holder of the "trending-publisher"
+worker lease syncs and publishes; if it stops, another worker takes over once
+the lease expires. Runs whose ranking equals the last published one are
+skipped, so retained snapshots cover real changes.
+
+API Endpoints that use this engine:
+- GET /admin/trending/preview -> TrendingEngine.publish(dry_run=True)
+- POST /admin/trending/publish -> TrendingEngine.publish()
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.core import events, scheduler
+from app.core.config import settings
+from app.core.workers import acquire_worker_lease, get_worker_id
+from app.services.base.base_client import get_supabase_admin_client, iter_table_pages
+
+logger = logging.getLogger(__name__)
+
+# Move the landmark forward once stored values have grown by e^50
+RENORMALIZE_EXPONENT = 50.0
+# Items whose current score is below this are forgotten
+MIN_SCORE = 1e-3
+RESOLVE_BATCH_SIZE = 200
+SYNC_PAGE_SIZE = 1000
+# Rows stored more recently than this are read on the next sync
+SETTLE_SECONDS = 30
+PUBLISHER_LEASE = "trending-publisher"
+
+_UNKNOWN = object()
+
+AlbumKey = Tuple[str, str]  # (album, artist)
+
+
+def _parse_timestamp(value) -> Optional[float]:
+    try:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # liked_songs.created_at has no time zone and is stored in UTC
+    return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _isoformat(timestamp: float, aware: bool = True) -> str:
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    return (moment if aware else moment.replace(tzinfo=None)).isoformat()
+
+
+class TrendingEngine:
+    """
+    Incrementally maintained, time-decayed song and album scores.
+    """
+
+    def __init__(self, half_life_hours: float, play_weight: float, like_weight: float, min_play_ms: int,
+                 lookback_hours: float):
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.play_weight = play_weight
+        self.like_weight = like_weight
+        self.min_play_ms = min_play_ms
+        self.lookback_seconds = lookback_hours * 3600
+        self.landmark = time.time()
+        self._songs: Dict[str, float] = defaultdict(float)
+        self._albums: Dict[AlbumKey, float] = defaultdict(float)
+        # Song id -> album key, or None for songs without an album
+        self._song_albums: Dict[str, Optional[AlbumKey]] = {}
+        # Weight of songs whose album is not resolved yet
+        self._unresolved: Dict[str, float] = defaultdict(float)
+        self._album_covers: Dict[AlbumKey, Optional[str]] = {}
+        self._lock = threading.Lock()
+        # Highest play_events id and newest liked_songs.created_at already counted
+        self._play_watermark: Optional[int] = None
+        self._like_watermark: Optional[str] = None
+        self._sync_lock = threading.Lock()
+        self.seeded_at: Optional[float] = None
+        self.last_published: Optional[Dict[str, any]] = None
+
+    # Event intake
+
+    def record(self, song_id: str, weight: float, timestamp: Optional[float] = None) -> None:
+        """Add an event of the given weight for a song"""
+        now = time.time()
+        # Events from the future would be inflated; count them as happening now
+        timestamp = now if timestamp is None else min(timestamp, now)
+        with self._lock:
+            value = weight * math.exp(self.decay_rate * (timestamp - self.landmark))
+            self._songs[song_id] += value
+            album = self._song_albums.get(song_id, _UNKNOWN)
+            if album is _UNKNOWN:
+                self._unresolved[song_id] += value
+            elif album is not None:
+                self._albums[album] += value
+
+    def _record_plays(self, plays: List[Dict[str, any]]) -> None:
+        for play in plays:
+            duration = play.get("duration_played_ms")
+            if duration is not None and duration < self.min_play_ms:
+                continue
+            self.record(play["song_id"], self.play_weight, _parse_timestamp(play.get("played_at")))
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Count the plays and likes stored by all workers since the last sync.
+
+        The first call seeds the scores from the last TRENDING_LOOKBACK_HOURS.
+
+        Returns:
+            Dict with the number of plays and likes read
+        """
+        with self._sync_lock:
+            client = get_supabase_admin_client()
+            now = time.time()
+            settled = now - SETTLE_SECONDS
+            counts = {"plays": 0, "likes": 0}
+
+            if self._play_watermark is None:
+                # Seed through the (played_at, id) index, then follow new rows by id
+                since = _isoformat(now - self.lookback_seconds)
+                pages = iter_table_pages(
+                    client, "play_events", "id, song_id, played_at, duration_played_ms", page_size=SYNC_PAGE_SIZE,
+                    sort="played_at",
+                    filters=lambda query: query.gte("played_at", since).lte("received_at", _isoformat(settled))
+                )
+            else:
+                watermark = self._play_watermark
+                pages = iter_table_pages(
+                    client, "play_events", "id, song_id, played_at, duration_played_ms", page_size=SYNC_PAGE_SIZE,
+                    filters=lambda query: query.gt("id", watermark).lte("received_at", _isoformat(settled))
+                )
+            play_watermark = self._play_watermark or 0
+            for page in pages:
+                self._record_plays(page)
+                play_watermark = max(play_watermark, max(row["id"] for row in page))
+                counts["plays"] += len(page)
+
+            like_since = self._like_watermark or _isoformat(now - self.lookback_seconds, aware=False)
+            like_watermark = like_since
+            pages = iter_table_pages(
+                client, "liked_songs", "id, song_id, created_at", page_size=SYNC_PAGE_SIZE, sort="created_at",
+                filters=lambda query: query.gt("created_at", like_since).lte("created_at", _isoformat(settled, aware=False))
+            )
+            for page in pages:
+                for row in page:
+                    self.record(row["song_id"], self.like_weight, _parse_timestamp(row["created_at"]))
+                like_watermark = max(like_watermark, page[-1]["created_at"])
+                counts["likes"] += len(page)
+
+            self._play_watermark, self._like_watermark = play_watermark, like_watermark
+            if self.seeded_at is None:
+                self.seeded_at = now
+                logger.info(f"Seeded trending scores from {counts['plays']} plays and {counts['likes']} likes")
+            return counts
+
+    def on_catalog_changed(self, action: str, songs: List[Dict[str, any]], **_) -> None:
+        with self._lock:
+            for song in songs:
+                song_id = song.get("id")
+                if action == "delete":
+                    self._songs.pop(song_id, None)
+                    self._unresolved.pop(song_id, None)
+                # Album or artist may have changed; resolve again on the next event
+                self._song_albums.pop(song_id, None)
+
+    # Maintenance
+
+    def _resolve_albums(self) -> None:
+        """Look up albums of newly seen songs and move their held weight onto the albums"""
+        with self._lock:
+            pending = list(self._unresolved)
+        if not pending:
+            return
+
+        client = get_supabase_admin_client()
+        found = {}
+        for start in range(0, len(pending), RESOLVE_BATCH_SIZE):
+            batch = pending[start:start + RESOLVE_BATCH_SIZE]
+            rows = (
+                client.table("songs")
+                .select("id, album, artist, cover_image_url")
+                .in_("id", batch)
+                .execute()
+                .data or []
+            )
+            found.update((row["id"], row) for row in rows)
+
+        with self._lock:
+            for song_id in pending:
+                value = self._unresolved.pop(song_id, 0.0)
+                row = found.get(song_id)
+                if row is None:
+                    # Deleted song; nothing to rank
+                    self._songs.pop(song_id, None)
+                    continue
+                album = (row["album"], row.get("artist") or "") if row.get("album") else None
+                self._song_albums[song_id] = album
+                if album is not None:
+                    self._albums[album] += value
+                    if row.get("cover_image_url"):
+                        self._album_covers.setdefault(album, row["cover_image_url"])
+
+    def _compact(self, now: float) -> None:
+        """Move the landmark forward when needed and forget fully decayed items"""
+        with self._lock:
+            exponent = self.decay_rate * (now - self.landmark)
+            scale = math.exp(-exponent)
+            threshold = MIN_SCORE / scale
+            for scores in (self._songs, self._albums):
+                for key in [key for key, value in scores.items() if value < threshold]:
+                    del scores[key]
+            for song_id in [song_id for song_id in self._song_albums if song_id not in self._songs]:
+                del self._song_albums[song_id]
+            for album in [album for album in self._album_covers if album not in self._albums]:
+                del self._album_covers[album]
+            if exponent > RENORMALIZE_EXPONENT:
+                for scores in (self._songs, self._albums, self._unresolved):
+                    for key in scores:
+                        scores[key] *= scale
+                self.landmark = now
+
+    # Ranking
+
+    def top(self, limit: int) -> Dict[str, List[Dict[str, any]]]:
+        """
+        Current top songs and albums, as trending table rows.
+
+        Args:
+            limit (int): Number of songs and of albums to return
+
+        Returns:
+            Dict containing:
+            - songs (List[Dict]): song_id, rank_position, trend_score
+            - albums (List[Dict]): album_name, artist_name, album_cover_url, rank_position, trend_score
+        """
+        with self._lock:
+            scale = math.exp(-self.decay_rate * (time.time() - self.landmark))
+            # Songs waiting for album resolution may since have been deleted, so only resolved songs are ranked
+            resolved = ((song_id, value) for song_id, value in self._songs.items() if song_id in self._song_albums)
+            songs = heapq.nlargest(limit, resolved, key=lambda item: item[1])
+            albums = heapq.nlargest(limit, self._albums.items(), key=lambda item: item[1])
+            covers = dict(self._album_covers)
+
+        return {
+            "songs": [
+                {"song_id": song_id, "rank_position": rank, "trend_score": round(value * scale, 2)}
+                for rank, (song_id, value) in enumerate(songs, start=1)
+            ],
+            "albums": [
+                {
+                    "album_name": album,
+                    "artist_name": artist,
+                    "album_cover_url": covers.get((album, artist)),
+                    "rank_position": rank,
+                    "trend_score": round(value * scale, 2),
+                }
+                for rank, ((album, artist), value) in enumerate(albums, start=1)
+            ],
+        }
+
+    def publish(self, limit: Optional[int] = None, dry_run: bool = False) -> Dict[str, any]:
+        """
+        Publish the current top-K into the trending tables.
+
+        POST /admin/trending/publish
+
+        Args:
+            limit (int, optional): Number of songs and albums (default: TRENDING_TOP_K)
+            dry_run (bool): Return what would be published without writing it
+
+        Stored plays and likes are synced first. Nothing is written until the
+        scores have been seeded, or when the ranking equals the last one this
+        worker published.
+
+        Returns:
+            Dict containing:
+            - dry_run (bool): Whether the tables were left untouched
+            - songs (List[Dict]): Trending song rows
+            - albums (List[Dict]): Trending album rows
+            - published_at (float): Unix time of the run
+            - skipped (str, optional): Why nothing was written
+
+        Raises:
+            RuntimeError: If writing a trending table fails
+        """
+        from app.services.admin.admin_service import AdminService
+
+        self.sync()
+        now = time.time()
+        self._resolve_albums()
+        self._compact(now)
+        result = {"dry_run": dry_run, **self.top(limit or settings.TRENDING_TOP_K), "published_at": now}
+        if dry_run:
+            logger.info(f"Trending dry run: would publish {len(result['songs'])} songs and {len(result['albums'])} albums")
+            return result
+
+        if self.seeded_at is None:
+            result["skipped"] = "Scores are not seeded yet"
+            return result
+        if not result["songs"]:
+            # Nothing played within the lookback; keep the published lists
+            result["skipped"] = "No scored songs yet"
+            return result
+        if self.last_published and self._ranking(self.last_published) == self._ranking(result):
+            result["skipped"] = "Ranking unchanged"
+            return result
+
+        admin_service = AdminService(use_service_role=True)
+        for table, rows, update in (
+            ("songs", result["songs"], admin_service.update_trending_songs),
+            ("albums", result["albums"], admin_service.update_trending_albums),
+        ):
+            if rows and not update(rows).get("success"):
+                raise RuntimeError(f"Failed to publish trending {table}")
+        self.last_published = result
+        logger.info(f"Published {len(result['songs'])} trending songs and {len(result['albums'])} trending albums")
+        return result
+
+    @staticmethod
+    def _ranking(result: Dict[str, any]) -> Tuple:
+        return (
+            tuple(row["song_id"] for row in result["songs"]),
+            tuple((row["album_name"], row["artist_name"]) for row in result["albums"]),
+        )
+
+    def get_stats(self) -> Dict[str, any]:
+        with self._lock:
+            return {
+                "songs_scored": len(self._songs),
+                "albums_scored": len(self._albums),
+                "unresolved_songs": len(self._unresolved),
+                "half_life_hours": math.log(2) / self.decay_rate / 3600,
+                "landmark": self.landmark,
+                "seeded_at": self.seeded_at,
+                "play_watermark": self._play_watermark,
+                "like_watermark": self._like_watermark,
+                "last_published_at": self.last_published["published_at"] if self.last_published else None,
+            }
+
+
+_engine: Optional[TrendingEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_trending_engine() -> TrendingEngine:
+    """Get or create the process-wide trending engine, subscribed to catalog events"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = TrendingEngine(
+                    half_life_hours=settings.TRENDING_HALF_LIFE_HOURS,
+                    play_weight=settings.TRENDING_PLAY_WEIGHT,
+                    like_weight=settings.TRENDING_LIKE_WEIGHT,
+                    min_play_ms=settings.TRENDING_MIN_PLAY_MS,
+                    lookback_hours=settings.TRENDING_LOOKBACK_HOURS,
+                )
+                events.subscribe(events.CATALOG_CHANGED, engine.on_catalog_changed)
+                _engine = engine
+    return _engine
+
+
+def _publish_if_leader() -> Optional[Dict[str, any]]:
+    """Publish if this worker holds (or takes over) the publisher lease"""
+    ttl = 3 * settings.TRENDING_PUBLISH_INTERVAL_SECONDS
+    if not acquire_worker_lease(PUBLISHER_LEASE, get_worker_id(), ttl):
+        return None
+    return get_trending_engine().publish(dry_run=settings.TRENDING_DRY_RUN)
+
+
+def start_trending_engine() -> None:
+    """Schedule periodic publishing; only the worker holding the publisher lease publishes"""
+    if not settings.TRENDING_ENGINE_ENABLED:
+        return
+    scheduler.schedule("trending-publish", settings.TRENDING_PUBLISH_INTERVAL_SECONDS, _publish_if_leader)
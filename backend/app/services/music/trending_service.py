@@ -2,33 +2,92 @@
 Trending Service Module
 
 Handles trending songs and albums queries.
+
+Trending lists are published as immutable versioned snapshots, with one
+pointer row per list naming the current version (see AdminService). Readers
+resolve the pointer, cached for TRENDING_VERSION_CACHE_SECONDS, and then read
+rows of that version only. Because a version never changes once published,
+its rows are cached in-process by version and the version doubles as the
+response ETag.
 """
 
-from typing import Dict
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
 from app.services.base.base_client import BaseSupabaseClient
+from app.services.music.song_projection import SONG_COLUMNS
+
+TRENDING_KINDS = {"songs": "trending_songs", "albums": "trending_albums"}
+# Snapshot pages (kind, version, limit, columns) kept in memory
+SNAPSHOT_CACHE_SIZE = 64
+
+_versions: Dict[str, Tuple[float, Optional[int]]] = {}
+_snapshots: "OrderedDict[Tuple[str, int, int, str], list]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def invalidate_trending_version(kind: Optional[str] = None) -> None:
+    """Forget the cached current version of one list (or all), after a publish or rollback"""
+    with _cache_lock:
+        if kind is None:
+            _versions.clear()
+        else:
+            _versions.pop(kind, None)
 
 
 class TrendingService(BaseSupabaseClient):
     """Service for trending content operations"""
 
-    def get_trending_songs(self, limit: int = 10) -> Dict:
-        """Get trending songs from database"""
-        try:
-            response = self.supabase.table("trending_songs").select(
-                "*, songs(title, artist, album, cover_image_url)"
-            ).order("rank_position").limit(limit).execute()
+    def get_current_version(self, kind: str) -> Optional[int]:
+        """Get the published version of a trending list, or None if nothing was published yet"""
+        now = time.monotonic()
+        with _cache_lock:
+            cached = _versions.get(kind)
+        if cached and now - cached[0] < settings.TRENDING_VERSION_CACHE_SECONDS:
+            return cached[1]
 
-            return {"trending_songs": response.data}
+        response = self.supabase.table("trending_pointers").select("version").eq("kind", kind).execute()
+        version = response.data[0]["version"] if response.data else None
+        with _cache_lock:
+            _versions[kind] = (now, version)
+        return version
+
+    def _get_snapshot(self, kind: str, select: str, limit: int) -> Tuple[Optional[int], list]:
+        version = self.get_current_version(kind)
+        if version is None:
+            return None, []
+
+        key = (kind, version, limit, select)
+        with _cache_lock:
+            if key in _snapshots:
+                _snapshots.move_to_end(key)
+                return version, _snapshots[key]
+
+        rows = self.supabase.table(TRENDING_KINDS[kind]).select(select).eq(
+            "version", version
+        ).order("rank_position").limit(limit).execute().data
+        with _cache_lock:
+            _snapshots[key] = rows
+            while len(_snapshots) > SNAPSHOT_CACHE_SIZE:
+                _snapshots.popitem(last=False)
+        return version, rows
+
+    def get_trending_songs(self, limit: int = 10, full_songs: bool = False) -> Dict:
+        """Get trending songs of the published version (with SONG_COLUMNS song rows if ``full_songs``)"""
+        try:
+            columns = SONG_COLUMNS if full_songs else "title, artist, album, cover_image_url, cover_images"
+            version, rows = self._get_snapshot("songs", f"*, songs({columns})", limit)
+            return {"trending_songs": rows, "version": version}
         except Exception as e:
             return {"error": str(e), "trending_songs": []}
 
     def get_trending_albums(self, limit: int = 10) -> Dict:
-        """Get trending albums from database"""
+        """Get trending albums of the published version"""
         try:
-            response = self.supabase.table("trending_albums").select(
-                "*"
-            ).order("rank_position").limit(limit).execute()
-
-            return {"trending_albums": response.data}
+            version, rows = self._get_snapshot("albums", "*", limit)
+            return {"trending_albums": rows, "version": version}
         except Exception as e:
             return {"error": str(e), "trending_albums": []}
@@ -0,0 +1,36 @@
+-- Content-hash index of objects written to Supabase Storage
+-- Used to skip storage writes for byte-identical uploads
+CREATE TABLE IF NOT EXISTS storage_objects (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    bucket VARCHAR(63) NOT NULL,
+    path VARCHAR(500) NOT NULL,
+    content_hash CHAR(64) NOT NULL, -- SHA-256 hex digest of the object bytes
+    size_bytes BIGINT NOT NULL,
+    content_type VARCHAR(255),
+    dedup_hits INTEGER NOT NULL DEFAULT 0, -- Uploads that reused this object
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP WITH TIME ZONE,
+    UNIQUE(bucket, content_hash),
+    UNIQUE(bucket, path)
+);
+
+CREATE INDEX IF NOT EXISTS idx_storage_objects_path ON storage_objects(path);
+
+-- Only the backend (service role) reads or writes the index
+ALTER TABLE storage_objects ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access to storage_objects"
+ON storage_objects
+FOR ALL
+TO service_role
+USING (true)
+WITH CHECK (true);
+
+-- Atomically count an upload that was served by an existing object
+CREATE OR REPLACE FUNCTION record_storage_dedup_hit(p_bucket VARCHAR, p_content_hash CHAR(64))
+RETURNS VOID AS $$
+    UPDATE storage_objects
+    SET dedup_hits = dedup_hits + 1,
+        last_hit_at = CURRENT_TIMESTAMP
+    WHERE bucket = p_bucket AND content_hash = p_content_hash;
+$$ LANGUAGE sql;
@@ -0,0 +1,3 @@
+-- Resized cover thumbnails generated at upload time
+-- Shape: {"64": {"jpeg": "<url>", "webp": "<url>"}, "300": {...}, "640": {...}}
+ALTER TABLE songs ADD COLUMN IF NOT EXISTS cover_images JSONB;
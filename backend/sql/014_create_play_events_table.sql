@@ -0,0 +1,25 @@
+-- Raw play events recorded by POST /events/plays
+-- Written in bulk by the play event pipeline; one row per play
+CREATE TABLE IF NOT EXISTS play_events (
+    id BIGSERIAL PRIMARY KEY,
+    event_id UUID NOT NULL UNIQUE, -- Makes retried and replayed inserts idempotent
+    song_id UUID NOT NULL, -- No foreign key: a play of a since-deleted song must not fail the whole batch
+    user_id UUID,
+    played_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    duration_played_ms INTEGER CHECK (duration_played_ms IS NULL OR duration_played_ms >= 0),
+    source VARCHAR(32), -- e.g. playlist, search, queue
+    received_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_play_events_song_played_at ON play_events(song_id, played_at);
+CREATE INDEX IF NOT EXISTS idx_play_events_played_at ON play_events(played_at);
+
+-- Only the backend (service role) reads or writes play events
+ALTER TABLE play_events ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access to play_events"
+ON play_events
+FOR ALL
+TO service_role
+USING (true)
+WITH CHECK (true);
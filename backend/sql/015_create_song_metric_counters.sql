@@ -0,0 +1,43 @@
+-- Pre-aggregated per-song event counters used by the top songs analytics
+-- Each row counts one metric for one song in one time bucket:
+--   granularity 'hour' and 'day' rows start at the bucket boundary (UTC)
+--   granularity 'all' rows hold all-time totals with bucket_start = epoch
+CREATE TABLE IF NOT EXISTS song_metric_counters (
+    metric VARCHAR(16) NOT NULL CHECK (metric IN ('plays', 'likes', 'playlist_adds')),
+    granularity VARCHAR(4) NOT NULL CHECK (granularity IN ('hour', 'day', 'all')),
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    song_id UUID NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, granularity, bucket_start, song_id)
+);
+
+-- Top-K of a single bucket (e.g. all-time) without reading every song
+CREATE INDEX IF NOT EXISTS idx_song_metric_counters_rank
+ON song_metric_counters(metric, granularity, bucket_start, count DESC);
+
+CREATE INDEX IF NOT EXISTS idx_song_metric_counters_song
+ON song_metric_counters(song_id, metric, granularity);
+
+ALTER TABLE song_metric_counters ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access to song_metric_counters"
+ON song_metric_counters
+FOR ALL
+TO service_role
+USING (true)
+WITH CHECK (true);
+
+-- Add a batch of counter deltas in one round trip
+-- deltas: [{"metric": "plays", "granularity": "hour", "bucket_start": "...", "song_id": "...", "count": 3}, ...]
+CREATE OR REPLACE FUNCTION increment_song_metric_counters(deltas JSONB)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+AS $$
+    INSERT INTO song_metric_counters (metric, granularity, bucket_start, song_id, count)
+    SELECT metric, granularity, bucket_start, song_id, count
+    FROM jsonb_to_recordset(deltas)
+        AS d(metric VARCHAR(16), granularity VARCHAR(4), bucket_start TIMESTAMPTZ, song_id UUID, count BIGINT)
+    ON CONFLICT (metric, granularity, bucket_start, song_id)
+    DO UPDATE SET count = song_metric_counters.count + EXCLUDED.count;
+$$;
@@ -0,0 +1,23 @@
+-- HyperLogLog sketches of the listeners of each song per day
+-- Each API worker writes its own row (worker_id) so workers never overwrite
+-- each other; rows are merged when queried. sketch is a base64 encoded
+-- HyperLogLog (see app/services/analytics/hyperloglog.py), at most ~4 KB.
+CREATE TABLE IF NOT EXISTS song_listener_sketches (
+    song_id UUID NOT NULL,
+    day DATE NOT NULL,
+    worker_id VARCHAR(64) NOT NULL,
+    sketch TEXT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (song_id, day, worker_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_song_listener_sketches_day ON song_listener_sketches(day);
+
+ALTER TABLE song_listener_sketches ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access to song_listener_sketches"
+ON song_listener_sketches
+FOR ALL
+TO service_role
+USING (true)
+WITH CHECK (true);
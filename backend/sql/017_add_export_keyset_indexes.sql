@@ -0,0 +1,8 @@
+-- Indexes matching the (timestamp, id) keyset used by GET /admin/analytics/export,
+-- so every exported page is a single index range scan
+CREATE INDEX IF NOT EXISTS idx_play_events_played_at_id ON play_events(played_at, id);
+CREATE INDEX IF NOT EXISTS idx_liked_songs_created_at_id ON liked_songs(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_playlist_songs_added_at_id ON playlist_songs(added_at, id);
+
+-- Superseded by idx_play_events_played_at_id
+DROP INDEX IF EXISTS idx_play_events_played_at;
@@ -0,0 +1,54 @@
+-- Versioned trending lists
+-- Each publication writes its rows under a new snapshot id (version) and then
+-- moves the single pointer row for its list to that version, so readers never
+-- see a half-written or empty list. Older snapshots are kept for rollback and
+-- pruned by the backend; deleting a snapshot deletes its rows.
+CREATE TABLE IF NOT EXISTS trending_snapshots (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(8) NOT NULL CHECK (kind IN ('songs', 'albums')),
+    entries INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_trending_snapshots_kind ON trending_snapshots(kind, id DESC);
+
+-- One row per list naming the version readers should use
+CREATE TABLE IF NOT EXISTS trending_pointers (
+    kind VARCHAR(8) PRIMARY KEY CHECK (kind IN ('songs', 'albums')),
+    version BIGINT NOT NULL REFERENCES trending_snapshots(id),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE trending_songs
+ADD COLUMN IF NOT EXISTS version BIGINT REFERENCES trending_snapshots(id) ON DELETE CASCADE;
+ALTER TABLE trending_albums
+ADD COLUMN IF NOT EXISTS version BIGINT REFERENCES trending_snapshots(id) ON DELETE CASCADE;
+
+-- Adopt the rows already published as the first snapshot of each list
+DO $$
+DECLARE
+    snapshot_id BIGINT;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM trending_pointers WHERE kind = 'songs') THEN
+        INSERT INTO trending_snapshots (kind, entries)
+        SELECT 'songs', COUNT(*) FROM trending_songs
+        RETURNING id INTO snapshot_id;
+        UPDATE trending_songs SET version = snapshot_id WHERE version IS NULL;
+        INSERT INTO trending_pointers (kind, version) VALUES ('songs', snapshot_id);
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM trending_pointers WHERE kind = 'albums') THEN
+        INSERT INTO trending_snapshots (kind, entries)
+        SELECT 'albums', COUNT(*) FROM trending_albums
+        RETURNING id INTO snapshot_id;
+        UPDATE trending_albums SET version = snapshot_id WHERE version IS NULL;
+        INSERT INTO trending_pointers (kind, version) VALUES ('albums', snapshot_id);
+    END IF;
+END $$;
+
+ALTER TABLE trending_songs ALTER COLUMN version SET NOT NULL;
+ALTER TABLE trending_albums ALTER COLUMN version SET NOT NULL;
+
+-- Readers fetch one version in rank order
+CREATE INDEX IF NOT EXISTS idx_trending_songs_version_rank ON trending_songs(version, rank_position);
+CREATE INDEX IF NOT EXISTS idx_trending_albums_version_rank ON trending_albums(version, rank_position);
@@ -0,0 +1,38 @@
+-- Named leases that let one worker process at a time run a periodic job
+-- (e.g. publishing trending lists) when several replicas are deployed
+CREATE TABLE IF NOT EXISTS worker_leases (
+    name VARCHAR(64) PRIMARY KEY,
+    holder VARCHAR(255) NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+ALTER TABLE worker_leases ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role full access to worker_leases"
+ON worker_leases
+FOR ALL
+TO service_role
+USING (true)
+WITH CHECK (true);
+
+-- Take the lease if it is free or expired, or extend it if p_holder already holds it
+-- Returns whether p_holder holds the lease afterwards
+CREATE OR REPLACE FUNCTION acquire_worker_lease(p_name VARCHAR, p_holder VARCHAR, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    acquired BOOLEAN;
+BEGIN
+    INSERT INTO worker_leases (name, holder, expires_at)
+    VALUES (p_name, p_holder, NOW() + make_interval(secs => p_ttl_seconds))
+    ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder,
+            expires_at = EXCLUDED.expires_at
+        WHERE worker_leases.holder = EXCLUDED.holder
+           OR worker_leases.expires_at < NOW()
+    RETURNING TRUE INTO acquired;
+    RETURN COALESCE(acquired, FALSE);
+END;
+$$;
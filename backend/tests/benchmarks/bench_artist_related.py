@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark for related artists at catalog scale (100k artists by default).
+
+Generates synthetic listening data in which users follow a few "scenes" of
+artists, factorizes it the same way ArtistEmbeddingService.rebuild() does,
+writes the vectors with write_embeddings() and then measures:
+
+- build: sparse matrix assembly and truncated SVD
+- single: one GET /artists/{id}/related lookup through ArtistEmbeddingIndex
+- batched: many artists per call through top_k_cosine
+- naive: full dot product plus a complete argsort per query, for comparison
+
+It also reports how many of the related artists come from the query artist's
+own scene, as a sanity check that the embeddings carry signal.
+
+Run from the backend directory:
+    python tests/benchmarks/bench_artist_related.py [--artists 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+from app.services.music.artist_embeddings import ArtistEmbeddingIndex, top_k_cosine, write_embeddings
+
+
+def make_interactions(artists, users, scenes, per_user, rng):
+    """(user, artist) pairs where each user mostly listens within two scenes"""
+    scene_of = rng.integers(0, scenes, size=artists)
+    members = [np.flatnonzero(scene_of == scene) for scene in range(scenes)]
+    user_rows, artist_columns = [], []
+    for user in range(users):
+        home = rng.integers(0, scenes, size=2)
+        picks = [rng.choice(members[scene], size=per_user // 2) for scene in home]
+        # Some listening outside the user's scenes
+        picks.append(rng.integers(0, artists, size=per_user // 5))
+        chosen = np.concatenate(picks)
+        user_rows.append(np.full(len(chosen), user))
+        artist_columns.append(chosen)
+    return np.concatenate(user_rows), np.concatenate(artist_columns), scene_of
+
+
+def build_vectors(user_rows, artist_columns, users, artists, dimensions):
+    """Same weighting and factorization as ArtistEmbeddingService.rebuild()"""
+    matrix = sparse.csr_matrix(
+        (np.ones(len(user_rows), dtype=np.float32), (user_rows, artist_columns)), shape=(users, artists)
+    )
+    matrix.data = np.log1p(matrix.data)
+    row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = sparse.diags(1 / np.maximum(row_norms, 1e-12)) @ matrix
+    _, singular_values, right = svds(matrix.astype(np.float64), k=dimensions)
+    vectors = (right.T * singular_values).astype(np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--artists", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--scenes", type=int, default=500)
+    parser.add_argument("--per-user", type=int, default=20)
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    user_rows, artist_columns, scene_of = make_interactions(
+        args.artists, args.users, args.scenes, args.per_user, rng
+    )
+    print(f"{args.artists} artists, {args.users} users, {len(user_rows)} interactions, {args.dimensions} dimensions")
+
+    started = time.perf_counter()
+    vectors = build_vectors(user_rows, artist_columns, args.users, args.artists, args.dimensions)
+    print(f"build:    {time.perf_counter() - started:8.2f} s")
+
+    artist_ids = [str(uuid.UUID(int=int(value))) for value in rng.integers(0, 2 ** 63, size=args.artists)]
+    with tempfile.TemporaryDirectory() as root:
+        write_embeddings(root, artist_ids, vectors, {"built_at": time.time()})
+        index = ArtistEmbeddingIndex(root)
+        ids, mapped = index.refresh()
+
+        queries = [artist_ids[i] for i in rng.integers(0, args.artists, size=args.batch)]
+        index.related(queries[:1], args.limit)
+        single = timed(lambda: index.related([queries[0]], args.limit), 50)
+        print(f"single:   {single * 1e3:8.2f} ms per artist")
+
+        rows = np.searchsorted(ids, np.array(queries, dtype="S36"))
+        query_vectors = np.asarray(mapped[rows])
+        batched = timed(lambda: top_k_cosine(mapped, query_vectors, args.limit, exclude=rows), 3)
+        print(f"batched:  {batched / args.batch * 1e3:8.2f} ms per artist ({args.batch} per call)")
+
+        dense = np.asarray(mapped)
+
+        def naive():
+            for vector in query_vectors[:16]:
+                np.argsort(-(dense @ vector))[:args.limit + 1]
+        print(f"naive:    {timed(naive, 1) / 16 * 1e3:8.2f} ms per artist (full sort)")
+
+        # Scene agreement of the results
+        position_of = {artist_id: position for position, artist_id in enumerate(artist_ids)}
+        related = index.related(queries, args.limit)
+        agree = total = 0
+        for artist_id, neighbours in related.items():
+            scene = scene_of[position_of[artist_id]]
+            agree += sum(scene_of[position_of[neighbour]] == scene for neighbour, _ in neighbours)
+            total += len(neighbours)
+        print(f"same scene: {agree / max(total, 1):.1%} of related artists (chance {1 / args.scenes:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for song list serialization.
+
+Compares the previous response path (hand-built dict per song, FastAPI's
+jsonable_encoder, then Starlette's json.dumps) with the song projection plus
+FastJSONResponse (orjson) path, and reports the cost per row.
+
+Run from the backend directory:
+    python tests/benchmarks/bench_song_serialization.py
+"""
+
+import json
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import FastJSONResponse
+from app.services.music.song_projection import project_song
+
+
+def make_rows(count):
+    rows = []
+    for i in range(count):
+        cover = f"https://example.supabase.co/storage/v1/object/public/covers/artist_{i}_song_{i}"
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "title": f"Song number {i}",
+            "artist": f"Artist {i % 37}",
+            "album": f"Album {i % 11}",
+            "duration_seconds": 180 + i % 120,
+            "cover_image_url": f"{cover}.jpg",
+            "cover_images": {
+                str(size): {"jpeg": f"{cover}_{size}.jpg", "webp": f"{cover}_{size}.webp"}
+                for size in (64, 300, 640)
+            },
+            "file_path": f"artist_{i}_song_{i}.mp3",
+            "created_at": "2024-05-01T12:00:00.000000+00:00",
+        })
+    return rows
+
+
+def audio_url(row):
+    return f"https://example.supabase.co/storage/v1/object/public/songs/{row['file_path']}"
+
+
+def previous_path(rows):
+    songs = []
+    for song in rows:
+        songs.append({
+            "id": song['id'],
+            "title": song['title'],
+            "artist": song['artist'],
+            "album": song.get('album'),
+            "duration_seconds": song.get('duration_seconds'),
+            "cover_image_url": song.get('cover_image_url'),
+            "cover_images": song.get('cover_images'),
+            "audio_url": audio_url(song),
+            "created_at": song['created_at']
+        })
+    content = jsonable_encoder({"songs": songs, "page": 1, "limit": len(rows), "total": 5000})
+    # Same settings as starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def projected_path(rows):
+    songs = [project_song(song, audio_url(song), created_at=song['created_at']) for song in rows]
+    return FastJSONResponse({"songs": songs, "page": 1, "limit": len(rows), "total": 5000}).body
+
+
+def bench(func, rows, repeat=5):
+    loops, _ = timeit.Timer(lambda: func(rows)).autorange()
+    best = min(timeit.Timer(lambda: func(rows)).repeat(repeat=repeat, number=loops)) / loops
+    return best
+
+
+def main():
+    print(f"{'rows':>6} {'path':<34} {'per page':>12} {'per row':>10}")
+    for count in (50, 100):
+        rows = make_rows(count)
+        assert json.loads(previous_path(rows)) == json.loads(projected_path(rows))
+        baseline = None
+        for name, func in (("jsonable_encoder + json.dumps", previous_path), ("project_song + orjson", projected_path)):
+            seconds = bench(func, rows)
+            baseline = baseline or seconds
+            print(
+                f"{count:>6} {name:<34} {seconds * 1e6:>9.1f} us {seconds / count * 1e6:>7.2f} us"
+                + (f"   ({baseline / seconds:.1f}x)" if seconds != baseline else "")
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GET /suggest at catalog scale (1M entries by default).
+
+Generates synthetic titles, artists and albums from a Zipf-distributed word
+list with heavy-tailed popularity scores, builds a SuggestIndex over them and
+then measures:
+
+- build: tokenizing the entries and sorting the token keys
+- cold: uncached queries for prefixes of 1 to 6 characters and two words
+- cached: the same queries answered from the per-query cache
+- insert: applying a catalog insert event of new songs, including the
+  cache invalidation and delta merges it causes
+- ilike: a linear substring scan over the entries, standing in for the
+  ``ilike`` query that instant search used before
+
+Run from the backend directory:
+    python tests/benchmarks/bench_suggest.py [--entries 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import numpy as np
+
+from app.services.music.suggest_index import SUGGEST_FIELDS, SuggestIndex
+
+LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+def make_words(count, rng):
+    lengths = rng.integers(3, 11, size=count)
+    return list(dict.fromkeys("".join(rng.choice(LETTERS, size=length)) for length in lengths))
+
+
+def make_entries(entries, words, rng):
+    """Distinct entry texts of 1 to 4 Zipf-chosen words, with fields, song counts and scores"""
+    texts = {}
+    while len(texts) < entries:
+        ranks = np.minimum(rng.zipf(1.3, size=entries * 4), len(words)) - 1
+        lengths = rng.integers(1, 5, size=entries)
+        offsets = np.cumsum(lengths) - lengths
+        for offset, length in zip(offsets.tolist(), lengths.tolist()):
+            texts[" ".join(words[rank].capitalize() for rank in ranks[offset:offset + length])] = None
+            if len(texts) == entries:
+                break
+    texts = list(texts)
+    fields = rng.choice(len(SUGGEST_FIELDS), size=len(texts), p=[0.7, 0.15, 0.15])
+    songs = np.minimum(rng.zipf(2.0, size=len(texts)), 1000)
+    scores = songs + rng.pareto(1.2, size=len(texts)) * 100
+    return texts, fields, songs, scores
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1e3
+    return f"p50 {np.percentile(samples, 50):7.3f} ms  p99 {np.percentile(samples, 99):7.3f} ms"
+
+
+def timed_each(func, items):
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        func(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--inserts", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    words = make_words(args.words, rng)
+    texts, fields, songs, scores = make_entries(args.entries, words, rng)
+
+    started = time.perf_counter()
+    index = SuggestIndex(texts, fields, songs, scores)
+    print(f"{len(index)} entries, {len(index.keys)} tokens "
+          f"({(index.keys.nbytes + index.postings.nbytes) / 2 ** 20:.0f} MiB of key arrays)")
+    print(f"build:  {time.perf_counter() - started:8.2f} s")
+
+    # Queries are prefixes of words weighted by how often they appear, like real typing
+    picks = [words[rank] for rank in np.minimum(rng.zipf(1.3, size=args.queries), len(words)) - 1]
+    for length in (1, 2, 3, 4, 6):
+        queries = list(dict.fromkeys(word[:length] for word in picks))
+        cold = timed_each(lambda query: index.suggest(query, args.limit), queries)
+        cached = timed_each(lambda query: index.suggest(query, args.limit), queries)
+        print(f"{length} chars:  cold {percentiles(cold)}   cached {percentiles(cached)}   ({len(queries)} queries)")
+
+    pairs = list(dict.fromkeys(f"{picks[i]} {picks[i + 1][:3]}" for i in range(0, len(picks) - 1, 2)))
+    cold = timed_each(lambda query: index.suggest(query, args.limit), pairs)
+    print(f"2 words:  cold {percentiles(cold)}   ({len(pairs)} queries)")
+
+    batches = [
+        [{"title": f"{words[rng.integers(len(words))].capitalize()} Session {batch}-{song}",
+          "artist": f"New Artist {batch}", "album": None} for song in range(10)]
+        for batch in range(args.inserts)
+    ]
+    inserts = timed_each(lambda batch: index.apply(batch, 1), batches)
+    print(f"insert: {percentiles(inserts)} per event of 10 songs ({len(index._delta)} tokens in delta)")
+
+    def ilike(query):
+        found = [text for text in texts if query in text.lower()]
+        return found[:args.limit]
+    scan = timed_each(ilike, [word[:3] for word in picks[:5]])
+    print(f"ilike:  {percentiles(scan)} (substring scan of every entry)")
+
+
+if __name__ == "__main__":
+    main()